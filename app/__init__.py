@@ -1,50 +1,160 @@
 #changing this approach to use the plugins architecture
 #changing app/__init to accomodate plugins
 #changing app/commands/__init to accomodate plugins
-import pkgutil
+import atexit
+import collections
 import importlib
-import inspect
 import os
+import time
+import weakref
 from app.commands import CommandHandler
 from app.commands import Command
+from app.commands.cache import ResultCache
+from app import numeric
+from app.plugin_index import PluginIndex, LazyCommand
 import logging
-import logging.config
-from dotenv import load_dotenv
+#asyncio, inspect, pkgutil, dotenv, logging.config, app.logqueue, app.batch and the metrics module are imported
+#where they are used, none of them is needed to reach the first prompt
 class App:
     #linting this block
     """
     This class is the main application class
     """
+    plugins_package = 'app.plugins'
+    plugin_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plugins')
+    unsandboxed_plugins = frozenset({'exit'}) #plugins that end the process, so they must run in it
+
     def __init__(self):
         """
         This is the constructor for the App class
         """
+        self.startup_phases = {} #phase -> seconds, reported by --profile-startup
+        self.minimal = os.environ.get('STARTUP', '').strip().lower() == 'minimal'
         os.makedirs('logs', exist_ok=True) #create a logs directory if it does not exist
-        self.configure_logging()
-        load_dotenv() #load the .env file
-        self.settings = self.load_environment_variables()
+        self.timed_phase('dotenv', self.load_dotenv) #load the .env file first so it can select the logging profile
+        self.minimal = os.environ.get('STARTUP', '').strip().lower() == 'minimal' #.env may have selected it
+        self.timed_phase('logging', self.configure_logging)
+        self.settings = self.timed_phase('settings', self.load_environment_variables)
         self.settings.setdefault('ENV', 'DEV')
-        self.command_handler = CommandHandler()
+        if self.minimal:
+            self.settings.setdefault('PLUGIN_INDEX', 'true') #plugins are imported on first use
+        self.timed_phase('numeric', self.configure_numeric_backend)
+        self.reloader = None #PluginReloader, created by load_plugins when PLUGIN_RELOAD is enabled
+        self.sandbox = None #SandboxPool, created by load_plugins when SANDBOX_PLUGINS names any plugin
+        self.sandboxed = {name.strip() for name in self.settings.get('SANDBOX_PLUGINS', '').split(',') if name.strip()}
+        if self.sandboxed & self.unsandboxed_plugins:
+            logging.warning(f'SANDBOX_PLUGINS: {", ".join(sorted(self.sandboxed & self.unsandboxed_plugins))} cannot be sandboxed, it must end the main process')
+            self.sandboxed -= self.unsandboxed_plugins
+        self.command_handler = self.timed_phase('handler', self.create_command_handler)
+
+    def timed_phase(self, phase:str, func):
+        """
+        This method runs one startup phase and records how long it took
+        """
+        start = time.perf_counter()
+        result = func()
+        self.startup_phases[phase] = self.startup_phases.get(phase, 0.0) + time.perf_counter() - start
+        return result
+
+    def load_dotenv(self):
+        """
+        This method loads the .env file, the minimal startup only reads ./.env and skips importing
+        python-dotenv when there is none
+        """
+        if self.minimal and not os.path.exists('.env'):
+            return False
+        from dotenv import load_dotenv
+        return load_dotenv('.env' if self.minimal else None)
+
+    def create_command_handler(self):
+        """
+        This method builds the command handler with the optional cache, metrics and journal
+        """
+        metrics = None
+        if self.is_enabled('METRICS'):
+            from app.commands.metrics import CommandMetrics
+            metrics = CommandMetrics()
+        handler = CommandHandler(cache=self.create_result_cache(), metrics=metrics, journal=self.create_journal(), output=self.create_output())
+        handler.memory = self.create_memory_monitor(handler)
+        return handler
+
+    def create_memory_monitor(self, command_handler):
+        """
+        This method builds the memory monitor: MEMORY_TRACE=true starts tracemalloc with MEMORY_TRACE_FRAMES frames
+        before the plugins are imported, every MEMORY_CHECK_INTERVAL seconds the REPL warns about plugins that grew
+        more than MEMORY_GROWTH_KB and unloads plugins idle for PLUGIN_IDLE_UNLOAD seconds (0, the default, keeps them)
+        """
+        trace = self.is_enabled('MEMORY_TRACE')
+        try:
+            interval = float(self.settings.get('MEMORY_CHECK_INTERVAL', 300.0))
+            idle_unload = float(self.settings.get('PLUGIN_IDLE_UNLOAD', 0.0))
+        except ValueError:
+            logging.error('Invalid MEMORY_CHECK_INTERVAL or PLUGIN_IDLE_UNLOAD setting, memory monitor disabled')
+            return None
+        if not trace and idle_unload <= 0:
+            return None
+        from app.memory import MemoryMonitor
+        monitor = MemoryMonitor(command_handler, interval, self.get_int_setting('MEMORY_GROWTH_KB', 1024) * 1024, idle_unload, self.get_int_setting('MEMORY_TRACE_FRAMES', 8))
+        if trace:
+            monitor.start()
+        logging.info(f'Memory monitor: tracing={trace} interval={interval} idle_unload={idle_unload}')
+        return monitor
+
+    def create_output(self):
+        """
+        This method builds the output sink: OUTPUT_FORMAT text (default), csv, jsonl or binary. Output to a file
+        or pipe is buffered up to OUTPUT_FLUSH_SIZE characters or OUTPUT_FLUSH_INTERVAL seconds, a terminal is not
+        """
+        from app import output
+        fmt = self.settings.get('OUTPUT_FORMAT', 'text').strip().lower()
+        if fmt not in output.FORMATS:
+            logging.error(f'Invalid OUTPUT_FORMAT: {fmt}, using text')
+            fmt = 'text'
+        try:
+            flush_interval = float(self.settings.get('OUTPUT_FLUSH_INTERVAL', 1.0))
+        except ValueError:
+            logging.error(f'Invalid OUTPUT_FLUSH_INTERVAL: {self.settings.get("OUTPUT_FLUSH_INTERVAL")}')
+            flush_interval = 1.0
+        sink = output.create_sink(fmt, flush_size=self.get_int_setting('OUTPUT_FLUSH_SIZE', 65536), flush_interval=flush_interval)
+        if sink is not output.STDOUT:
+            weakref.finalize(self, sink.close) #when the app is collected, or at exit while it is alive
+        return sink
 
     def configure_logging(self):
         """
         This method configures the logging for the application
         """
         logging_conf_path = 'logging.conf'
+        profile = os.environ.get('LOG_PROFILE', 'dev').strip().lower()
         if os.path.exists(logging_conf_path):
-            logging.config.fileConfig(logging_conf_path, disable_existing_loggers=False)
+            import logging.config as logging_config
+            logging_config.fileConfig(logging_conf_path, disable_existing_loggers=False)
+        elif profile in ('queue', 'production'): #app.logqueue.PROFILES, not imported unless selected
+            #queue based pipeline, the hot path only enqueues records and a background thread writes them in batches
+            from app import logqueue
+            logqueue.configure('logs/app.log', profile, int(os.environ.get('LOG_BATCH_SIZE', 256)), float(os.environ.get('LOG_FLUSH_INTERVAL', 1.0)))
+        elif self.minimal:
+            #the log file is only opened by the first record that passes LOG_LEVEL (WARNING by default)
+            level = logging.getLevelName(os.environ.get('LOG_LEVEL', 'WARNING').strip().upper())
+            handler = logging.FileHandler('logs/app.log', delay=True)
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            logging.basicConfig(level=level if isinstance(level, int) else logging.WARNING, handlers=[handler])
         else:
             #write logs to app.log file
             logging.basicConfig(filename='logs/app.log', level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            logging.getLogger('app').setLevel(logging.DEBUG)
-            logging.getLogger('app').addHandler(logging.StreamHandler())    
+            app_logger = logging.getLogger('app')
+            app_logger.setLevel(logging.DEBUG)
+            if not any(type(handler) is logging.StreamHandler for handler in app_logger.handlers): #one per process, not one per App
+                app_logger.addHandler(logging.StreamHandler())
 
     def load_environment_variables(self):
         """
         This method loads the environment variables
         """
     
-        settings = {key: value for key, value in os.environ.items()} #load all environment variables and store in a dictionary os.environ.items() returns a list of tuples of all environment variables.
+        #reads fall through to the environment and writes stay in the App, a dict copy would duplicate every
+        #variable of the environment for the lifetime of the process
+        settings = collections.ChainMap({}, os.environ)
         logging.info('Environment Variables Loaded')
         return settings
     
@@ -54,67 +164,325 @@ class App:
         """
         return self.settings.get(env_var, None)
 
+    def is_enabled(self, env_var: str):
+        """
+        This method checks whether a boolean environment variable is switched on
+        """
+        return str(self.settings.get(env_var, '')).strip().lower() in ('1', 'true', 'yes', 'on')
+
 
 
+    def configure_numeric_backend(self):
+        """
+        This method selects the numeric backend from NUMERIC_BACKEND (float, decimal or fraction),
+        DECIMAL_PRECISION and DECIMAL_ROUNDING configure the decimal context
+        """
+        name = self.settings.get('NUMERIC_BACKEND', 'float')
+        options = {}
+        if name.strip().lower() == 'decimal':
+            options['precision'] = self.get_int_setting('DECIMAL_PRECISION', 28)
+            options['rounding'] = self.settings.get('DECIMAL_ROUNDING', 'ROUND_HALF_EVEN')
+        try:
+            return numeric.set_backend(name, **options)
+        except ValueError as e:
+            logging.error(f'{e}, using float')
+            return numeric.set_backend('float')
+
+    def create_result_cache(self):
+        """
+        This method builds the result cache from CACHE_SIZE and CACHE_TTL (seconds), caching is off by default
+        """
+        try:
+            max_size = int(self.settings.get('CACHE_SIZE', 0))
+            ttl = float(self.settings['CACHE_TTL']) if self.settings.get('CACHE_TTL') else None
+        except ValueError:
+            logging.error('Invalid CACHE_SIZE or CACHE_TTL setting, result cache disabled')
+            return None
+        if max_size <= 0:
+            return None
+        logging.info(f'Result cache enabled: size={max_size} ttl={ttl}')
+        return ResultCache(max_size, ttl)
+
+    def create_journal(self):
+        """
+        This method opens the session journal at JOURNAL_PATH when JOURNAL is enabled, records are fsynced
+        every JOURNAL_SYNC_EVERY records or JOURNAL_SYNC_INTERVAL seconds
+        """
+        if not self.is_enabled('JOURNAL'):
+            return None
+        from app.journal import Journal
+        try:
+            sync_interval = float(self.settings.get('JOURNAL_SYNC_INTERVAL', 1.0))
+        except ValueError:
+            logging.error(f'Invalid JOURNAL_SYNC_INTERVAL: {self.settings.get("JOURNAL_SYNC_INTERVAL")}')
+            sync_interval = 1.0
+        path = self.settings.get('JOURNAL_PATH', 'logs/session.journal')
+        try:
+            journal = Journal(path, self.get_int_setting('JOURNAL_SYNC_EVERY', 100), sync_interval)
+        except (OSError, ValueError) as e: #an unwritable path or a file that is not a journal, left untouched
+            logging.warning(f'Could not open the session journal {path}: {e}, continuing without it')
+            return None
+        atexit.register(journal.close) #the exit command leaves through SystemExit, sync the tail on the way out
+        logging.info(f'Session journal: {journal.path}')
+        return journal
+
+    def get_int_setting(self, env_var: str, default: int = None):
+        """
+        This method reads an integer environment variable, falling back to default when unset or invalid
+        """
+        value = self.settings.get(env_var)
+        try:
+            return int(value) if value not in (None, '') else default
+        except ValueError:
+            logging.error(f'Invalid integer for {env_var}: {value}')
+            return default
+
     #dynamically load all plugins
     def load_plugins(self):
         """
-        This method loads all plugins"""
+        This method loads all plugins, with PLUGIN_INDEX enabled commands are registered from the
+        plugin index and their modules are only imported when first dispatched"""
 
+        self.timed_phase('plugins', self.load_plugin_commands)
+        if self.reloader is None and self.is_enabled('PLUGIN_RELOAD'):
+            from app.reload import PluginReloader
+            self.reloader = PluginReloader(self, float(self.settings.get('PLUGIN_RELOAD_INTERVAL', 1.0)))
+
+    def load_plugin_commands(self):
+        """
+        This method registers the plugin commands from the index or by importing every plugin
+        """
         logging.info('Loading Plugins')
-        plugins_package = 'app.plugins'
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        plugin_path = os.path.join(base_dir, 'app', 'plugins')
+        start = time.perf_counter()
+        use_index = self.is_enabled('PLUGIN_INDEX')
+        index = PluginIndex(self.settings.get('PLUGIN_INDEX_PATH', '.plugin_index.json'), self.plugin_path) if use_index else None
+        if index is not None and index.load():
+            self.command_handler.register_commands(
+                (plugin_name, LazyCommand(self.command_handler, plugin_name, entry['module'], entry['class'], entry['needs_handler'], entry['aliases']))
+                for plugin_name, entry in index.plugins.items() if plugin_name not in self.sandboxed)
+        else:
+            entries = self.import_plugins()
+            if index is not None and not self.sandboxed: #sandboxed plugins are never imported here so they have no entries
+                index.save(entries)
+        if self.sandboxed:
+            self.load_sandboxed_plugins()
+        elapsed = (time.perf_counter() - start) * 1000
+        logging.info(f'Loaded {len(self.command_handler.commands)} plugins in {elapsed:.2f} ms (plugin index: {"on" if use_index else "off"})')
 
-        for _, plugin_name, is_pkg in pkgutil.iter_modules([plugin_path]):
-            if is_pkg:
+    def import_plugins(self):
+        """
+        This method eagerly imports every plugin package and registers its commands,
+        it returns the plugin index entries for the registered commands"""
+        import pkgutil
+        entries = {}
+        commands = []
+        for _, plugin_name, is_pkg in pkgutil.iter_modules([self.plugin_path]):
+            if is_pkg and plugin_name not in self.sandboxed:
                 try:
-                    plugin_module = importlib.import_module(f'{plugins_package}.{plugin_name}')
+                    start = time.perf_counter()
+                    plugin_module = importlib.import_module(f'{self.plugins_package}.{plugin_name}')
+                    if self.command_handler.metrics is not None:
+                        self.command_handler.metrics.record_import(plugin_name, time.perf_counter() - start)
                     logging.debug(f'Loaded Plugin: {plugin_name}')
                 except Exception as e:
                     logging.error(f'Failed to load plugin: {plugin_name}')
                     continue
+                command, entry = self.build_plugin_command(plugin_name, plugin_module)
+                if command is not None:
+                    commands.append((plugin_name, command))
+                    entries[plugin_name] = entry
+                    logging.info(f'Registered command: {entry["class"]} in plugin: {plugin_name}{" with command handler" if entry["needs_handler"] else ""}')
+        self.command_handler.register_commands(commands)
+        logging.info('Completed loading plugins')
+        return entries
+
+    def load_sandboxed_plugins(self):
+        """
+        This method starts the worker pool for the plugins named in SANDBOX_PLUGINS and registers a proxy
+        command for each, SANDBOX_WORKERS, SANDBOX_TIMEOUT (seconds), SANDBOX_MEMORY_MB and
+        SANDBOX_MAX_CALLS configure the pool
+        """
+        import pkgutil
+        from app.sandbox import SandboxPool, SandboxedCommand, SandboxError
+        available = {name for _, name, is_pkg in pkgutil.iter_modules([self.plugin_path]) if is_pkg}
+        plugins = {name: f'{self.plugins_package}.{name}' for name in sorted(self.sandboxed & available)}
+        for plugin_name in sorted(self.sandboxed - available):
+            logging.error(f'Sandboxed plugin not found: {plugin_name}')
+        if not plugins:
+            return
+        if self.sandbox is not None:
+            self.sandbox.close()
+        memory_mb = self.get_int_setting('SANDBOX_MEMORY_MB')
+        try:
+            timeout = float(self.settings.get('SANDBOX_TIMEOUT', 5.0))
+        except ValueError:
+            logging.error(f'Invalid SANDBOX_TIMEOUT: {self.settings.get("SANDBOX_TIMEOUT")}')
+            timeout = 5.0
+        self.sandbox = SandboxPool(plugins, self.get_int_setting('SANDBOX_WORKERS', 2), timeout, memory_mb * 1024 * 1024 if memory_mb else None, self.get_int_setting('SANDBOX_MAX_CALLS', 1000))
+        for plugin_name in plugins:
+            try:
+                self.command_handler.register_command(plugin_name, SandboxedCommand(self.sandbox, plugin_name))
+                logging.info(f'Registered sandboxed command in plugin: {plugin_name}')
+            except SandboxError as e:
+                logging.error(e)
+
+    def build_plugin_command(self, plugin_name:str, plugin_module):
+        """
+        This method instantiates the command class found in a plugin module without registering it,
+        it returns the command and its plugin index entry, (None, None) when there is none
+        """
+        command = entry = None
+        for item_name in dir(plugin_module):
+            item = getattr(plugin_module, item_name)
+            try:
+                if issubclass(item, (Command)) and item is not Command:
+                    logging.debug(f'Found command: {item.__name__} in plugin: {plugin_name}')
+                    needs_handler = False
+                    if item.__init__ is not object.__init__: #inspecting the builtin's text signature is slow and finds no handler
+                        import inspect
+                        needs_handler = 'command_handler' in inspect.signature(item.__init__).parameters
+                    command = item(self.command_handler) if needs_handler else item()
+                    entry = {'module': plugin_module.__name__, 'class': item.__name__, 'needs_handler': needs_handler, 'aliases': list(item.aliases)}
+            except TypeError:
+                continue
+            except Exception as e:
+                logging.error(f'Failed to register command: {item_name} in plugin: {plugin_name}')
+                logging.error(e)
+        return command, entry
+
+    def run_batch(self, input_stream, output_stream, fmt:str = 'text', parallel:bool = False, threads:int = 0):
+        """
+        This method runs the application non-interactively over a stream of commands and operands,
+        in parallel mode records are fanned out over PARALLEL_WORKERS processes in chunks of PARALLEL_CHUNK_SIZE,
+        with threads they are dispatched on that many threads in chunks of PARALLEL_CHUNK_SIZE
+        """
+        from app import batch
+        logging.info(f'Starting Batch Mode ({fmt})')
+        self.load_plugins()
+        if parallel:
+            from app.parallel import ParallelExecutor
+            executor = ParallelExecutor(self.command_handler, self.get_int_setting('PARALLEL_WORKERS'), self.get_int_setting('PARALLEL_CHUNK_SIZE', 1000))
+            records = executor.run_batch(input_stream, fmt)
+        elif threads:
+            from app.parallel import ThreadedExecutor
+            records = ThreadedExecutor(self.command_handler, threads, self.get_int_setting('PARALLEL_CHUNK_SIZE', 1000)).run_batch(input_stream, fmt)
+        else:
+            records = batch.run_batch(self.command_handler, input_stream, fmt)
+        return batch.write_results(records, output_stream, fmt)
+
+    def run_distributed(self, input_stream, output_stream, fmt:str = 'text', host:str = '127.0.0.1', port:int = 8766):
+        """
+        This method coordinates a batch over worker processes started with main.py --worker HOST:PORT,
+        it waits up to CLUSTER_WAIT seconds for CLUSTER_MIN_WORKERS workers, chunks hold CLUSTER_CHUNK_SIZE
+        records and a chunk not acknowledged within CLUSTER_TASK_TIMEOUT seconds goes to another worker, up to
+        CLUSTER_MAX_ATTEMPTS times. The run fails when no worker is connected for CLUSTER_WAIT seconds
+        """
+        from app import batch
+        from app.cluster import Coordinator
+        try:
+            task_timeout = float(self.settings.get('CLUSTER_TASK_TIMEOUT', 60.0))
+            wait = float(self.settings.get('CLUSTER_WAIT', 30.0))
+        except ValueError:
+            logging.error('Invalid CLUSTER_TASK_TIMEOUT or CLUSTER_WAIT setting, using the defaults')
+            task_timeout, wait = 60.0, 30.0
+        coordinator = Coordinator(host, port, self.get_int_setting('CLUSTER_CHUNK_SIZE', 1000), task_timeout,
+                                  max_attempts=self.get_int_setting('CLUSTER_MAX_ATTEMPTS', 3), worker_wait=wait)
+        try:
+            min_workers = self.get_int_setting('CLUSTER_MIN_WORKERS', 1)
+            if not coordinator.wait_for_workers(min_workers, wait):
+                raise RuntimeError(f'Fewer than {min_workers} workers connected within {wait} seconds')
+            start = time.perf_counter()
+            processed, errors = batch.write_results(coordinator.run_batch(input_stream, fmt), output_stream, fmt)
+            elapsed = time.perf_counter() - start
+            stats = coordinator.stats()
+            logging.info(f'Distributed batch: {processed} records on {stats["workers"]} workers in {elapsed:.2f} s, {stats["redispatched"]} chunks redispatched')
+            return processed, errors
+        finally:
+            coordinator.close()
+
+    def run_worker(self, host:str = '127.0.0.1', port:int = 8766):
+        """
+        This method loads the plugins and executes batch chunks for a coordinator until it stops
+        """
+        from app.cluster import Worker
+        logging.info(f'Starting Cluster Worker for {host}:{port}')
+        self.load_plugins()
+        try:
+            retry_for = float(self.settings.get('CLUSTER_CONNECT_TIMEOUT', 10.0))
+        except ValueError:
+            retry_for = 10.0
+        return Worker(self.command_handler).serve(host, port, retry_for)
+
+    def replay(self, journal_path:str, output_stream, fmt:str = 'text'):
+        """
+        This method re-runs the calculations recorded in a session journal and writes them like batch results
+        """
+        from app import batch
+        from app.journal import replay
+        logging.info(f'Replaying journal: {journal_path}')
+        self.load_plugins()
+        return batch.write_results(replay(self.command_handler, journal_path), output_stream, fmt)
+
+    def serve(self, host:str = '127.0.0.1', port:int = 8765, unix_path:str = None):
+        """
+        This method serves commands to many concurrent clients from one asyncio event loop
+        """
+        import asyncio
+        from app.server import CommandServer
+        logging.info('Starting Command Server')
+        self.load_plugins()
+        server = CommandServer(self.command_handler, self.get_int_setting('SERVER_WORKERS'))
+        if self.reloader is not None:
+            self.reloader.start()
+        print(f"Serving on {unix_path or f'{host}:{port}'}, press Ctrl+C to stop")
+        try:
+            asyncio.run(server.serve_forever(host, port, unix_path))
+        except KeyboardInterrupt:
+            logging.info('Command Server stopped')
+
+    def load_variables(self):
+        """
+        This method restores the variables saved at VARIABLES_PATH (default .variables.json, empty keeps them
+        in memory only) and saves them again on exit when they changed
+        """
+        path = self.settings.get('VARIABLES_PATH', '.variables.json').strip()
+        if not path:
+            return None
+        from app.variables import VariableGraph
+        variables = VariableGraph(self.command_handler, path)
+        variables.load()
+        self.command_handler.variables = variables
+        atexit.register(variables.close) #the exit command leaves through SystemExit
+        return variables
 
-                for item_name in dir(plugin_module):
-                    item = getattr(plugin_module, item_name)
-                    try:
-                        if issubclass(item, (Command)) and item is not Command:
-                            logging.debug(f'Found command: {item.__name__} in plugin: {plugin_name}')
-                            sig = inspect.signature(item.__init__)
-                            if 'command_handler' in sig.parameters:
-                                self.command_handler.register_command(plugin_name, item(self.command_handler))
-                                logging.info(f'Registered command: {item.__name__} in plugin: {plugin_name} with command handler')
-                            else:       
-                                self.command_handler.register_command(plugin_name, item())
-                                logging.info(f'Registered command: {item.__name__} in plugin: {plugin_name}')
-                    except TypeError:
-                        continue
-                    except Exception as e:
-                        logging.error(f'Failed to register command: {item_name} in plugin: {plugin_name}')
-                        logging.error(e)
-                logging.info('Completed loading plugins')
-
-      
     def start(self):
         """
         This method starts the application
         """
         logging.info('Starting Application')
         self.load_plugins()
-        print("Type 'Exit to quit the program")
-        while True: #REPL Read-Eval-Print Loop
-            try:
-                command = ""
-
-                command = input(">>>").strip()
-                if command.lower() == 'exit':
-                    logging.info("Exit command entered. Exiting the program")
-                    print("Exiting the program....")
-                    raise SystemExit("Exiting the program")
-                
-                logging.debug(f"Executing command: {command}")
-                self.command_handler.execute_command(command)
-            
-            except Exception as e:
-                logging.error(f"An error occurred while executing command '{command if command else '<unknown>'}': {e}", exc_info=True)
+        self.load_variables()
+        output = self.command_handler.output
+        output.write("Type 'Exit to quit the program")
+        try:
+            while True: #REPL Read-Eval-Print Loop
+                try:
+                    command = ""
+
+                    command = output.read(">>>").strip()
+                    if self.reloader is not None:
+                        self.reloader.poll()
+                    if self.command_handler.memory is not None: #mem start may create it
+                        self.command_handler.memory.poll()
+                    logging.debug(f"Executing command: {command}")
+                    self.command_handler.execute_command(command)
+                except (EOFError, KeyboardInterrupt): #end of a piped script or Ctrl-D / Ctrl-C at the prompt
+                    logging.info('Input ended, leaving the REPL')
+                    output.write("")
+                    break
+                except Exception as e:
+                    logging.error(f"An error occurred while executing command '{command if command else '<unknown>'}': {e}", exc_info=True)
+                    output.write(f"Error: {e}")
+        finally:
+            output.close() #buffered output must be out before the exit command's SystemExit ends the process
 
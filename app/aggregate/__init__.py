@@ -0,0 +1,363 @@
+#n-ary and streaming reductions: single pass accumulators with constant (or logarithmic) state that can be
+#fed value by value or chunk by chunk and merged, so partial results from separate chunks or processes combine
+import logging
+import math
+from abc import abstractmethod
+import random
+from app.commands import Command
+from app.commands.operands import MAX_REPORTED_ERRORS, parse_bulk
+from app import numeric
+
+CHUNK_BYTES = 1 << 20 #bulk files are parsed this much text at a time
+
+def as_list(values):
+    """
+    Plain float list for the builtin reductions, numpy arrays and array('d') convert in one call
+    """
+    tolist = getattr(values, 'tolist', None)
+    return tolist() if tolist is not None else [float(value) for value in values]
+
+class Sum:
+    """
+    Exact running sum kept as non-overlapping partials (Shewchuk), rounded once by math.fsum
+    """
+    __slots__ = ('partials', 'count')
+
+    def __init__(self):
+        self.partials = []
+        self.count = 0
+
+    def add(self, x:float):
+        kept = 0
+        for y in self.partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            high = x + y
+            low = y - (high - x)
+            if low:
+                self.partials[kept] = low
+                kept += 1
+            x = high
+        self.partials[kept:] = [x]
+
+    def update(self, value):
+        self.add(float(value))
+        self.count += 1
+
+    def update_many(self, values):
+        values = as_list(values)
+        if values:
+            #fsum rounds the chunk once, the rounding error is added back so the partials stay exact
+            total = math.fsum(values)
+            self.add(total)
+            if math.isfinite(total):
+                self.add(math.fsum([*values, -total]))
+            self.count += len(values)
+
+    def merge(self, other):
+        for x in other.partials:
+            self.add(x)
+        self.count += other.count
+        return self
+
+    def result(self):
+        return math.fsum(self.partials)
+
+class Product:
+    __slots__ = ('value', 'count')
+
+    def __init__(self):
+        self.value = 1.0
+        self.count = 0
+
+    def update(self, value):
+        self.value *= float(value)
+        self.count += 1
+
+    def update_many(self, values):
+        values = as_list(values)
+        self.value *= math.prod(values)
+        self.count += len(values)
+
+    def merge(self, other):
+        self.value *= other.value
+        self.count += other.count
+        return self
+
+    def result(self):
+        return self.value
+
+class Extreme:
+    """
+    Running minimum (pick=min) or maximum (pick=max)
+    """
+    __slots__ = ('pick', 'value', 'count')
+
+    def __init__(self, pick=min):
+        self.pick = pick
+        self.value = None
+        self.count = 0
+
+    def update(self, value):
+        value = float(value)
+        self.value = value if self.value is None else self.pick(self.value, value)
+        self.count += 1
+
+    def update_many(self, values):
+        values = as_list(values)
+        if values:
+            best = self.pick(values)
+            self.value = best if self.value is None else self.pick(self.value, best)
+            self.count += len(values)
+
+    def merge(self, other):
+        if other.value is not None:
+            self.value = other.value if self.value is None else self.pick(self.value, other.value)
+        self.count += other.count
+        return self
+
+    def result(self):
+        if self.value is None:
+            raise ValueError(f"{self.pick.__name__} needs at least one value")
+        return self.value
+
+class Mean:
+    """
+    Mean from an exact Sum, so it is correctly rounded regardless of the order of the values
+    """
+    __slots__ = ('total',)
+
+    def __init__(self):
+        self.total = Sum()
+
+    @property
+    def count(self):
+        return self.total.count
+
+    def update(self, value):
+        self.total.update(value)
+
+    def update_many(self, values):
+        self.total.update_many(values)
+
+    def merge(self, other):
+        self.total.merge(other.total)
+        return self
+
+    def result(self):
+        if not self.count:
+            raise ValueError("mean needs at least one value")
+        return self.total.result() / self.count
+
+class Variance:
+    """
+    Sample variance by Welford's update, chunks and partial results are combined with the
+    parallel formula of Chan et al. so no sum of squares is ever accumulated
+    """
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def update_many(self, values):
+        values = as_list(values)
+        if values:
+            chunk = Variance()
+            chunk.count = len(values)
+            chunk.mean = math.fsum(values) / chunk.count
+            chunk.m2 = math.fsum([(value - chunk.mean) ** 2 for value in values])
+            self.merge(chunk)
+
+    def merge(self, other):
+        if other.count:
+            count = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / count
+            self.m2 += other.m2 + delta * delta * self.count * other.count / count
+            self.count = count
+        return self
+
+    def result(self):
+        if self.count < 2:
+            raise ValueError("variance needs at least two values")
+        return self.m2 / (self.count - 1)
+
+class QuantileSketch:
+    """
+    Approximate quantiles in bounded memory: a stack of compactors (as in the KLL sketch) where level i
+    holds items of weight 2**i. A full level is sorted and every other item, from a random offset, moves
+    up a level, so at most capacity items are kept per level, O(capacity * log(n / capacity)) in total.
+    The rank error is about 1/capacity of n, up to capacity values the result is exact.
+    """
+    __slots__ = ('q', 'capacity', 'levels', 'count', 'random')
+
+    def __init__(self, q:float = 0.5, capacity:int = 256, seed=None):
+        if not 0 <= q <= 1:
+            raise ValueError("quantile must be between 0 and 1")
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.q = q
+        self.capacity = capacity
+        self.levels = [[]]
+        self.count = 0
+        self.random = random.Random(seed)
+
+    def update(self, value):
+        self.levels[0].append(float(value))
+        self.count += 1
+        if len(self.levels[0]) >= self.capacity:
+            self.compact()
+
+    def update_many(self, values):
+        values = as_list(values)
+        for start in range(0, len(values), self.capacity):
+            self.levels[0].extend(values[start:start + self.capacity])
+            self.compact()
+        self.count += len(values)
+
+    def compact(self):
+        for level, items in enumerate(self.levels): #levels appended below are visited by this loop
+            if len(items) < self.capacity:
+                continue
+            items.sort()
+            kept = [items.pop()] if len(items) % 2 else [] #an odd item out waits at its level
+            promoted = items[self.random.randint(0, 1)::2]
+            self.levels[level] = kept
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            self.levels[level + 1].extend(promoted)
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append([])
+            self.levels[level].extend(items)
+        self.count += other.count
+        self.compact()
+        return self
+
+    def size(self):
+        return sum(len(items) for items in self.levels)
+
+    def result(self):
+        if not self.count:
+            raise ValueError("quantile needs at least one value")
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        rank = self.q * (sum(weight for _, weight in weighted) - 1)
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen > rank:
+                return value
+        return weighted[-1][0]
+
+def merge_all(accumulators):
+    """
+    Fold partial accumulators of the same kind into the first one
+    """
+    accumulators = iter(accumulators)
+    total = next(accumulators)
+    for accumulator in accumulators:
+        total.merge(accumulator)
+    return total
+
+def iter_chunks(stream, chunk_bytes:int = CHUNK_BYTES):
+    """
+    Read whitespace separated text in blocks that never split a number
+    """
+    rest = ''
+    while True:
+        block = stream.read(chunk_bytes)
+        if not block:
+            break
+        block = rest + block
+        cut = max(block.rfind(' '), block.rfind('\n'), block.rfind('\t'))
+        if cut < 0:
+            rest = block
+            continue
+        rest = block[cut + 1:]
+        yield block[:cut + 1]
+    if rest.strip():
+        yield rest
+
+def aggregate_file(path:str, accumulator, chunk_bytes:int = CHUNK_BYTES):
+    """
+    Stream a file of numbers into the accumulator one chunk at a time, returns the invalid items as (token, message)
+    """
+    errors = []
+    with open(path, encoding='utf-8') as f:
+        for text in iter_chunks(f, chunk_bytes):
+            columns, chunk_errors = parse_bulk(text, 1)
+            accumulator.update_many(columns[0])
+            errors.extend((token, message) for _, token, message in chunk_errors)
+    return errors
+
+class AggregateCommand(Command):
+    """
+    Base of the n-ary plugins: 'sum 1 2 3' reduces the inline values, 'sum @path' streams a file,
+    with no arguments the values are read from one prompt. Values are reduced as float64, like the
+    vectorized path. Commands with parameters (quantile) take them before the values.
+    """
+    __slots__ = ()
+    pure = True
+    thread_safe = True #every call reduces into its own accumulator
+    takes_arguments = True
+    parameters = 0
+
+    @abstractmethod
+    def new_accumulator(self, *parameters):
+        pass
+
+    def split(self, operands):
+        if len(operands) < self.parameters:
+            raise ValueError(f"{self.command_name} expects {self.parameters} parameter(s) before the values")
+        return operands[:self.parameters], operands[self.parameters:]
+
+    def execute(self, *operands):
+        """
+        This method reduces the values typed after the command name, a bulk file given as @path or a prompted list
+        """
+        logging.info("Executing %s Command", self.command_name.capitalize())
+        parameters, values = self.split(operands)
+        accumulator = self.new_accumulator(*(float(numeric.parse(parameter)) for parameter in parameters))
+        if len(values) == 1 and isinstance(values[0], str) and values[0].startswith('@'):
+            errors = aggregate_file(values[0][1:], accumulator)
+            for token, message in errors[:MAX_REPORTED_ERRORS]:
+                self.output.write(f"Skipped {token}: {message}")
+            if len(errors) > MAX_REPORTED_ERRORS:
+                self.output.write(f"... {len(errors) - MAX_REPORTED_ERRORS} more invalid values")
+        elif values:
+            accumulator.update_many([numeric.parse(value) for value in values])
+        else:
+            line = self.output.read("Enter numbers separated by spaces: ")
+            accumulator.update_many([numeric.parse(value) for value in line.split()])
+        result = accumulator.result()
+        self.output.write(f"Result: {self.command_name} of {accumulator.count} values = {result}")
+        logging.info("%s of %d values = %s", self.command_name.capitalize(), accumulator.count, result)
+        return result
+
+    def calculate(self, *operands):
+        """
+        This method reduces the operands without prompting, parameters first
+        """
+        parameters, values = self.split(operands)
+        accumulator = self.new_accumulator(*(float(parameter) for parameter in parameters))
+        accumulator.update_many(values)
+        return accumulator.result()
+
+    def calculate_array(self, *columns):
+        """
+        This method reduces one array of values in a single call, parameters first
+        """
+        accumulator = self.new_accumulator(*(float(parameter) for parameter in columns[:-1]))
+        accumulator.update_many(columns[-1])
+        return accumulator.result()
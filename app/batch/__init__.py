@@ -0,0 +1,96 @@
+#non-interactive batch mode, streams records through the CommandHandler without prompting
+import csv
+import io
+import json
+import logging
+from app.commands.dispatch import AmbiguousCommandError
+from app.sandbox import SandboxError
+
+FORMATS = ('text', 'csv', 'jsonl')
+
+def parse_record(line:str, fmt:str = 'text'):
+    """
+    Parse one input line into a (command_name, operands) tuple.
+    text lines look like 'add 3 4', csv rows like 'add,3,4' and jsonl records like
+    {"command": "add", "operands": [3, 4]}. Raises ValueError on malformed input.
+    """
+    if fmt == 'jsonl':
+        record = json.loads(line) #json.JSONDecodeError is a subclass of ValueError
+        if not isinstance(record, dict) or 'command' not in record:
+            raise ValueError("record has no 'command' field")
+        return str(record['command']), list(record.get('operands', []))
+    if fmt == 'csv':
+        row = next(csv.reader([line]))
+        return row[0].strip(), [value.strip() for value in row[1:] if value.strip()]
+    if fmt == 'text':
+        parts = line.split()
+        return parts[0], parts[1:]
+    raise ValueError(f"Unknown batch format: {fmt}")
+
+def execute_record(command_handler, line:str, fmt:str = 'text'):
+    """
+    Execute a single input line and return a result dict. Errors are captured per record
+    so one bad line never stops the rest of the batch.
+    """
+    try:
+        command_name, operands = parse_record(line, fmt)
+    except (ValueError, StopIteration) as e:
+        return {'command': None, 'operands': [], 'result': None, 'error': f"Malformed record: {e}"}
+    record = {'command': command_name, 'operands': operands, 'result': None, 'error': None}
+    try:
+        record['result'] = command_handler.calculate(command_name, *operands)
+    except AmbiguousCommandError as e:
+        record['error'] = str(e)
+    except KeyError:
+        record['error'] = f"Command '{command_name}' not found"
+    except (ArithmeticError, ValueError, TypeError, SandboxError) as e:
+        record['error'] = str(e)
+    return record
+
+def iter_lines(stream, fmt:str = 'text'):
+    """
+    Generator over the record lines of stream, blank lines, '#' comments and a csv header are skipped
+    """
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if fmt == 'csv' and line.lower().startswith('command,'):
+            continue
+        yield line
+
+def run_batch(command_handler, stream, fmt:str = 'text'):
+    """
+    Generator that lazily executes every record in stream, memory stays flat
+    regardless of how large the input is
+    """
+    for line in iter_lines(stream, fmt):
+        yield execute_record(command_handler, line, fmt)
+
+def format_record(record:dict, fmt:str = 'text'):
+    """
+    Format a result dict as one output line matching the input format
+    """
+    if fmt == 'jsonl':
+        return json.dumps(record, default=str) #Decimal and Fraction results are written as strings
+    if fmt == 'csv':
+        row = [record['command'] or '', *record['operands'], '' if record['result'] is None else record['result'], record['error'] or '']
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='').writerow(row)
+        return buffer.getvalue()
+    if record['error'] is not None:
+        return f"Error: {record['error']}"
+    return str(record['result'])
+
+def write_results(records, stream, fmt:str = 'text'):
+    """
+    Write each result as soon as it is produced and return (processed, errors) counts
+    """
+    processed = errors = 0
+    for record in records:
+        stream.write(format_record(record, fmt) + '\n')
+        processed += 1
+        if record['error'] is not None:
+            errors += 1
+    logging.info(f"Batch completed: {processed} records processed, {errors} errors")
+    return processed, errors
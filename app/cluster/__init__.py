@@ -0,0 +1,241 @@
+#coordinator/worker mode: batch records are sharded over worker processes that connect over TCP,
+#every chunk is acknowledged by its result and chunks held by a worker that dies are dispatched again
+import collections
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from app import batch
+from app.parallel import chunked
+
+FRAME = struct.Struct('!I') #length of the JSON message that follows
+
+def send_frame(sock, message:dict):
+    data = json.dumps(message, default=str).encode('utf-8') #Decimal and Fraction results travel as strings
+    sock.sendall(FRAME.pack(len(data)) + data)
+
+def recv_exact(sock, size:int):
+    data = bytearray()
+    while len(data) < size:
+        block = sock.recv(size - len(data))
+        if not block:
+            raise EOFError('connection closed')
+        data.extend(block)
+    return bytes(data)
+
+def recv_frame(sock):
+    length = FRAME.unpack(recv_exact(sock, FRAME.size))[0]
+    return json.loads(recv_exact(sock, length).decode('utf-8'))
+
+class Coordinator:
+    """
+    Accepts worker connections and feeds them chunks of records. Results are merged back in input
+    order, only max_pending chunks are outstanding at a time so memory stays flat, and a chunk whose
+    worker disconnects or does not answer within task_timeout seconds is queued again for another worker.
+    A chunk lost max_attempts times fails the run instead of taking down every worker in turn, and so
+    does waiting more than worker_wait seconds for a chunk while no worker is connected.
+    """
+    def __init__(self, host:str = '127.0.0.1', port:int = 0, chunk_size:int = 1000, task_timeout:float = 60.0, max_pending:int = 64,
+                 max_attempts:int = 3, worker_wait:float = 30.0):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.chunk_size = chunk_size
+        self.task_timeout = task_timeout
+        self.max_pending = max(1, max_pending)
+        self.max_attempts = max(1, max_attempts)
+        self.worker_wait = worker_wait
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()[:2]
+        self.condition = threading.Condition()
+        self.queue = collections.deque() #(task id, fmt, lines) waiting for a worker
+        self.results = {} #task id -> records, until merged
+        self.attempts = {} #task id -> workers lost while holding it
+        self.failed = {} #task id -> reason, for chunks given up after max_attempts
+        self.workers = {} #worker id -> {'address', 'pid', 'tasks', 'records'}
+        self.next_worker = 0
+        self.next_task = 0
+        self.redispatched = 0
+        self.closed = False
+        self.accept_thread = threading.Thread(target=self.accept, name='cluster-accept', daemon=True)
+        self.accept_thread.start()
+        logging.info(f'Cluster coordinator listening on {self.address[0]}:{self.address[1]}')
+
+    def accept(self):
+        while not self.closed:
+            try:
+                conn, address = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self.serve_worker, args=(conn, address), name='cluster-worker', daemon=True).start()
+
+    def serve_worker(self, conn, address):
+        """
+        Hand tasks to one worker until the coordinator closes or the worker fails
+        """
+        try:
+            hello = recv_frame(conn)
+        except (OSError, EOFError, ValueError):
+            conn.close()
+            return
+        with self.condition:
+            worker_id = self.next_worker
+            self.next_worker += 1
+            self.workers[worker_id] = {'address': address, 'pid': hello.get('pid'), 'tasks': 0, 'records': 0}
+            self.condition.notify_all()
+        logging.info(f'Worker {worker_id} joined from {address} (pid {hello.get("pid")})')
+        task = error = None
+        try:
+            while True:
+                with self.condition:
+                    while not self.queue and not self.closed:
+                        self.condition.wait()
+                    if self.closed:
+                        break
+                    task = self.queue.popleft()
+                task_id, fmt, lines = task
+                send_frame(conn, {'type': 'task', 'id': task_id, 'fmt': fmt, 'lines': lines})
+                conn.settimeout(self.task_timeout)
+                reply = recv_frame(conn)
+                conn.settimeout(None)
+                if reply.get('id') != task_id:
+                    raise ValueError(f'acknowledged task {reply.get("id")} instead of {task_id}')
+                with self.condition:
+                    self.results[task_id] = reply['records']
+                    self.attempts.pop(task_id, None)
+                    self.workers[worker_id]['tasks'] += 1
+                    self.workers[worker_id]['records'] += len(lines)
+                    self.condition.notify_all()
+                task = None
+            send_frame(conn, {'type': 'stop'})
+        except (OSError, EOFError, ValueError, KeyError) as e:
+            logging.warning(f'Worker {worker_id} lost: {e}')
+            error = e
+        finally:
+            with self.condition:
+                del self.workers[worker_id]
+                if task is not None: #never acknowledged, give it to the next free worker first unless it failed too often
+                    attempts = self.attempts[task[0]] = self.attempts.get(task[0], 0) + 1
+                    if attempts >= self.max_attempts:
+                        self.failed[task[0]] = f'lost by {attempts} workers, the last with {error!r}'
+                        logging.error(f'Chunk {task[0]} {self.failed[task[0]]}, giving up')
+                    else:
+                        self.queue.appendleft(task)
+                        self.redispatched += 1
+                self.condition.notify_all()
+            conn.close()
+
+    def wait_for_workers(self, count:int = 1, timeout:float = None):
+        """
+        Block until at least count workers are connected, returns False on timeout
+        """
+        with self.condition:
+            return self.condition.wait_for(lambda: len(self.workers) >= count, timeout)
+
+    def run(self, lines, fmt:str = 'text'):
+        """
+        Generator over the result records for lines, in the same order
+        """
+        pending = collections.deque()
+        for chunk in chunked(lines, self.chunk_size):
+            with self.condition:
+                task_id = self.next_task
+                self.next_task += 1
+                self.queue.append((task_id, fmt, chunk))
+                self.condition.notify()
+            pending.append(task_id)
+            if len(pending) >= self.max_pending:
+                yield from self.collect(pending.popleft())
+        while pending:
+            yield from self.collect(pending.popleft())
+
+    def collect(self, task_id:int):
+        """
+        Wait for the records of one task and hand them over in order. Raises RuntimeError when the
+        chunk failed, the coordinator closed, or no worker was connected for worker_wait seconds.
+        """
+        with self.condition:
+            deadline = None
+            while task_id not in self.results:
+                if task_id in self.failed:
+                    raise RuntimeError(f'Chunk {task_id} failed: {self.failed[task_id]}')
+                if self.closed:
+                    raise RuntimeError('Coordinator closed before every chunk was acknowledged')
+                if self.workers: #a connected worker answers or is dropped within task_timeout
+                    deadline = None
+                    self.condition.wait()
+                    continue
+                if deadline is None:
+                    deadline = time.monotonic() + self.worker_wait
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f'No worker connected for {self.worker_wait} seconds, chunk {task_id} was not acknowledged')
+                self.condition.wait(remaining)
+            return self.results.pop(task_id)
+
+    def run_batch(self, stream, fmt:str = 'text'):
+        """
+        Distributed counterpart of app.batch.run_batch
+        """
+        return self.run(batch.iter_lines(stream, fmt), fmt)
+
+    def stats(self):
+        with self.condition:
+            return {'workers': len(self.workers), 'queued': len(self.queue), 'redispatched': self.redispatched, 'failed': len(self.failed),
+                    'per_worker': {worker_id: dict(info, address=str(info['address'])) for worker_id, info in self.workers.items()}}
+
+    def close(self):
+        """
+        Tell the connected workers to stop and stop accepting new ones
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        try:
+            self.server.shutdown(socket.SHUT_RDWR) #wakes the accept thread, close alone leaves it listening
+        except OSError:
+            pass
+        self.server.close()
+        self.accept_thread.join()
+
+class Worker:
+    """
+    Connects to a coordinator and executes the chunks it is sent with the local command handler
+    """
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+        self.tasks = 0
+
+    def connect(self, host:str, port:int, retry_for:float = 10.0):
+        """
+        Connect to the coordinator, retrying while it is still starting up
+        """
+        deadline = time.monotonic() + retry_for
+        while True:
+            try:
+                return socket.create_connection((host, port))
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.1)
+
+    def serve(self, host:str, port:int, retry_for:float = 10.0):
+        """
+        Execute tasks until the coordinator says stop or goes away, returns the number of tasks done
+        """
+        with self.connect(host, port, retry_for) as sock:
+            send_frame(sock, {'type': 'hello', 'pid': os.getpid(), 'commands': sorted(self.command_handler.commands)})
+            while True:
+                try:
+                    message = recv_frame(sock)
+                except (OSError, EOFError):
+                    break
+                if message.get('type') != 'task':
+                    break
+                records = [batch.execute_record(self.command_handler, line, message['fmt']) for line in message['lines']]
+                send_frame(sock, {'type': 'result', 'id': message['id'], 'records': records})
+                self.tasks += 1
+        logging.info(f'Worker finished after {self.tasks} tasks')
+        return self.tasks
@@ -0,0 +1,49 @@
+#compact type tagged binary encoding of command names, operands and results shared by the sandbox protocol and the session journal
+import struct
+import sys
+
+LENGTH = struct.Struct('!I')
+COUNT = struct.Struct('!H')
+DOUBLE = struct.Struct('!d')
+INT = struct.Struct('!q')
+
+def encode_value(value):
+    """
+    Tagged encoding: n None, i int, f float, D Decimal, F Fraction, s text (anything else as str)
+    """
+    if value is None:
+        return b'n'
+    if isinstance(value, bool):
+        value = str(value)
+    elif isinstance(value, int) and -2**63 <= value < 2**63:
+        return b'i' + INT.pack(value)
+    elif isinstance(value, float):
+        return b'f' + DOUBLE.pack(value)
+    decimal, fractions = sys.modules.get('decimal'), sys.modules.get('fractions') #a Decimal or Fraction value means its module is loaded
+    tag = b'D' if decimal is not None and isinstance(value, decimal.Decimal) else b'F' if fractions is not None and isinstance(value, fractions.Fraction) else b's'
+    data = str(value).encode('utf-8')
+    return tag + LENGTH.pack(len(data)) + data
+
+def decode_value(data, offset:int):
+    """
+    Decode one tagged value starting at offset, returns (value, next offset)
+    """
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == b'n':
+        return None, offset
+    if tag == b'i':
+        return INT.unpack_from(data, offset)[0], offset + INT.size
+    if tag == b'f':
+        return DOUBLE.unpack_from(data, offset)[0], offset + DOUBLE.size
+    length = LENGTH.unpack_from(data, offset)[0]
+    offset += LENGTH.size
+    text = bytes(data[offset:offset + length]).decode('utf-8')
+    offset += length
+    if tag == b'D':
+        from decimal import Decimal
+        return Decimal(text), offset
+    if tag == b'F':
+        from fractions import Fraction
+        return Fraction(text), offset
+    return text, offset
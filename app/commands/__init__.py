@@ -1,15 +1,101 @@
+import functools
+import threading
+import time
 from abc import ABC, abstractmethod
+from app import numeric
+from app.commands.dispatch import DispatchTable, AmbiguousCommandError
+from app.output import STDOUT
 class Command(ABC):
+    __slots__ = ('output',) #sink the command writes to, subclasses declaring __slots__ carry no __dict__
+    pure = False #pure commands always return the same result for the same operands and may be memoized
+    takes_arguments = False #commands whose execute() accepts arguments typed after the name, e.g. 'add 2 3'
+    aliases = () #extra names the command can be dispatched by
+    thread_safe = False #commands that keep no shared mutable state and may run on several threads at once
+
+    def __new__(cls, *args, **kwargs):
+        command = super().__new__(cls)
+        command.output = STDOUT #set here as subclasses do not call Command.__init__, the CommandHandler's sink replaces it on registration
+        return command
+
     @abstractmethod
     def execute(self):
         pass
 
 class CommandHandler:
-    def __init__(self):
-        self.commands = {} #empty dictionary for commands to be stored
+    def __init__(self, cache=None, metrics=None, journal=None, output=None, variables=None):
+        self.commands = {} #published snapshot, replaced and never mutated so dispatch reads without locking
+        self.cache = cache #optional ResultCache for pure commands
+        self.metrics = metrics #optional CommandMetrics, None keeps dispatch free of timing overhead
+        self.journal = journal #optional Journal recording every command line executed
+        self.output = STDOUT if output is None else output #sink for the command output, see app.output
+        self.variables = variables #VariableGraph of 'x = add a b' definitions, created on the first assignment
+        self.dispatch = DispatchTable() #compiled at registration time for case folding, aliases and prefixes
+        self.registry_lock = threading.Lock() #serializes registrations, readers never take it
+        self.plugin_locks = None #command name -> RLock once threaded dispatch is enabled
+        self.last_used = None #command name -> monotonic time of the last dispatch, tracked once idle plugins are unloaded
+        self.memory = None #optional MemoryMonitor, see app.memory
 
     def register_command(self, command_name:str, command:Command):
-        self.commands[command_name] = command
+        """
+        Copy on write: the new command table and dispatch table are built aside and then published,
+        so a thread dispatching meanwhile sees either the old or the new registry, never a partial one
+        """
+        self.register_commands(((command_name, command),))
+
+    def register_commands(self, commands):
+        """
+        Register (name, command) pairs with one copy of the registry, published once: registering n
+        commands one by one copies the tables n times
+        """
+        commands = list(commands.items() if isinstance(commands, dict) else commands)
+        for _, command in commands:
+            if self.output is not STDOUT:
+                command.output = self.output
+        with self.registry_lock:
+            dispatch = self.dispatch.copy()
+            table = dict(self.commands)
+            keys = []
+            for command_name, command in commands:
+                aliases = getattr(command, 'aliases', ())
+                keys.append((command_name, aliases if isinstance(aliases, (tuple, list)) else ()))
+                table[command_name] = command
+            dispatch.add_many(keys)
+            self.commands = table #commands first, a name resolved by the new dispatch table is always found
+            self.dispatch = dispatch
+
+    def unregister_command(self, command_name:str):
+        with self.registry_lock:
+            dispatch = self.dispatch.copy()
+            dispatch.remove(command_name)
+            commands = dict(self.commands)
+            command = commands.pop(command_name, None)
+            self.dispatch = dispatch
+            self.commands = commands
+        return command
+
+    def enable_threads(self):
+        """
+        Prepare for dispatch from several threads: commands not declared thread_safe then run one call at a time
+        """
+        if self.plugin_locks is None:
+            self.plugin_locks = {}
+
+    def plugin_lock(self, command_name:str):
+        lock = self.plugin_locks.get(command_name)
+        if lock is None:
+            lock = self.plugin_locks.setdefault(command_name, threading.RLock()) #a plugin may call itself through the handler
+        return lock
+
+    def get_command(self, command_name:str):
+        """
+        Return (name, command) for an exact name, alias or unique prefix.
+        Raises KeyError when nothing matches and AmbiguousCommandError (a KeyError) for ambiguous prefixes.
+        """
+        command = self.commands.get(command_name)
+        if command is not None:
+            return command_name, command
+        command_name = self.dispatch.resolve(command_name)
+        return command_name, self.commands[command_name]
 
     """def execute_command(self, command_name:str):
          Look Before you Leap (LBYL) use when you expect the key to be missing
@@ -19,9 +105,209 @@ class CommandHandler:
             print(f"Command '{command_name}' not found") """
 
     """ Easier to ask for forgiveness than permission (EAFP) use when you expect the key to be present"""
-    def execute_command(self, command_name:str):
+    def execute_command(self, command_name:str, *args):
+        """
+        Dispatch a command line such as 'add 2 3', words after the command name are passed as arguments.
+        A line containing '|' runs as a pipeline, e.g. 'add 2 3 | multiply _ 4', and 'x = add a b' defines a variable
+        """
+        if '=' in command_name:
+            name, _, text = command_name.partition('=')
+            if name.strip().isidentifier():
+                return self.execute_assignment(name.strip(), text)
+        if '|' in command_name:
+            return self.execute_pipeline(command_name)
+        tokens = command_name.split()
+        if not tokens:
+            return None
         try:
-            self.commands[command_name].execute()
+            command_name, command = self.get_command(tokens[0])
+        except AmbiguousCommandError as e:
+            return self.report(tokens[0], tokens[1:], str(e))
         except KeyError:
-            print(f"Command '{command_name}' not found")
+            return self.report(tokens[0], tokens[1:], f"Command '{tokens[0]}' not found")
+        args = (*tokens[1:], *args)
+        if args and not getattr(command, 'takes_arguments', False):
+            return self.report(command_name, args, f"Command '{command_name}' does not accept arguments")
+        try:
+            if self.plugin_locks is not None and not getattr(command, 'thread_safe', False):
+                with self.plugin_lock(command_name):
+                    result = self.execute_resolved(command_name, command, args)
+            else:
+                result = self.execute_resolved(command_name, command, args)
+        except Exception as e:
+            if self.output.records:
+                self.output.record(command_name, args, None, str(e) or type(e).__name__)
+            raise
+        if self.output.records:
+            self.output.record(command_name, args, result)
+        return result
+
+    def execute_resolved(self, command_name:str, command:Command, args:tuple):
+        if self.last_used is not None:
+            self.last_used[command_name] = time.monotonic()
+        execute = command.execute
+        if args and self.cache is not None and getattr(command, 'pure', False) and getattr(command, 'execute_operands', None) is not None \
+                and not command.operand_spec.is_bulk(args):
+            execute = functools.partial(self.execute_cached, command_name, command)
+        if self.journal is not None:
+            return self.execute_journaled(command_name, execute, args)
+        if self.metrics is None:
+            return execute(*args)
+        return self.metrics.measure(command_name, execute, *args)
+
+    def execute_cached(self, command_name:str, command:Command, *args):
+        """
+        Run a pure command with inline operands ('add 2 3'), its calculation served from the result cache like calculate()
+        """
+        calculate = command.calculate
+        operands = command.operand_spec.acquire(args, command.output)
+        return command.execute_operands(*operands, lambda *operands: self.calculate_cached(command_name, command, calculate, operands))
+
+    def report(self, command_name:str, args, message:str):
+        """
+        Tell the user a command line could not be dispatched, structured sinks get an error record
+        """
+        self.output.write(message)
+        self.output.record(command_name, args, None, message)
+        return None
+
+    def execute_pipeline(self, line:str):
+        """
+        Compile and run a pipeline line once, printing the final result like a plugin would
+        """
+        from app.pipeline import Pipeline
+        try:
+            pipeline = Pipeline(self, line)
+        except AmbiguousCommandError as e:
+            return self.report('pipeline', (line.strip(),), str(e))
+        except KeyError as e:
+            return self.report('pipeline', (line.strip(),), f"Command '{e.args[0]}' not found")
+        try:
+            result = pipeline.run()
+        except Exception as e:
+            if self.journal is not None:
+                self.journal.append('pipeline', (pipeline.text,), None, str(e) or type(e).__name__)
+            self.output.record('pipeline', (pipeline.text,), None, str(e) or type(e).__name__)
+            raise
+        if self.journal is not None:
+            self.journal.append('pipeline', (pipeline.text,), result)
+        self.output.write(f"Result: {pipeline.text} = {result}")
+        self.output.record('pipeline', (pipeline.text,), result)
+        return result
+
+    def get_variables(self):
+        if self.variables is None:
+            with self.registry_lock:
+                if self.variables is None:
+                    from app.variables import VariableGraph
+                    self.variables = VariableGraph(self)
+        return self.variables
+
+    def execute_assignment(self, name:str, text:str):
+        """
+        Define a variable as a number or a command over numbers and variables, then recompute the
+        variables depending on it and print the value with the recomputed and skipped counts
+        """
+        variables = self.get_variables()
+        try:
+            last = variables.define(name, text)
+        except KeyError as e: #unknown or ambiguous command, unknown variable
+            return self.report(name, (text.strip(),), e.args[0] if not isinstance(e, AmbiguousCommandError) else str(e))
+        except Exception as e:
+            self.output.record(name, (text.strip(),), None, str(e) or type(e).__name__)
+            raise
+        variable = variables.variables[name]
+        value = variable.value if variable.error is None else f"Error: {variable.error}"
+        self.output.write(f"{name} = {value} (recomputed {last.recomputed}, skipped {last.skipped})")
+        self.output.record(name, (variable.text,), variable.value, variable.error)
+        return variable.value
+
+    def execute_journaled(self, command_name:str, execute, args:tuple):
+        """
+        Execute a command and append its name, arguments, result or error to the journal
+        """
+        try:
+            result = execute(*args) if self.metrics is None else self.metrics.measure(command_name, execute, *args)
+        except Exception as e:
+            self.journal.append(command_name, args, None, str(e) or type(e).__name__)
+            raise
+        self.journal.append(command_name, args, result)
+        return result
+
+
+    def calculate(self, command_name:str, *operands):
+        """
+        Run a registered command against operands supplied by the caller instead of prompting.
+        Raises KeyError for unknown commands and TypeError for commands that take no operands.
+        """
+        command_name, command = self.get_command(command_name)
+        calculate = getattr(command, 'calculate', None)
+        if calculate is None:
+            raise TypeError(f"Command '{command_name}' does not accept operands")
+        operands = tuple(numeric.parse(operand) for operand in operands)
+        if self.metrics is not None:
+            return self.metrics.measure(command_name, self.calculate_operands, command_name, command, calculate, operands)
+        return self.calculate_operands(command_name, command, calculate, operands)
+
+    def calculate_operands(self, command_name:str, command:Command, calculate, operands:tuple):
+        """
+        Call calculate, serving pure commands from the result cache when one is configured
+        """
+        if self.last_used is not None:
+            self.last_used[command_name] = time.monotonic()
+        if self.plugin_locks is not None and not getattr(command, 'thread_safe', False):
+            with self.plugin_lock(command_name):
+                return self.calculate_cached(command_name, command, calculate, operands)
+        return self.calculate_cached(command_name, command, calculate, operands)
+
+    def calculate_cached(self, command_name:str, command:Command, calculate, operands:tuple):
+        """
+        Only fixed arity operands are cached, the operand lists of n-ary commands (sum, mean) would fill the cache
+        """
+        if self.cache is None or not getattr(command, 'pure', False):
+            return calculate(*operands)
+        operand_spec = getattr(command, 'operand_spec', None)
+        if operand_spec is None or len(operands) != len(operand_spec.prompts):
+            return calculate(*operands)
+        key_operands = operands
+        if 0 in operands: #-0.0 is equal to 0.0 and hashes alike but is another operand, add -0.0 -0.0 is -0.0
+            key_operands = tuple((operand, str(operand)) if operand == 0 else operand for operand in operands)
+        key = (command_name, numeric.get_backend().key, key_operands) #1.0 and Decimal('1') are equal keys, the backend tells them apart
+        hit, result = self.cache.get(key)
+        if not hit:
+            result = calculate(*operands)
+            self.cache.put(key, result)
+        return result
+
+    def calculate_array(self, command_name:str, a, b):
+        """
+        Run a registered command over two operand arrays in a single call.
+        Raises KeyError for unknown commands and TypeError for commands without an array path.
+        """
+        command_name, command = self.get_command(command_name)
+        calculate_array = getattr(command, 'calculate_array', None)
+        if calculate_array is None:
+            raise TypeError(f"Command '{command_name}' does not support array operands")
+        return calculate_array(a, b)
 
+    async def execute_command_async(self, command_name:str, *operands, executor=None):
+        """
+        Run a command without blocking the event loop and return its result instead of printing it.
+        Commands may provide native coroutines (calculate_async / execute_async), synchronous commands
+        are offloaded to the executor (the loop's default thread pool when None).
+        Commands with a calculate method always take the operand path so they never prompt.
+        """
+        command_name, command = self.get_command(command_name)
+        import asyncio #only the server runs commands asynchronously, keep asyncio out of the startup path
+        loop = asyncio.get_running_loop()
+        if getattr(command, 'calculate', None) is not None:
+            calculate_async = getattr(command, 'calculate_async', None)
+            if calculate_async is not None:
+                return await calculate_async(*(numeric.parse(operand) for operand in operands))
+            return await loop.run_in_executor(executor, functools.partial(self.calculate, command_name, *operands))
+        if operands and not getattr(command, 'takes_arguments', False):
+            raise TypeError(f"Command '{command_name}' does not accept operands")
+        execute_async = getattr(command, 'execute_async', None)
+        if execute_async is not None:
+            return await execute_async(*operands)
+        return await loop.run_in_executor(executor, functools.partial(self.execute_command, command_name, *operands))
@@ -0,0 +1,72 @@
+#bounded memoization of pure command results keyed by (command, operands)
+import threading
+import time
+from collections import OrderedDict
+
+class ResultCache:
+    """
+    LRU cache with an optional time to live, only commands that declare pure = True are cached
+    """
+    def __init__(self, max_size:int = 1024, ttl:float = None, clock=time.monotonic):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict() #key -> (expires_at, value), oldest first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.Lock() #commands may be run from executor threads
+
+    def get(self, key):
+        """
+        Return (True, value) on a hit and (False, None) on a miss or an expired entry
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= self.clock():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used entry when the cache is full
+        """
+        expires_at = None if self.ttl is None else self.clock() + self.ttl
+        with self.lock:
+            self.entries[key] = (expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Counters for runtime inspection
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
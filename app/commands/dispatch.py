@@ -0,0 +1,151 @@
+#compiled dispatch table: case folded names, aliases and unique prefixes resolved in O(length of the token)
+class AmbiguousCommandError(KeyError):
+    """
+    Raised when a prefix matches more than one command
+    """
+    def __init__(self, token:str, candidates):
+        super().__init__(token)
+        self.token = token
+        self.candidates = sorted(candidates)
+
+    def __str__(self):
+        return f"Command '{self.token}' is ambiguous: {', '.join(self.candidates)}"
+
+MANY = object() #TrieNode.name when keys of several commands start with the node's prefix
+
+class TrieNode:
+    """
+    Trie nodes are never changed once a DispatchTable has published them: updates copy the nodes along
+    the key's path, so a table copy shares every other node with the original (copy on write)
+    """
+    __slots__ = ('children', 'terminal', 'name')
+
+    def __init__(self, children=None, terminal=None, name=None):
+        self.children = {} if children is None else children
+        self.terminal = terminal #command whose key ends at this node
+        self.name = name #the only command with a key at or below this node, MANY if several, None if none
+
+    def copy(self):
+        return TrieNode(dict(self.children), self.terminal, self.name)
+
+    def summarize(self):
+        name = self.terminal
+        for child in self.children.values():
+            if name is None:
+                name = child.name
+            elif child.name != name:
+                name = MANY
+            if name is MANY:
+                break
+        self.name = name
+
+    def names(self):
+        """
+        Every command with a key at or below this node, only needed to report an ambiguous prefix
+        """
+        names = set() if self.terminal is None else {self.terminal}
+        for child in self.children.values():
+            names |= {child.name} if child.name is not MANY else child.names()
+        return names
+
+class DispatchTable:
+    """
+    Maps typed tokens to registered command names. Exact names and aliases are looked up in a dict,
+    anything else is resolved as a unique prefix by walking a trie, so the cost depends on the
+    length of the token and never on the number of registered commands. copy() is cheap enough for
+    copy-on-write registration: the dicts are copied and the trie is shared.
+    """
+    def __init__(self):
+        self.exact = {} #folded name or alias -> command name
+        self.keys = {} #command name -> folded keys registered for it
+        self.root = TrieNode()
+        self.owned = None #trie nodes created by the running add_many, no reader has seen them
+
+    def copy(self):
+        table = DispatchTable()
+        table.exact = dict(self.exact)
+        table.keys = dict(self.keys)
+        table.root = self.root
+        return table
+
+    def add(self, command_name:str, aliases=()):
+        self.remove(command_name)
+        keys = []
+        for key in (command_name, *aliases):
+            key = key.casefold()
+            if key in keys:
+                continue
+            owner = self.exact.get(key)
+            if owner is not None and owner != command_name:
+                continue #never steal another command's name or alias
+            keys.append(key)
+            self.exact[key] = command_name
+            self.insert(key, command_name)
+        self.keys[command_name] = keys
+
+    def add_many(self, commands):
+        """
+        add() every (command name, aliases) pair. Only for a table no reader sees yet, such as the copy
+        register_commands builds: nodes created by this call are updated in place instead of copied again
+        """
+        self.owned = set()
+        try:
+            for command_name, aliases in commands:
+                self.add(command_name, aliases)
+        finally:
+            self.owned = None
+
+    def remove(self, command_name:str):
+        for key in self.keys.pop(command_name, ()):
+            del self.exact[key]
+            self.insert(key, None)
+
+    def insert(self, key:str, command_name:str):
+        """
+        Point key at command_name, or remove it with None, by copying the path from the root
+        """
+        owned = self.owned
+        path = [self.root if owned is not None and self.root in owned else self.root.copy()]
+        for char in key:
+            child = path[-1].children.get(char)
+            if child is None:
+                child = TrieNode()
+            elif owned is None or child not in owned:
+                child = child.copy()
+            path[-1].children[char] = child
+            path.append(child)
+        if owned is not None:
+            owned.update(path)
+        path[-1].terminal = command_name
+        for depth in range(len(key), 0, -1):
+            path[depth].summarize()
+            if path[depth].name is None: #nothing left below, prune the node
+                del path[depth - 1].children[key[depth - 1]]
+        path[0].summarize()
+        self.root = path[0]
+
+    def resolve(self, token:str):
+        """
+        Return the command name for token, raising KeyError when nothing matches
+        and AmbiguousCommandError when a prefix matches several commands
+        """
+        key = token.casefold()
+        if not key:
+            raise KeyError(token)
+        command_name = self.exact.get(key)
+        if command_name is not None:
+            return command_name
+        node = self.root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                raise KeyError(token)
+        if node.name is MANY:
+            raise AmbiguousCommandError(token, node.names())
+        return node.name
+
+    def aliases(self, command_name:str):
+        """
+        The aliases registered for a command, without its own name
+        """
+        return [key for key in self.keys.get(command_name, ()) if key != command_name.casefold()]
@@ -0,0 +1,142 @@
+#per-command latency and throughput instrumentation with fixed bucket histograms
+import bisect
+import json
+import threading
+import time
+
+#histogram upper bounds in seconds, 1us to ~67s doubling each bucket, the last bucket is +Inf
+BUCKETS = tuple(1e-6 * 2 ** exponent for exponent in range(27))
+
+class CommandStats:
+    """
+    Counters and a latency histogram for one command
+    """
+    __slots__ = ('calls', 'errors', 'total_time', 'max_time', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def record(self, seconds:float, error:bool):
+        self.calls += 1
+        if error:
+            self.errors += 1
+        self.total_time += seconds
+        if seconds > self.max_time:
+            self.max_time = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, fraction:float):
+        """
+        Upper bound of the histogram bucket holding the given fraction of calls
+        """
+        if not self.calls:
+            return 0.0
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return BUCKETS[index] if index < len(BUCKETS) else self.max_time
+        return self.max_time
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_seconds': self.total_time,
+            'mean_seconds': self.total_time / self.calls if self.calls else 0.0,
+            'max_seconds': self.max_time,
+            'p50_seconds': self.percentile(0.50),
+            'p95_seconds': self.percentile(0.95),
+            'p99_seconds': self.percentile(0.99),
+        }
+
+class CommandMetrics:
+    """
+    Collects CommandStats per command name plus plugin import times, safe to share between threads
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.commands = {}
+        self.imports = {}
+        self.started = clock()
+        self.lock = threading.Lock()
+
+    def record(self, command_name:str, seconds:float, error:bool = False):
+        with self.lock:
+            stats = self.commands.get(command_name)
+            if stats is None:
+                stats = self.commands[command_name] = CommandStats()
+            stats.record(seconds, error)
+
+    def record_import(self, plugin_name:str, seconds:float):
+        with self.lock:
+            self.imports[plugin_name] = seconds
+
+    def measure(self, command_name:str, func, *args):
+        """
+        Call func(*args) and record its latency, exceptions are counted as errors and re-raised
+        """
+        start = self.clock()
+        error = True
+        try:
+            result = func(*args)
+            error = False
+            return result
+        finally:
+            self.record(command_name, self.clock() - start, error)
+
+    def snapshot(self):
+        with self.lock:
+            uptime = self.clock() - self.started
+            commands = {name: stats.summary() for name, stats in self.commands.items()}
+            for name, summary in commands.items():
+                summary['throughput_per_second'] = summary['calls'] / uptime if uptime > 0 else 0.0
+            return {'uptime_seconds': uptime, 'commands': commands, 'plugin_import_seconds': dict(self.imports)}
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Render the metrics in the Prometheus text exposition format
+        """
+        lines = [
+            '# HELP calculator_command_calls_total Commands dispatched.',
+            '# TYPE calculator_command_calls_total counter',
+        ]
+        with self.lock:
+            commands = sorted(self.commands.items())
+            imports = sorted(self.imports.items())
+            for name, stats in commands:
+                lines.append(f'calculator_command_calls_total{{command="{name}"}} {stats.calls}')
+            lines += ['# HELP calculator_command_errors_total Commands that raised.', '# TYPE calculator_command_errors_total counter']
+            for name, stats in commands:
+                lines.append(f'calculator_command_errors_total{{command="{name}"}} {stats.errors}')
+            lines += ['# HELP calculator_command_seconds Command latency.', '# TYPE calculator_command_seconds histogram']
+            for name, stats in commands:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, stats.buckets):
+                    cumulative += count
+                    lines.append(f'calculator_command_seconds_bucket{{command="{name}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'calculator_command_seconds_bucket{{command="{name}",le="+Inf"}} {stats.calls}')
+                lines.append(f'calculator_command_seconds_sum{{command="{name}"}} {stats.total_time}')
+                lines.append(f'calculator_command_seconds_count{{command="{name}"}} {stats.calls}')
+            lines += ['# HELP calculator_plugin_import_seconds Plugin import time.', '# TYPE calculator_plugin_import_seconds gauge']
+            for name, seconds in imports:
+                lines.append(f'calculator_plugin_import_seconds{{plugin="{name}"}} {seconds}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path:str, fmt:str = 'json'):
+        """
+        Write the metrics to path as 'json' or 'prometheus' text
+        """
+        if fmt not in ('json', 'prometheus'):
+            raise ValueError(f"Unknown stats format: {fmt}")
+        with open(path, 'w', encoding='utf-8') as export_file:
+            export_file.write(self.to_json() if fmt == 'json' else self.to_prometheus())
+        return path
@@ -0,0 +1,121 @@
+#shared operand acquisition for the plugins: interactive prompts, inline arguments and bulk numeric text
+import logging
+import warnings
+from array import array
+from app import numeric
+from app import vectorized
+from app.output import STDOUT
+
+MAX_REPORTED_ERRORS = 10 #invalid bulk items printed before the rest are only counted
+
+def get_float(prompt, output=STDOUT):
+    """
+    Prompt until the input parses with the current numeric backend
+    """
+    while True:
+        try:
+            value = numeric.parse(output.read(prompt))
+            logging.debug("Value entered: %s", value)
+            return value
+        except ValueError:
+            logging.warning("Invalid Value. Please Try Again.")
+            output.write("Invalid Value. Please Try Again.")
+
+def split_columns(values, columns:int, np=None):
+    """
+    Split a flat sequence of row major values into columns, numpy columns are views without copies
+    """
+    if np is not None:
+        rows = np.asarray(values, dtype=np.float64).reshape(-1, columns)
+        return [rows[:, column] for column in range(columns)]
+    return [array('d', values[column::columns]) for column in range(columns)]
+
+def parse_bulk_items(tokens, columns:int, np=None):
+    """
+    Slow path that validates every item, rows with an invalid or missing item are dropped
+    and reported as (row, token, message)
+    """
+    values, errors = array('d'), []
+    for start in range(0, len(tokens), columns):
+        row = start // columns + 1
+        row_tokens = tokens[start:start + columns]
+        if len(row_tokens) < columns:
+            errors.append((row, ' '.join(row_tokens), f"expected {columns} values, got {len(row_tokens)}"))
+            continue
+        parsed = []
+        for token in row_tokens:
+            try:
+                parsed.append(float(token))
+            except ValueError:
+                errors.append((row, token, f"could not convert {token!r} to float"))
+        if len(parsed) == columns:
+            values.extend(parsed)
+    return split_columns(values, columns, np), errors
+
+def parse_bulk(text:str, columns:int = 1):
+    """
+    Parse a block of whitespace separated numbers into columns of float64 values, taken row by row.
+    Valid input is converted in one call (numpy.fromstring, or array('d') without numpy), only input
+    with invalid items falls back to checking each item. Returns (columns, errors).
+    """
+    try:
+        np = vectorized.get_numpy()
+    except RuntimeError:
+        np = None
+    try:
+        if np is not None:
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', DeprecationWarning) #fromstring only warns when it stops at bad data
+                values = np.fromstring(text, dtype=np.float64, sep=' ')
+        else:
+            values = array('d', map(float, text.split()))
+    except (DeprecationWarning, ValueError):
+        values = None
+    if values is not None and len(values) % columns == 0:
+        return split_columns(values, columns, np), []
+    return parse_bulk_items(text.split(), columns, np)
+
+class OperandSpec:
+    """
+    Declares the operands of a command. Operands come from the arguments typed after the command name,
+    from one prompt per operand when there are none, or from a bulk file given as '@path'.
+    """
+    def __init__(self, command_name:str, *prompts:str):
+        self.command_name = command_name
+        self.prompts = prompts
+
+    def is_bulk(self, args):
+        return len(args) == 1 and isinstance(args[0], str) and args[0].startswith('@')
+
+    def acquire(self, args=(), output=STDOUT):
+        """
+        Return the parsed operands from the inline arguments, prompting for them through output when there are none
+        """
+        if not args:
+            return [get_float(prompt, output) for prompt in self.prompts]
+        if len(args) != len(self.prompts):
+            raise ValueError(f"{self.command_name} expects {len(self.prompts)} operands, got {len(args)}")
+        return [numeric.parse(arg) for arg in args]
+
+    def acquire_bulk(self, source:str, output=STDOUT):
+        """
+        Read the operand columns from the '@path' file, invalid rows are printed and skipped
+        """
+        with open(source[1:], encoding='utf-8') as f:
+            columns, errors = parse_bulk(f.read(), len(self.prompts))
+        for row, token, message in errors[:MAX_REPORTED_ERRORS]:
+            output.write(f"Row {row}: {message}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            output.write(f"... {len(errors) - MAX_REPORTED_ERRORS} more invalid rows")
+        if errors:
+            logging.warning("%s: %d invalid rows in %s", self.command_name, len(errors), source[1:])
+        return columns, errors
+
+    def execute_bulk(self, command, source:str):
+        """
+        Run the command's array path over every row of a bulk file
+        """
+        columns, errors = self.acquire_bulk(source, command.output)
+        result = command.calculate_array(*columns)
+        command.output.write(f"Result: {len(result)} rows computed from {source[1:]}" + (f", {len(errors)} invalid rows skipped" if errors else ""))
+        return result
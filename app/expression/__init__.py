@@ -0,0 +1,93 @@
+#arithmetic expressions parsed once into an AST and compiled to closures over the arithmetic plugins
+import ast
+import logging
+from app.commands.cache import ResultCache
+from app import numeric
+
+#python operator node -> command that implements it, so expressions share the plugins' semantics
+OPERATORS = {ast.Add: 'add', ast.Sub: 'sub', ast.Mult: 'multiply', ast.Div: 'divide'}
+
+class CompiledExpression:
+    """
+    A parsed expression that can be evaluated many times over different variable bindings
+    """
+    def __init__(self, text:str, evaluator, variables:tuple):
+        self.text = text
+        self.evaluator = evaluator
+        self.variables = variables
+
+    def evaluate(self, bindings:dict = None, **kwargs):
+        """
+        Evaluate with variables taken from bindings and/or keyword arguments
+        """
+        env = dict(bindings or {}, **kwargs)
+        missing = [name for name in self.variables if name not in env]
+        if missing:
+            raise ValueError(f"Unbound variable(s): {', '.join(missing)}")
+        return self.evaluator(env)
+
+    def evaluate_many(self, bindings):
+        """
+        Generator evaluating the expression once per bindings dict without re-parsing
+        """
+        for env in bindings:
+            yield self.evaluate(env)
+
+    def __repr__(self):
+        return f"CompiledExpression({self.text!r})"
+
+class ExpressionEngine:
+    """
+    Compiles expression text against a CommandHandler and caches the compiled form
+    """
+    def __init__(self, command_handler, cache_size:int = 256):
+        self.command_handler = command_handler
+        self.cache = ResultCache(cache_size)
+
+    def compile(self, text:str):
+        """
+        Parse text once, raising ValueError for syntax errors or anything other than
+        numbers, variables, + - * / and parentheses
+        """
+        text = text.strip()
+        hit, compiled = self.cache.get(text)
+        if hit:
+            return compiled
+        try:
+            tree = ast.parse(text, mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression: {text}") from e
+        variables = []
+        evaluator = self.build(tree.body, variables)
+        compiled = CompiledExpression(text, evaluator, tuple(variables))
+        self.cache.put(text, compiled)
+        logging.debug("Compiled expression: %s", text)
+        return compiled
+
+    def evaluate(self, text:str, bindings:dict = None, **kwargs):
+        return self.compile(text).evaluate(bindings, **kwargs)
+
+    def build(self, node, variables:list):
+        """
+        Turn an AST node into a closure taking the variable environment
+        """
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            command_name = OPERATORS[type(node.op)]
+            left = self.build(node.left, variables)
+            right = self.build(node.right, variables)
+            calculate = self.command_handler.calculate
+            return lambda env: calculate(command_name, left(env), right(env))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self.build(node.operand, variables)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            return lambda env: -operand(env)
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            value = node.value
+            return lambda env: numeric.parse(value) #parsed at evaluation so the current numeric backend applies
+        if isinstance(node, ast.Name):
+            name = node.id
+            if name not in variables:
+                variables.append(name)
+            return lambda env: env[name]
+        raise ValueError(f"Unsupported expression element: {ast.unparse(node)}")
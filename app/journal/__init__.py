@@ -0,0 +1,199 @@
+#append only binary session journal of executed commands, written in batches and read back through mmap
+import collections
+import logging
+import mmap
+import numbers
+import os
+import struct
+import threading
+import time
+from app.codec import LENGTH, COUNT, encode_value, decode_value
+
+MAGIC = b'CJNL\x01' #file header, format version 1
+RECORD = struct.Struct('!dB') #timestamp, 1 when the command raised
+
+Entry = collections.namedtuple('Entry', 'timestamp command operands result error')
+
+def encode_entry(command_name:str, operands, result, error:str = None, timestamp:float = None):
+    """
+    One length prefixed record: timestamp, error flag, command, operand count, operands, result, error.
+    The command comes right after the fixed header so aggregation can skip the rest of the record.
+    """
+    parts = [RECORD.pack(time.time() if timestamp is None else timestamp, error is not None), encode_value(command_name), COUNT.pack(len(operands))]
+    parts.extend(encode_value(operand) for operand in operands)
+    parts.append(encode_value(result))
+    parts.append(encode_value(error))
+    payload = b''.join(parts)
+    return LENGTH.pack(len(payload)) + payload
+
+class Journal:
+    """
+    Appends records to a buffered file, flushing and fsyncing every sync_every records or, by a timer,
+    sync_interval seconds after the first unsynced record, whichever comes first. An idle session keeps
+    no record unsynced for longer than sync_interval.
+    A file that is not a journal raises ValueError instead of being appended to.
+    A crash can lose at most the unsynced tail and never corrupts the records before it, a record
+    torn by the crash is cut off when the journal is opened again so appends follow the last complete one.
+    """
+    def __init__(self, path:str, sync_every:int = 100, sync_interval:float = 1.0):
+        self.path = path
+        self.sync_every = max(1, sync_every)
+        self.sync_interval = sync_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, 'ab', buffering=64 * 1024)
+        size = self.file.tell()
+        try:
+            end = JournalReader(path).end() if size else 0
+        except ValueError:
+            self.file.close()
+            raise
+        if end < size:
+            logging.warning(f'Journal {path}: discarding {size - end} bytes of a torn record')
+            self.file.truncate(end) #appends continue at the new end of file
+        if end == 0:
+            self.file.write(MAGIC)
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.timer = None #threading.Timer syncing the pending records sync_interval after the first of them
+        self.records = 0
+        self.syncs = 0
+
+    def append(self, command_name:str, operands=(), result=None, error:str = None, timestamp:float = None):
+        """
+        Record one command, only numbers and text are kept as its result: what introspection commands
+        such as history or stats return is a whole listing, journaled as None instead of its str()
+        """
+        if result is not None and not isinstance(result, (numbers.Number, str)):
+            result = None
+        record = encode_entry(command_name, operands, result, error, timestamp)
+        with self.lock:
+            self.file.write(record)
+            self.records += 1
+            self.pending += 1
+            if self.pending >= self.sync_every or self.sync_interval <= 0:
+                self.sync_locked()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.sync_interval, self.sync_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def sync_timer(self):
+        with self.lock:
+            self.timer = None
+            if self.pending and not self.file.closed:
+                try:
+                    self.sync_locked()
+                except OSError as e:
+                    logging.warning(f'Could not sync the journal {self.path}: {e}')
+
+    def sync_locked(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.syncs += 1
+
+    def flush(self):
+        """
+        Make buffered records visible to readers without waiting for the next sync
+        """
+        with self.lock:
+            if not self.file.closed:
+                self.file.flush()
+
+    def sync(self):
+        with self.lock:
+            if not self.file.closed:
+                self.sync_locked()
+
+    def close(self):
+        timer = self.timer
+        if timer is not None:
+            timer.cancel()
+        with self.lock:
+            if not self.file.closed:
+                self.sync_locked()
+                self.file.close()
+
+class JournalReader:
+    """
+    Memory maps a journal file and decodes records lazily, a truncated record at the end
+    (the process died mid write) is ignored
+    """
+    def __init__(self, path:str):
+        self.path = path
+
+    def records(self):
+        """
+        Yield (mmap, payload start, payload end) for every complete record
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= len(MAGIC):
+            return
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"Not a session journal: {self.path}")
+            offset, size = len(MAGIC), len(data)
+            while offset + LENGTH.size <= size:
+                length = LENGTH.unpack_from(data, offset)[0]
+                start = offset + LENGTH.size
+                if start + length > size:
+                    break
+                yield data, start, start + length
+                offset = start + length
+
+    def end(self):
+        """
+        Offset just past the last complete record, 0 when not even the header was written
+        """
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < len(MAGIC):
+            return 0
+        end = len(MAGIC)
+        for _, _, end in self.records():
+            pass
+        return end
+
+    def __iter__(self):
+        for data, start, _ in self.records():
+            timestamp, _ = RECORD.unpack_from(data, start)
+            command_name, offset = decode_value(data, start + RECORD.size)
+            count = COUNT.unpack_from(data, offset)[0]
+            offset += COUNT.size
+            operands = []
+            for _ in range(count):
+                operand, offset = decode_value(data, offset)
+                operands.append(operand)
+            result, offset = decode_value(data, offset)
+            error, _ = decode_value(data, offset)
+            yield Entry(timestamp, command_name, operands, result, error)
+
+    def tail(self, count:int = 10):
+        return list(collections.deque(self, maxlen=count))
+
+    def aggregate(self):
+        """
+        Per command calls, errors, first and last timestamp, decoding only the record headers
+        """
+        summary = {}
+        for data, start, _ in self.records():
+            timestamp, failed = RECORD.unpack_from(data, start)
+            command_name, _ = decode_value(data, start + RECORD.size)
+            stats = summary.get(command_name)
+            if stats is None:
+                stats = summary[command_name] = {'calls': 0, 'errors': 0, 'first': timestamp, 'last': timestamp}
+            stats['calls'] += 1
+            stats['errors'] += failed
+            stats['last'] = timestamp
+        return summary
+
+def replay(command_handler, path:str):
+    """
+    Re-run the journaled commands that were given their operands inline and yield batch records,
+    commands that prompted for input or take no operands yield their recorded result
+    """
+    from app import batch
+    for entry in JournalReader(path):
+        if entry.operands and callable(getattr(command_handler.commands.get(entry.command), 'calculate', None)):
+            yield batch.execute_record(command_handler, ' '.join(str(operand) for operand in (entry.command, *entry.operands)))
+        else:
+            yield {'command': entry.command, 'operands': entry.operands, 'result': entry.result, 'error': entry.error}
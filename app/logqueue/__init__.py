@@ -0,0 +1,117 @@
+#non-blocking logging pipeline, records are handed to a background thread that writes the log file in batches
+import atexit
+import logging
+import logging.handlers
+import queue
+import time
+
+PROFILES = ('queue', 'production')
+
+_listener = None #the running QueueListener, restarted when logging is configured again
+_saved_flags = None #logThreads, logProcesses, logMultiprocessing before the production profile cleared them
+
+class BatchingFileHandler(logging.FileHandler):
+    """
+    File handler that joins formatted records and writes them with a single write + flush
+    once batch_size records are buffered or flush_interval seconds have passed
+    """
+    def __init__(self, filename:str, batch_size:int = 256, flush_interval:float = 1.0, encoding:str = 'utf-8'):
+        super().__init__(filename, encoding=encoding)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.last_flush = time.monotonic()
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.buffer and self.stream is not None:
+                self.stream.write(''.join(self.buffer))
+                self.buffer.clear()
+            super().flush()
+            self.last_flush = time.monotonic()
+        finally:
+            self.release()
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues the record untouched so the %-style message formatting happens on the
+    listener thread instead of the thread doing the work
+    """
+    def prepare(self, record):
+        return record
+
+class FlushingQueueListener(logging.handlers.QueueListener):
+    """
+    Queue listener that flushes its handlers whenever the queue has been idle for flush_interval,
+    so batched records never wait for the next log call to reach the file
+    """
+    def __init__(self, log_queue, *handlers, flush_interval:float = 1.0):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+
+def configure(filename:str = 'logs/app.log', profile:str = 'queue', batch_size:int = 256, flush_interval:float = 1.0):
+    """
+    Route the root logger through a queue to a background thread writing batched records.
+    The 'queue' profile keeps DEBUG logging, 'production' logs WARNING and above only and
+    skips collecting thread/process/caller details so disabled calls cost a single level check.
+    """
+    global _listener, _saved_flags
+    shutdown()
+    level = logging.DEBUG
+    if profile == 'production':
+        level = logging.WARNING
+        _saved_flags = (logging.logThreads, logging.logProcesses, logging.logMultiprocessing)
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+    file_handler = BatchingFileHandler(filename, batch_size, flush_interval)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.WARNING)
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+    _listener = FlushingQueueListener(log_queue, file_handler, console_handler, flush_interval=flush_interval)
+    _listener.start()
+    return _listener
+
+def shutdown():
+    """
+    Stop the listener, flushing every buffered record, detach its queue handler and restore the
+    logging flags the production profile cleared
+    """
+    global _listener, _saved_flags
+    if _saved_flags is not None:
+        logging.logThreads, logging.logProcesses, logging.logMultiprocessing = _saved_flags
+        _saved_flags = None
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, DeferredQueueHandler) and handler.queue is _listener.queue:
+            root.removeHandler(handler)
+    _listener = None
+
+atexit.register(shutdown)
@@ -0,0 +1,199 @@
+#memory accounting for long running processes: tracemalloc snapshots attributed to plugins, periodic growth
+#checks and unloading of plugins that have been idle, their modules are imported again on the next dispatch
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+PLUGIN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'plugins')
+PLUGINS_PACKAGE = 'app.plugins'
+
+#traced bytes and blocks of one plugin between two checks
+Growth = collections.namedtuple('Growth', 'plugin size_diff count_diff')
+
+def rss_bytes():
+    """
+    Resident set size of this process, the peak where the current value cannot be read
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError: #Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024 #bytes on macOS, KiB elsewhere
+
+def plugin_of(filename:str, plugin_path:str = PLUGIN_PATH):
+    """
+    Name of the plugin package a source file belongs to, None outside the plugin directory
+    """
+    relative = os.path.relpath(filename, plugin_path)
+    if relative.startswith(os.pardir) or os.sep not in relative:
+        return None
+    return relative.split(os.sep, 1)[0]
+
+def attribute(snapshot, plugin_path:str = PLUGIN_PATH):
+    """
+    Traced bytes and blocks per plugin: every allocation with a frame in the plugin's files on its
+    traceback, so memory a plugin's code allocated and something else keeps alive still counts
+    """
+    usage = {}
+    for stat in snapshot.statistics('filename', cumulative=True):
+        plugin = plugin_of(stat.traceback[0].filename, plugin_path)
+        if plugin is not None:
+            size, count = usage.get(plugin, (0, 0))
+            usage[plugin] = (size + stat.size, count + stat.count)
+    return usage
+
+def forget_module(module_name:str):
+    """
+    Drop a module and its submodules from sys.modules and from their package, so nothing in the
+    import system keeps them alive and the next import executes them afresh
+    """
+    removed = [name for name in sys.modules if name == module_name or name.startswith(module_name + '.')]
+    for name in removed:
+        del sys.modules[name]
+    package, _, child = module_name.rpartition('.')
+    if package in sys.modules and getattr(sys.modules[package], child, None) is not None:
+        delattr(sys.modules[package], child)
+    return removed
+
+def unload_idle(command_handler, idle_seconds:float, now:float = None, plugins_package:str = PLUGINS_PACKAGE):
+    """
+    Replace the plugins not dispatched for idle_seconds by LazyCommand placeholders and forget their modules,
+    returns the unloaded command names. The first call starts tracking, so nothing is idle before idle_seconds.
+    """
+    import inspect
+    from app.plugin_index import LazyCommand
+    now = time.monotonic() if now is None else now
+    if command_handler.last_used is None:
+        command_handler.last_used = {}
+    last_used = command_handler.last_used
+    unloaded = []
+    for command_name, command in list(command_handler.commands.items()):
+        command_class = type(command)
+        if isinstance(command, LazyCommand) or not command_class.__module__.startswith(plugins_package + '.'):
+            continue #already a placeholder, or not a plugin (sandbox proxies, commands registered by hand)
+        if now - last_used.setdefault(command_name, now) < idle_seconds:
+            continue
+        needs_handler = 'command_handler' in inspect.signature(command_class.__init__).parameters
+        aliases = command.aliases if isinstance(command.aliases, (tuple, list)) else ()
+        placeholder = LazyCommand(command_handler, command_name, command_class.__module__, command_class.__name__, needs_handler, aliases)
+        command_handler.register_command(command_name, placeholder)
+        last_used.pop(command_name, None)
+        unloaded.append(command_name)
+    in_use = {type(command).__module__ for command in command_handler.commands.values() if not isinstance(command, LazyCommand)}
+    for module_name in {command_handler.commands[name].module for name in unloaded} - in_use:
+        forget_module(module_name)
+    if unloaded:
+        logging.info(f'Unloaded idle plugins: {", ".join(sorted(unloaded))}')
+    return unloaded
+
+class MemoryMonitor:
+    """
+    Periodic memory checks for a CommandHandler. While tracemalloc traces, every check attributes the
+    traced memory to plugins and warns about the plugins that grew more than growth_threshold bytes
+    since the previous check. With idle_unload seconds, plugins idle that long are unloaded.
+    """
+    def __init__(self, command_handler, interval:float = 300.0, growth_threshold:int = 1 << 20, idle_unload:float = 0.0, frames:int = 8,
+                 plugin_path:str = PLUGIN_PATH):
+        self.command_handler = command_handler
+        self.plugin_path = plugin_path
+        self.interval = interval
+        self.growth_threshold = growth_threshold
+        self.idle_unload = idle_unload
+        self.frames = frames
+        self.started_tracing = False #tracing was started here and is stopped by stop()
+        self.usage = None #plugin -> (bytes, blocks) at the previous check
+        self.snapshot = None #kept by diff() only, a snapshot costs memory of its own
+        self.last_check = time.monotonic()
+        self.checks = 0
+        self.unloaded = 0
+        self.lock = threading.Lock()
+        if idle_unload > 0 and command_handler.last_used is None:
+            command_handler.last_used = {} #dispatches count from now on
+
+    @property
+    def tracing(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started_tracing = True
+
+    def stop(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        self.usage = self.snapshot = None
+
+    def take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def poll(self):
+        """
+        Run check() once interval seconds have passed since the last one, cheap enough for every REPL command
+        """
+        if time.monotonic() - self.last_check >= self.interval:
+            return self.check()
+        return None
+
+    def check(self):
+        """
+        Unload idle plugins, then compare the per plugin traced memory with the previous check,
+        returns the Growth of the plugins over the threshold
+        """
+        with self.lock:
+            self.last_check = time.monotonic()
+            self.checks += 1
+            if self.idle_unload > 0:
+                self.unloaded += len(unload_idle(self.command_handler, self.idle_unload))
+            if not tracemalloc.is_tracing():
+                return []
+            usage = attribute(self.take_snapshot(), self.plugin_path)
+            previous, self.usage = self.usage, usage
+            if previous is None:
+                return []
+            growth = []
+            for plugin in sorted(usage.keys() | previous.keys()):
+                size, count = usage.get(plugin, (0, 0))
+                old_size, old_count = previous.get(plugin, (0, 0))
+                if size - old_size > self.growth_threshold:
+                    growth.append(Growth(plugin, size - old_size, count - old_count))
+            for item in growth:
+                logging.warning(f'Memory growth in plugin {item.plugin}: {item.size_diff / 1024:+.1f} KiB in {item.count_diff:+d} blocks since the last check')
+            return growth
+
+    def diff(self, limit:int = 10):
+        """
+        Source lines whose traced memory changed most since the previous diff, the first call only sets the baseline
+        """
+        snapshot = self.take_snapshot()
+        previous, self.snapshot = self.snapshot, snapshot
+        if previous is None:
+            return []
+        return snapshot.compare_to(previous, 'lineno')[:limit]
+
+    def top(self, limit:int = 10):
+        return self.take_snapshot().statistics('lineno')[:limit]
+
+    def report(self):
+        """
+        Process and tracing figures for the mem command
+        """
+        commands = self.command_handler.commands.values()
+        loaded = sum(type(command).__module__.startswith(PLUGINS_PACKAGE + '.') for command in commands)
+        result = {'rss': rss_bytes(), 'tracing': tracemalloc.is_tracing(), 'plugins_loaded': loaded,
+                  'plugins_unloaded': self.unloaded, 'checks': self.checks}
+        if tracemalloc.is_tracing():
+            result['traced'], result['traced_peak'] = tracemalloc.get_traced_memory()
+            result['plugins'] = dict(sorted(attribute(self.take_snapshot(), self.plugin_path).items(), key=lambda item: -item[1][0]))
+        return result
@@ -0,0 +1,98 @@
+#pluggable numeric backends for the arithmetic plugins, selected with NUMERIC_BACKEND. decimal and fractions
+#are imported by the backends using them, the float default starts without them
+import logging
+import operator
+
+class FloatBackend:
+    """
+    Binary floating point, the fastest backend and the default
+    """
+    name = 'float'
+    key = 'float' #identifies the backend and its settings in result cache keys
+    add = staticmethod(operator.add)
+    sub = staticmethod(operator.sub)
+    multiply = staticmethod(operator.mul)
+    divide = staticmethod(operator.truediv)
+
+    def parse(self, value):
+        return float(value)
+
+class DecimalBackend:
+    """
+    decimal.Decimal with its own context, every operation rounds to the configured precision
+    """
+    name = 'decimal'
+
+    def __init__(self, precision:int = 28, rounding:str = 'ROUND_HALF_EVEN'):
+        import decimal
+        self.invalid = (decimal.InvalidOperation, TypeError)
+        try:
+            self.context = decimal.Context(prec=precision, rounding=rounding)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Invalid decimal context: precision={precision} rounding={rounding}") from e
+        self.key = ('decimal', precision, rounding)
+        self.add = self.context.add
+        self.sub = self.context.subtract
+        self.multiply = self.context.multiply
+        self.divide = self.context.divide
+
+    def parse(self, value):
+        """
+        Floats are converted through their shortest repr so 0.1 becomes Decimal('0.1')
+        """
+        if isinstance(value, float):
+            value = repr(value)
+        try:
+            return self.context.create_decimal(value)
+        except self.invalid as e:
+            raise ValueError(f"could not convert to decimal: {value!r}") from e
+
+class FractionBackend:
+    """
+    Exact rational arithmetic with fractions.Fraction
+    """
+    name = 'fraction'
+    key = 'fraction'
+    add = staticmethod(operator.add)
+    sub = staticmethod(operator.sub)
+    multiply = staticmethod(operator.mul)
+    divide = staticmethod(operator.truediv)
+
+    def __init__(self):
+        from fractions import Fraction
+        self.fraction = Fraction
+
+    def parse(self, value):
+        if isinstance(value, float):
+            value = repr(value)
+        try:
+            return self.fraction(value)
+        except TypeError as e:
+            raise ValueError(f"could not convert to fraction: {value!r}") from e
+
+BACKENDS = {'float': FloatBackend, 'decimal': DecimalBackend, 'fraction': FractionBackend}
+
+_backend = FloatBackend()
+
+def get_backend():
+    """
+    The backend the arithmetic plugins currently compute with
+    """
+    return _backend
+
+def set_backend(name:str = 'float', **options):
+    """
+    Switch every arithmetic plugin to another backend, options are passed to its constructor
+    (precision and rounding for decimal)
+    """
+    global _backend
+    try:
+        backend_class = BACKENDS[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown numeric backend: {name}, expected one of {', '.join(BACKENDS)}") from None
+    _backend = backend_class(**options)
+    logging.info("Numeric backend: %s %s", _backend.name, options or '')
+    return _backend
+
+def parse(value):
+    return _backend.parse(value)
@@ -0,0 +1,210 @@
+#output sinks: commands write through the sink of their CommandHandler instead of print(), so output to a
+#file or pipe is written in blocks rather than one write and flush per result
+import io
+import logging
+import select
+import struct
+import sys
+import threading
+
+FORMATS = ('text', 'csv', 'jsonl', 'binary')
+DOUBLE = struct.Struct('<d') #binary sink: one little-endian float64 per result, NaN for errors and non-numbers
+
+class ThreadState(threading.local):
+    refuse_input = False #set by refuse_input() on the threads serving requests
+    capture = None #list collecting the text written on this thread, see capture_output
+
+local = ThreadState()
+
+def refuse_input():
+    """
+    Make read() raise EOFError on the calling thread instead of prompting, for threads that serve
+    requests without a user to answer (the command server's workers)
+    """
+    local.refuse_input = True
+
+def capture_output(func, *args):
+    """
+    Call func with the text every sink would write on this thread collected instead, returns (result, text).
+    The command server answers each request with what its command wrote
+    """
+    local.capture = collected = []
+    try:
+        return func(*args), ''.join(collected)
+    finally:
+        local.capture = None
+
+def input_ready():
+    """
+    True when reading stdin cannot wait on another process, False when it might or we cannot tell
+    """
+    stdin = sys.stdin
+    if isinstance(stdin, io.StringIO): #a scripted stdin, checked first as fileno() raises
+        return True
+    try:
+        fileno = stdin.fileno()
+    except (AttributeError, OSError, ValueError): #in memory or captured, nothing to wait for
+        return True
+    try:
+        return bool(select.select([fileno], [], [], 0)[0])
+    except (OSError, ValueError): #pipes on Windows
+        return False
+
+class TextSink:
+    """
+    Human readable output, what print() used to write. With flush_size 0 every write goes straight to
+    the stream (the interactive REPL), otherwise writes are joined in memory and written once flush_size
+    characters are pending, or by a timer flush_interval seconds after the first pending write.
+    An unbuffered sink writes to the sys.stdout of the moment like print(), a buffered one to the
+    sys.stdout it was created with, so a redirection or capture active then also receives its flushes.
+    """
+    empty = ''
+    records = False #record() writes nothing, dispatch skips calling it
+
+    def __init__(self, stream=None, flush_size:int = 0, flush_interval:float = 1.0):
+        self.flush_size = flush_size
+        self.interactive = flush_size <= 0 #every write goes straight to the stream
+        self.stream = stream if stream is not None or flush_size <= 0 else self.default_stream()
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.pending = 0
+        self.flushes = 0
+        self.timer = None #threading.Timer flushing the pending output flush_interval after it was buffered
+        self.lock = threading.Lock() #commands dispatched from several threads share the sink
+
+    def default_stream(self):
+        return sys.stdout
+
+    def target(self):
+        return self.stream if self.stream is not None else self.default_stream()
+
+    def write(self, *parts, sep:str = ' ', end:str = '\n'):
+        """
+        print() replacement for command output
+        """
+        text = (parts[0] if len(parts) == 1 and type(parts[0]) is str else sep.join(map(str, parts))) + end #most writes are one f-string
+        capture = local.capture
+        if capture is not None:
+            capture.append(text)
+            return
+        self.emit(text)
+
+    def emit(self, data):
+        if self.interactive:
+            self.target().write(data)
+            return
+        with self.lock:
+            self.buffer.append(data)
+            self.pending += len(data)
+            if self.pending >= self.flush_size or self.flush_interval <= 0:
+                self.flush_locked()
+            elif self.timer is None: #the timer bounds the wait to flush_interval, no clock read per write
+                self.timer = threading.Timer(self.flush_interval, self.flush_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush_timer(self):
+        with self.lock:
+            self.timer = None
+            try:
+                self.flush_locked()
+            except (OSError, ValueError) as e: #the stream was closed meanwhile
+                logging.warning(f'Could not flush the output: {e}')
+
+    def record(self, command_name, operands, result, error=None):
+        """
+        Structured result of one dispatched command, the text sink already has the command's own output
+        """
+
+    def read(self, prompt:str = ''):
+        """
+        input() replacement: the prompt is buffered with the rest of the output. When no input line is
+        waiting the buffer is flushed first, a process driving the REPL over pipes needs the last result
+        and the prompt before it answers, while a script piped in keeps its output batched.
+        """
+        if local.refuse_input:
+            raise EOFError(f"no input on this thread: {prompt.strip()}")
+        if self.interactive:
+            return input(prompt)
+        self.write(prompt, end='')
+        if not input_ready():
+            self.flush()
+        return input('')
+
+    def flush(self):
+        with self.lock:
+            self.flush_locked()
+
+    def flush_locked(self):
+        if self.buffer:
+            target = self.target()
+            target.write(self.empty.join(self.buffer))
+            target.flush()
+            self.buffer.clear()
+            self.pending = 0
+            self.flushes += 1
+
+    def close(self):
+        timer = self.timer
+        if timer is not None:
+            timer.cancel()
+        try:
+            self.flush()
+        except (OSError, ValueError) as e: #the stream was closed first, e.g. a pipe reader that went away
+            logging.warning(f'Could not flush the output: {e}')
+
+class RecordSink(TextSink):
+    """
+    One csv or jsonl line per dispatched command, laid out like the batch output. The commands' own
+    text, prompts included, is left out so the stream only holds records.
+    """
+    records = True
+    def __init__(self, stream=None, fmt:str = 'jsonl', flush_size:int = 65536, flush_interval:float = 1.0):
+        super().__init__(stream, flush_size, flush_interval)
+        self.fmt = fmt
+
+    def write(self, *parts, sep:str = ' ', end:str = '\n'):
+        capture = local.capture
+        if capture is not None: #the text is left out of the records, not out of a capture
+            capture.append(sep.join(map(str, parts)) + end)
+
+    def record(self, command_name, operands, result, error=None):
+        from app.batch import format_record
+        self.emit(format_record({'command': command_name, 'operands': list(operands), 'result': result, 'error': error}, self.fmt) + '\n')
+
+class BinarySink(RecordSink):
+    """
+    Packed float64 results, readable with numpy.fromfile(path, '<f8') or array('d')
+    """
+    empty = b''
+
+    def __init__(self, stream=None, flush_size:int = 65536, flush_interval:float = 1.0):
+        super().__init__(stream, 'binary', flush_size, flush_interval)
+
+    def default_stream(self):
+        return sys.stdout.buffer
+
+    def record(self, command_name, operands, result, error=None):
+        try:
+            value = float('nan') if error is not None or isinstance(result, (str, bool)) else float(result)
+        except (TypeError, ValueError):
+            value = float('nan')
+        self.emit(DOUBLE.pack(value))
+
+STDOUT = TextSink() #unbuffered default, behaves exactly like print()
+
+def create_sink(fmt:str = 'text', stream=None, flush_size:int = 65536, flush_interval:float = 1.0):
+    """
+    Build the sink for an output format, text written to a terminal stays unbuffered
+    """
+    if fmt == 'text':
+        target = stream if stream is not None else sys.stdout
+        isatty = getattr(target, 'isatty', None)
+        if isatty is not None and isatty():
+            return STDOUT if stream is None else TextSink(stream)
+        return TextSink(stream, flush_size, flush_interval)
+    if fmt == 'binary':
+        return BinarySink(stream, flush_size, flush_interval)
+    if fmt in FORMATS:
+        return RecordSink(stream, fmt, flush_size, flush_interval)
+    raise ValueError(f"Unknown output format: {fmt}")
@@ -0,0 +1,111 @@
+#process and thread pool executors that fan batches of commands out over every core
+import itertools
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from app import batch
+
+_command_handler = None #the command handler used inside worker processes
+
+def _init_worker():
+    """
+    Worker initializer, forked workers inherit the parent's command handler while spawned
+    workers build their own App and load the same plugins
+    """
+    global _command_handler
+    if _command_handler is None:
+        from app import App #imported here, app imports this module
+        app = App()
+        app.load_plugins()
+        _command_handler = app.command_handler
+
+def _run_chunk(lines, fmt):
+    """
+    Execute one chunk of record lines inside a worker, errors are captured per record
+    """
+    return [batch.execute_record(_command_handler, line, fmt) for line in lines]
+
+def chunked(iterable, size:int):
+    """
+    Split an iterable into lists of at most size items without reading ahead
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class ParallelExecutor:
+    """
+    Runs batch records across a ProcessPoolExecutor, results are yielded in input order
+    and only a bounded number of chunks is in flight so memory stays flat
+    """
+    def __init__(self, command_handler, workers:int = None, chunk_size:int = 1000):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.command_handler = command_handler
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def run(self, lines, fmt:str = 'text'):
+        """
+        Generator over the result records for lines, in the same order
+        """
+        global _command_handler
+        _command_handler = self.command_handler #inherited by workers started with fork
+        max_pending = self.workers * 2
+        logging.info(f'Parallel batch: {self.workers} workers, chunks of {self.chunk_size}')
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as pool:
+            pending = deque()
+            for chunk in chunked(lines, self.chunk_size):
+                pending.append(pool.submit(_run_chunk, chunk, fmt))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def run_batch(self, stream, fmt:str = 'text'):
+        """
+        Parallel counterpart of app.batch.run_batch
+        """
+        return self.run(batch.iter_lines(stream, fmt), fmt)
+
+class ThreadedExecutor:
+    """
+    Runs batch records on a ThreadPoolExecutor sharing one CommandHandler, results are yielded in input order.
+    Commands declared thread_safe run concurrently, truly in parallel on a free-threaded build with the GIL
+    disabled, any other command is serialized by a lock of its own.
+    """
+    def __init__(self, command_handler, workers:int = None, chunk_size:int = 1000):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.command_handler = command_handler
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def run_chunk(self, lines, fmt:str):
+        return [batch.execute_record(self.command_handler, line, fmt) for line in lines]
+
+    def run(self, lines, fmt:str = 'text'):
+        """
+        Generator over the result records for lines, in the same order
+        """
+        self.command_handler.enable_threads()
+        max_pending = self.workers * 2
+        logging.info(f'Threaded batch: {self.workers} threads, chunks of {self.chunk_size}')
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='dispatch') as pool:
+            pending = deque()
+            for chunk in chunked(lines, self.chunk_size):
+                pending.append(pool.submit(self.run_chunk, chunk, fmt))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    def run_batch(self, stream, fmt:str = 'text'):
+        """
+        Threaded counterpart of app.batch.run_batch
+        """
+        return self.run(batch.iter_lines(stream, fmt), fmt)
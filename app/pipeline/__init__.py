@@ -0,0 +1,131 @@
+#command pipelines such as 'add 2 3 | multiply _ 4 | divide _ 2', compiled once into stages that hand values to each other
+import collections
+from app import numeric
+
+SEPARATOR = '|'
+PLACEHOLDER = '_' #the previous stage's result, in the first stage the next pipeline input
+
+#outcome of one pass through the pipeline, inputs are the values bound to the first stage's placeholders
+Result = collections.namedtuple('Result', 'inputs value error')
+
+class Stage:
+    """
+    One command of a pipeline with its constant operands parsed up front. A stage after the first
+    that does not mention _ receives the previous result as its first operand.
+    """
+    __slots__ = ('command_name', 'command', 'calculate', 'texts', 'slots', 'constants', 'backend')
+
+    def __init__(self, command_handler, text:str, first:bool):
+        tokens = text.split()
+        if not tokens:
+            raise ValueError("Empty pipeline stage")
+        self.command_name = command_handler.get_command(tokens[0])[0]
+        self.texts = tuple(tokens[1:])
+        if not first and PLACEHOLDER not in self.texts:
+            self.texts = (PLACEHOLDER, *self.texts)
+        self.slots = tuple(index for index, token in enumerate(self.texts) if token == PLACEHOLDER)
+        self.bind(command_handler)
+        self.parse_constants()
+
+    def bind(self, command_handler):
+        """
+        Look the command up again, after a hot reload swapped it or a lazy command resolved itself
+        """
+        command = command_handler.commands[self.command_name]
+        calculate = getattr(command, 'calculate', None)
+        if calculate is None:
+            raise TypeError(f"Command '{self.command_name}' cannot be used in a pipeline")
+        self.command = command_handler.commands[self.command_name]
+        self.calculate = calculate
+
+    def parse_constants(self):
+        """
+        Parse the constant operands with the current numeric backend, placeholders are left as None
+        """
+        self.backend = numeric.get_backend()
+        self.constants = [None if token == PLACEHOLDER else self.backend.parse(token) for token in self.texts]
+
+    def apply(self, command_handler, values):
+        """
+        Fill the placeholders with values in order and run the command, through the result cache
+        and the metrics like any other dispatch
+        """
+        operands = list(self.constants)
+        for slot, value in zip(self.slots, values):
+            operands[slot] = value
+        operands = tuple(operands)
+        if command_handler.commands.get(self.command_name) is not self.command:
+            self.bind(command_handler)
+        if command_handler.metrics is not None:
+            return command_handler.metrics.measure(self.command_name, command_handler.calculate_operands, self.command_name, self.command, self.calculate, operands)
+        return command_handler.calculate_operands(self.command_name, self.command, self.calculate, operands)
+
+    def process(self, command_handler, stream, first:bool):
+        """
+        Streaming stage: consume [inputs, value, error] states and pass them on, a failed item skips the remaining stages
+        """
+        placeholders = len(self.slots)
+        for state in stream:
+            if state[2] is None:
+                try:
+                    state[1] = self.apply(command_handler, state[0] if first else (state[1],) * placeholders)
+                except (ArithmeticError, ValueError, TypeError) as e:
+                    state[1], state[2] = None, str(e)
+            yield state
+
+class Pipeline:
+    """
+    A compiled pipeline. run() evaluates it once and raises on errors, map() streams many inputs
+    through the stages and reports errors per item, neither re-parses any text.
+    """
+    def __init__(self, command_handler, text:str):
+        self.command_handler = command_handler
+        self.text = text.strip()
+        self.stages = [Stage(command_handler, part, index == 0) for index, part in enumerate(self.text.split(SEPARATOR))]
+        self.arity = len(self.stages[0].slots) #inputs consumed by the first stage
+
+    def refresh(self):
+        backend = numeric.get_backend()
+        for stage in self.stages:
+            if stage.backend is not backend:
+                stage.parse_constants()
+
+    def prepare(self, item):
+        """
+        Turn one map() item (a scalar for single input pipelines, else a sequence) into its input tuple
+        """
+        inputs = (item,) if self.arity == 1 and not isinstance(item, (tuple, list)) else tuple(item)
+        if len(inputs) != self.arity:
+            raise ValueError(f"Pipeline expects {self.arity} inputs, got {len(inputs)}")
+        return tuple(numeric.parse(value) if isinstance(value, str) else value for value in inputs)
+
+    def run(self, *inputs):
+        """
+        Evaluate the pipeline once and return the last stage's result
+        """
+        self.refresh()
+        value = inputs = self.prepare(inputs)
+        for index, stage in enumerate(self.stages):
+            value = stage.apply(self.command_handler, inputs if index == 0 else (value,) * len(stage.slots))
+        return value
+
+    def map(self, items):
+        """
+        Generator of Result tuples, one per item, items flow through every stage as they are consumed
+        """
+        self.refresh()
+        stream = self.states(items)
+        for index, stage in enumerate(self.stages):
+            stream = stage.process(self.command_handler, stream, index == 0)
+        for inputs, value, error in stream:
+            yield Result(inputs, value, error)
+
+    def states(self, items):
+        for item in items:
+            try:
+                yield [self.prepare(item), None, None]
+            except (ValueError, TypeError) as e:
+                yield [item, None, str(e)]
+
+    def __repr__(self):
+        return f"Pipeline({self.text!r})"
@@ -0,0 +1,126 @@
+#persistent plugin manifest so App can register commands without importing every plugin at startup
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from app.commands import Command
+
+INDEX_VERSION = 2
+
+def fingerprint(plugin_path:str):
+    """
+    Build a cheap fingerprint of the plugin directory from the mtime and size of every python file,
+    any added, removed or edited plugin changes it and invalidates the index
+    """
+    result = {}
+    with os.scandir(plugin_path) as entries:
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith(('_', '.')):
+                continue
+            files = []
+            with os.scandir(entry.path) as plugin_files:
+                for plugin_file in plugin_files:
+                    if plugin_file.name.endswith('.py'):
+                        stat = plugin_file.stat()
+                        files.append([plugin_file.name, stat.st_mtime_ns, stat.st_size])
+            if files:
+                result[entry.name] = sorted(files)
+    return result
+
+class PluginIndex:
+    """
+    Maps command names to the module and class that implement them, stored as json
+    """
+    def __init__(self, index_path:str, plugin_path:str):
+        self.index_path = index_path
+        self.plugin_path = plugin_path
+        self.plugins = {}
+
+    def load(self):
+        """
+        Load the index from disk, returns False when it is missing, unreadable or stale
+        """
+        try:
+            with open(self.index_path, encoding='utf-8') as index_file:
+                data = json.load(index_file)
+        except (OSError, ValueError):
+            logging.info(f'Plugin index not found or unreadable: {self.index_path}')
+            return False
+        if data.get('version') != INDEX_VERSION or data.get('fingerprint') != fingerprint(self.plugin_path):
+            logging.info('Plugin index is stale, rebuilding')
+            return False
+        self.plugins = data.get('plugins', {})
+        return True
+
+    def save(self, plugins:dict):
+        """
+        Write the index for the current state of the plugin directory
+        """
+        self.plugins = plugins
+        data = {'version': INDEX_VERSION, 'fingerprint': fingerprint(self.plugin_path), 'plugins': plugins}
+        try:
+            with open(self.index_path, 'w', encoding='utf-8') as index_file:
+                json.dump(data, index_file, indent=1)
+            logging.info(f'Plugin index written: {self.index_path}')
+        except OSError as e:
+            logging.warning(f'Could not write plugin index {self.index_path}: {e}')
+
+class LazyCommand(Command):
+    """
+    Placeholder registered from the index, the plugin module is imported the first time
+    the command is dispatched and the real command then replaces the placeholder
+    """
+    __slots__ = ('command_handler', 'command_name', 'module', 'class_name', 'needs_handler', 'aliases', 'command', 'lock')
+
+    def __init__(self, command_handler, command_name:str, module:str, class_name:str, needs_handler:bool = False, aliases=()):
+        self.command_handler = command_handler
+        self.command_name = command_name
+        self.module = module
+        self.class_name = class_name
+        self.needs_handler = needs_handler
+        self.aliases = tuple(aliases) #kept in the index so dispatching by alias does not import the plugin
+        self.command = None
+        self.lock = threading.Lock() #threads dispatching the placeholder at once import and build the command once
+
+    def resolve(self):
+        """
+        Import the plugin and swap the real command into the command handler
+        """
+        if self.command is not None:
+            return self.command
+        with self.lock:
+            if self.command is not None:
+                return self.command
+            start = time.perf_counter()
+            command_class = getattr(importlib.import_module(self.module), self.class_name)
+            metrics = getattr(self.command_handler, 'metrics', None)
+            if metrics is not None:
+                metrics.record_import(self.command_name, time.perf_counter() - start)
+            self.command = command_class(self.command_handler) if self.needs_handler else command_class()
+            if self.command_handler.commands.get(self.command_name) is self:
+                self.command_handler.register_command(self.command_name, self.command)
+            logging.debug(f'Lazily imported command: {self.class_name} from {self.module}')
+        return self.command
+
+    def execute(self, *args):
+        return self.resolve().execute(*args)
+
+    @property
+    def pure(self):
+        return getattr(self.resolve(), 'pure', False)
+
+    @property
+    def takes_arguments(self):
+        return getattr(self.resolve(), 'takes_arguments', False)
+
+    @property
+    def thread_safe(self):
+        return getattr(self.resolve(), 'thread_safe', False)
+
+    def __getattr__(self, name):
+        #only reached for attributes the placeholder does not have, e.g. calculate
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
@@ -0,0 +1,22 @@
+#shows the result cache counters at runtime
+from app.commands import Command
+import logging
+class CacheCommand(Command):
+    __slots__ = ('command_handler',)
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self):
+        """
+        This method prints the result cache statistics
+        """
+        cache = self.command_handler.cache
+        if cache is None:
+            self.output.write("Result cache is disabled, set CACHE_SIZE to enable it")
+            return None
+        stats = cache.stats()
+        self.output.write("Result Cache:")
+        for name, value in stats.items():
+            self.output.write(f"-{name}: {value}")
+        logging.info("Cache Command Executed")
+        return stats
@@ -1,28 +1,53 @@
 from app.commands import Command
+from app.commands.operands import OperandSpec
+from app import vectorized
+from app import numeric
 import logging
-def get_float (prompt):
-    """
-    Helper function to get valid value from float"""
-    while True:
-        try:
-            value = float(input(prompt))
-            logging.info(f"Value entered: {value}")
-            return value
-        except ValueError:
-            logging.warning("Invalid Value. Please Try Again.")
-            print("Invalid Value. Please Try Again.")
-
 class DivideCommand(Command):
-    def execute(self):
+    __slots__ = ()
+    pure = True
+    thread_safe = True
+    takes_arguments = True
+    aliases = ('div',)
+    operand_spec = OperandSpec("divide", "Enter first number(float): ", "Enter second number(float): ")
+
+    def execute(self, *operands):
         """ 
-        This method executes the Divide command
+        This method executes the Divide command, operands typed after the name (divide 2 3) skip the prompts,
+        a bulk file given as @path is computed row by row
         """
         logging.info("Executing Divide Command")
-        a = get_float("Enter first number(float): ")
-        b = get_float("Enter second number(float): ")
+        if self.operand_spec.is_bulk(operands):
+            return self.operand_spec.execute_bulk(self, operands[0])
+        a, b = self.operand_spec.acquire(operands, self.output)
+        return self.execute_operands(a, b, self.calculate)
+
+    def execute_operands(self, a, b, calculate):
+        """
+        This method calculates with acquired operands and prints the result, the CommandHandler passes
+        a calculate going through its result cache for operands typed inline
+        """
+        try:
+            result = calculate(a, b)
+        except ZeroDivisionError as e:
+            self.output.write(e)
+            return None
+        self.output.write(f"Result: {a} / {b} = {result}")
+        return result
+
+    def calculate(self, a, b):
+        """
+        This method divides two operands without prompting for them
+        """
         if b == 0:
-            print("Cannot divide by zero")
-            return
-        result = a / b
-        logging.info(f"Division Performed: {a} / {b} = {result}")        
-        print(f"Result: {a} / {b} = {a / b}")
+            raise ZeroDivisionError("Cannot divide by zero")
+        result = numeric.get_backend().divide(a, b)
+        logging.info("Division Performed: %s / %s = %s", a, b, result)
+        return result
+
+    def calculate_array(self, a, b):
+        """
+        This method divides two operand arrays element-wise in a single call,
+        divide by zero is handled per element by masking the result
+        """
+        return vectorized.divide(a, b)
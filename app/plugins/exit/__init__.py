@@ -2,12 +2,15 @@ import sys
 import logging
 from app.commands import Command
 class ExitCommand(Command):
+    __slots__ = ()
+    aliases = ('quit',)
+
     def execute(self):
         """
         This method executes the exit command
         """
         logging.info("Exiting the program...")
-        print("Exiting the program...")
+        self.output.write("Exiting the program...")
         sys.exit("Exiting the program...")
         raise SystemExit("Exiting the program...")
 
@@ -0,0 +1,30 @@
+#evaluate a whole arithmetic expression such as (a+b)*c/d in one command
+from app.commands import Command
+from app.commands.operands import get_float
+from app.expression import ExpressionEngine
+import logging
+class ExprCommand(Command):
+    __slots__ = ('command_handler', 'engine')
+    takes_arguments = True
+    thread_safe = True #the engine's compile cache is locked
+
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+        self.engine = ExpressionEngine(command_handler)
+
+    def execute(self, *args):
+        """
+        This method executes the expr command, the expression is taken from the arguments or prompted for
+        and a value is prompted for every variable in it
+        """
+        text = " ".join(args) if args else self.output.read("Enter expression: ")
+        try:
+            expression = self.engine.compile(text)
+            bindings = {name: get_float(f"Enter value for {name}: ", self.output) for name in expression.variables}
+            result = expression.evaluate(bindings)
+        except (ValueError, ArithmeticError) as e:
+            logging.warning("Expression failed: %s: %s", text, e)
+            self.output.write(e)
+            return None
+        self.output.write(f"Result: {expression.text} = {result}")
+        return result
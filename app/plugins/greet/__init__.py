@@ -1,9 +1,13 @@
 from app.commands import Command
 import logging
 class GreetCommand(Command):
+    __slots__ = ()
+    thread_safe = True
+
     def execute(self):
         """
         This method executes the greet command
         """
         logging.info("Executing Greet Command")
-        print("Hello World!")
+        self.output.write("Hello World!")
+        return "Hello World!"
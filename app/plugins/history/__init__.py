@@ -0,0 +1,41 @@
+#shows the session journal, enabled with JOURNAL=true
+from app.commands import Command
+from app.journal import JournalReader
+import logging
+import time
+class HistoryCommand(Command):
+    __slots__ = ('command_handler',)
+    takes_arguments = True
+
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self, *args):
+        """
+        This method prints the last commands from the journal, 'history N' the last N and
+        'history stats' the calls and errors per command over the whole journal
+        """
+        journal = self.command_handler.journal
+        if journal is None:
+            self.output.write("Session journal is disabled, set JOURNAL=true to enable it")
+            return None
+        journal.flush()
+        reader = JournalReader(journal.path)
+        if args and args[0] == 'stats':
+            summary = reader.aggregate()
+            self.output.write(f"{'command':<12}{'calls':>8}{'errors':>8}  last used")
+            for name, stats in sorted(summary.items()):
+                self.output.write(f"{name:<12}{stats['calls']:>8}{stats['errors']:>8}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats['last']))}")
+            logging.info("History Command Executed")
+            return summary
+        try:
+            count = int(args[0]) if args else 10
+        except ValueError:
+            self.output.write("Usage: history [N|stats]")
+            return None
+        entries = reader.tail(count)
+        for entry in entries:
+            outcome = f"Error: {entry.error}" if entry.error is not None else entry.result
+            self.output.write(f"{time.strftime('%H:%M:%S', time.localtime(entry.timestamp))} {' '.join(str(part) for part in (entry.command, *entry.operands))} -> {outcome}")
+        logging.info("History Command Executed")
+        return entries
@@ -0,0 +1,8 @@
+#largest of the values, 'max 4 1 3' or 'max @values.txt'
+from app import aggregate
+class MaxCommand(aggregate.AggregateCommand):
+    __slots__ = ()
+    command_name = "max"
+
+    def new_accumulator(self):
+        return aggregate.Extreme(max)
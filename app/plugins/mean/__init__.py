@@ -0,0 +1,9 @@
+#arithmetic mean, 'mean 1 2 3' or 'mean @values.txt'
+from app import aggregate
+class MeanCommand(aggregate.AggregateCommand):
+    __slots__ = ()
+    command_name = "mean"
+    aliases = ('avg', 'average')
+
+    def new_accumulator(self):
+        return aggregate.Mean()
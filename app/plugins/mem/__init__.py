@@ -0,0 +1,73 @@
+#memory accounting of the running process, see app.memory
+from app.commands import Command
+import logging
+class MemCommand(Command):
+    __slots__ = ('command_handler',)
+    takes_arguments = True
+
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self, *args):
+        """
+        This method prints the resident and traced memory with the traced memory per plugin, 'mem start' and
+        'mem stop' switch tracemalloc, 'mem top N' and 'mem diff N' show the largest and the most changed source
+        lines, 'mem check' compares the plugins with the previous check and 'mem unload SECONDS' unloads idle plugins
+        """
+        from app import memory #tracemalloc and the accounting are only imported once mem is used
+        action = args[0] if args else None
+        try:
+            limit = int(args[1]) if len(args) > 1 else 10
+        except ValueError:
+            action = 'usage'
+        monitor = self.command_handler.memory
+        if action in ('start', 'check', 'unload') and monitor is None:
+            monitor = self.command_handler.memory = memory.MemoryMonitor(self.command_handler)
+        if action is None:
+            if monitor is None:
+                self.output.write(f"RSS: {memory.rss_bytes() / 1024:.0f} KiB, tracing is off, 'mem start' or MEMORY_TRACE=true turns it on")
+                return {'rss': memory.rss_bytes(), 'tracing': False}
+            report = monitor.report()
+            self.output.write(f"RSS: {report['rss'] / 1024:.0f} KiB, plugins loaded: {report['plugins_loaded']}, unloaded: {report['plugins_unloaded']}")
+            if report['tracing']:
+                self.output.write(f"Traced: {report['traced'] / 1024:.1f} KiB, peak {report['traced_peak'] / 1024:.1f} KiB")
+                for plugin, (size, count) in list(report['plugins'].items())[:limit]:
+                    self.output.write(f"-{plugin}: {size / 1024:.1f} KiB in {count} blocks")
+            logging.info("Mem Command Executed")
+            return report
+        if action == 'start' and len(args) == 1:
+            monitor.start()
+            self.output.write("Memory tracing started")
+            return True
+        if action == 'stop' and len(args) == 1 and monitor is not None:
+            monitor.stop()
+            self.output.write("Memory tracing stopped")
+            return False
+        if action == 'check' and len(args) == 1:
+            growth = monitor.check()
+            for item in growth:
+                self.output.write(f"-{item.plugin}: {item.size_diff / 1024:+.1f} KiB in {item.count_diff:+d} blocks")
+            self.output.write(f"{len(growth)} plugin(s) grew more than {monitor.growth_threshold / 1024:.0f} KiB" if monitor.tracing else "Tracing is off, only idle plugins were checked")
+            return growth
+        if action == 'unload' and len(args) <= 2:
+            try:
+                idle = float(args[1]) if len(args) > 1 else monitor.idle_unload
+            except ValueError:
+                idle = -1.0
+            if idle >= 0:
+                unloaded = memory.unload_idle(self.command_handler, idle)
+                monitor.unloaded += len(unloaded)
+                self.output.write(f"Unloaded: {', '.join(sorted(unloaded))}" if unloaded else "No idle plugins")
+                return unloaded
+        if action in ('top', 'diff') and len(args) <= 2 and monitor is not None and monitor.tracing:
+            statistics = monitor.top(limit) if action == 'top' else monitor.diff(limit)
+            if action == 'diff' and not statistics:
+                self.output.write("Baseline taken, run 'mem diff' again to see what changed")
+            for stat in statistics:
+                self.output.write(f"-{stat}")
+            return statistics
+        if action in ('top', 'diff', 'stop'):
+            self.output.write("Tracing is off, run 'mem start' first")
+            return None
+        self.output.write("Usage: mem [start|stop|top N|diff N|check|unload SECONDS]")
+        return None
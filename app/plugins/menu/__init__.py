@@ -2,6 +2,10 @@
 from app.commands import Command
 import logging
 class MenuCommand(Command):
+    __slots__ = ('command_handler',)
+    aliases = ('help',)
+    thread_safe = True #only reads the published command table
+
     def __init__(self, command_handler):
         self.command_handler = command_handler
 
@@ -9,8 +13,10 @@ class MenuCommand(Command):
         """
         This method executes the menu command
         """
-        print("Available Commands:")
+        self.output.write("Available Commands:")
         for command_name in self.command_handler.commands:
-            print(f"-{command_name}")
+            aliases = self.command_handler.dispatch.aliases(command_name)
+            self.output.write(f"-{command_name} ({', '.join(aliases)})" if aliases else f"-{command_name}")
         logging.info("Menu Command Executed")
+        return list(self.command_handler.commands)
 
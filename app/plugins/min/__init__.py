@@ -0,0 +1,8 @@
+#smallest of the values, 'min 4 1 3' or 'min @values.txt'
+from app import aggregate
+class MinCommand(aggregate.AggregateCommand):
+    __slots__ = ()
+    command_name = "min"
+
+    def new_accumulator(self):
+        return aggregate.Extreme(min)
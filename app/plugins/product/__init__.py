@@ -0,0 +1,9 @@
+#n-ary product, 'product 1 2 3' or 'product @values.txt'
+from app import aggregate
+class ProductCommand(aggregate.AggregateCommand):
+    __slots__ = ()
+    command_name = "product"
+    aliases = ('prod',)
+
+    def new_accumulator(self):
+        return aggregate.Product()
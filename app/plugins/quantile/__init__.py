@@ -0,0 +1,10 @@
+#approximate quantile in bounded memory, 'quantile 0.9 1 2 3' or 'quantile 0.5 @values.txt'
+from app import aggregate
+class QuantileCommand(aggregate.AggregateCommand):
+    __slots__ = ()
+    command_name = "quantile"
+    aliases = ('percentile',)
+    parameters = 1
+
+    def new_accumulator(self, q):
+        return aggregate.QuantileSketch(q)
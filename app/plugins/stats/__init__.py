@@ -0,0 +1,35 @@
+#per-command latency and throughput statistics, enabled with METRICS=true
+from app.commands import Command
+import logging
+class StatsCommand(Command):
+    __slots__ = ('command_handler',)
+    takes_arguments = True
+
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self, *args):
+        """
+        This method prints the command statistics, 'stats json PATH' or 'stats prometheus PATH' exports them
+        """
+        metrics = self.command_handler.metrics
+        if metrics is None:
+            self.output.write("Instrumentation is disabled, set METRICS=true to enable it")
+            return None
+        if args:
+            if len(args) != 2:
+                self.output.write("Usage: stats [json|prometheus PATH]")
+                return None
+            path = metrics.export(args[1], args[0])
+            self.output.write(f"Stats exported to {path}")
+            logging.info("Stats exported to %s", path)
+            return path
+        snapshot = metrics.snapshot()
+        self.output.write(f"{'command':<12}{'calls':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, summary in sorted(snapshot['commands'].items()):
+            self.output.write(f"{name:<12}{summary['calls']:>8}{summary['errors']:>8}"
+                  f"{summary['p50_seconds'] * 1000:>10.3f}{summary['p95_seconds'] * 1000:>10.3f}{summary['p99_seconds'] * 1000:>10.3f}")
+        for name, seconds in sorted(snapshot['plugin_import_seconds'].items()):
+            self.output.write(f"-import {name}: {seconds * 1000:.3f} ms")
+        logging.info("Stats Command Executed")
+        return snapshot
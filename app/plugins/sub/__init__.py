@@ -1,26 +1,47 @@
 from app.commands import Command
+from app.commands.operands import OperandSpec
+from app import vectorized
+from app import numeric
 import logging
-def get_float (prompt):
-    """
-    Helper function to get valid value from float"""
-    while True:
-        try:
-            value = float(input(prompt))
-            logging.info(f"Value entered: {value}")
-            return value
-        except ValueError:
-            logging.warning("Invalid Value. Please Try Again.")
-            print("Invalid Value. Please Try Again.")
-
 class SubCommand(Command):
-    def execute(self):
+    __slots__ = ()
+    pure = True
+    thread_safe = True
+    takes_arguments = True
+    aliases = ('subtract', 'minus')
+    operand_spec = OperandSpec("sub", "Enter first number: ", "Enter second number: ")
+
+    def execute(self, *operands):
         """ 
-        This method executes the sub command
+        This method executes the sub command, operands typed after the name (sub 2 3) skip the prompts,
+        a bulk file given as @path is computed row by row
         """
         logging.info("Executing Sub Command")
-        a = get_float("Enter first number: ")
-        b = get_float("Enter second number: ")
-        result = a - b
-        logging.info(f"Subtraction Performed: {a} - {b} = {result}")
-        print(f"Result: {a} - {b} = {a - b}")
+        if self.operand_spec.is_bulk(operands):
+            return self.operand_spec.execute_bulk(self, operands[0])
+        a, b = self.operand_spec.acquire(operands, self.output)
+        return self.execute_operands(a, b, self.calculate)
+
+    def execute_operands(self, a, b, calculate):
+        """
+        This method calculates with acquired operands and prints the result, the CommandHandler passes
+        a calculate going through its result cache for operands typed inline
+        """
+        result = calculate(a, b)
+        self.output.write(f"Result: {a} - {b} = {result}")
+        return result
 
+    def calculate(self, a, b):
+        """
+        This method subtracts two operands without prompting for them
+        """
+        result = numeric.get_backend().sub(a, b)
+        logging.info("Subtraction Performed: %s - %s = %s", a, b, result)
+        return result
+
+    def calculate_array(self, a, b):
+        """
+        This method subtracts two operand arrays element-wise in a single call
+        """
+        a, b = vectorized.as_arrays(a, b)
+        return vectorized.get_numpy().subtract(a, b)
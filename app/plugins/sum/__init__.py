@@ -0,0 +1,9 @@
+#exact n-ary sum, 'sum 1 2 3' or 'sum @values.txt'
+from app import aggregate
+class SumCommand(aggregate.AggregateCommand):
+    __slots__ = ()
+    command_name = "sum"
+    aliases = ('total',)
+
+    def new_accumulator(self):
+        return aggregate.Sum()
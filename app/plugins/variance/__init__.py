@@ -0,0 +1,9 @@
+#sample variance, 'variance 1 2 3' or 'variance @values.txt'
+from app import aggregate
+class VarianceCommand(aggregate.AggregateCommand):
+    __slots__ = ()
+    command_name = "variance"
+    aliases = ('var',)
+
+    def new_accumulator(self):
+        return aggregate.Variance()
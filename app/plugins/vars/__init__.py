@@ -0,0 +1,57 @@
+#lists and manages the variables defined with 'x = add a b'
+from app.commands import Command
+import logging
+class VarsCommand(Command):
+    __slots__ = ('command_handler',)
+    takes_arguments = True
+
+    def __init__(self, command_handler):
+        self.command_handler = command_handler
+
+    def execute(self, *args):
+        """
+        This method prints every variable with its value and formula, 'vars NAME' one variable with what it
+        uses and what uses it, 'vars del NAME' removes one, 'vars stats' the recompute counters, 'vars save' saves now
+        """
+        variables = self.command_handler.get_variables()
+        if not args:
+            for variable in variables.variables.values():
+                self.output.write(self.describe(variable))
+            logging.info("Vars Command Executed")
+            return {name: variable.value for name, variable in variables.variables.items()}
+        if args[0] == 'stats' and len(args) == 1:
+            stats = variables.stats()
+            self.output.write("Variables:")
+            for name, value in stats.items():
+                self.output.write(f"-{name}: {value}")
+            return stats
+        if args[0] == 'save' and len(args) == 1:
+            if not variables.save():
+                self.output.write("Variables are not saved, set VARIABLES_PATH to a file")
+                return None
+            self.output.write(f"Variables saved to {variables.path}")
+            return variables.path
+        if args[0] == 'del' and len(args) == 2:
+            try:
+                variable = variables.delete(args[1])
+            except KeyError:
+                self.output.write(f"Variable '{args[1]}' not defined")
+                return None
+            self.output.write(f"Deleted {args[1]}")
+            logging.info("Variable deleted: %s", args[1])
+            return variable.value
+        if len(args) == 1 and args[0] in variables:
+            variable = variables.variables[args[0]]
+            self.output.write(self.describe(variable))
+            if variable.dependencies:
+                self.output.write(f"-uses: {', '.join(variable.dependencies)}")
+            users = sorted(variables.dependents.get(variable.name, ()))
+            if users:
+                self.output.write(f"-used by: {', '.join(users)}")
+            return variable.value
+        self.output.write("Usage: vars [NAME|del NAME|stats|save]")
+        return None
+
+    def describe(self, variable):
+        value = variable.value if variable.error is None else f"Error: {variable.error}"
+        return f"{variable.name} = {value}" if variable.is_input else f"{variable.name} = {value}  [{variable.text}]"
@@ -0,0 +1,138 @@
+#hot reload of changed plugin packages without restarting the process
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from app.plugin_index import fingerprint
+
+class PluginReloader:
+    """
+    Polls the plugin directory fingerprint and re-imports only the plugin packages that changed.
+    The new command is built completely before it replaces the old one in the command handler with a
+    single assignment, so a command that is already running finishes on the old instance and a plugin
+    that fails to import or has no command keeps its previous version. Sandboxed plugins are left to
+    their worker processes and only picked up by a restart.
+    """
+    def __init__(self, app, interval:float = 1.0):
+        self.app = app
+        self.interval = interval
+        self.snapshot = fingerprint(app.plugin_path)
+        self.last_check = time.monotonic()
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.reloads = 0
+        self.last_reload_seconds = None
+
+    def poll(self):
+        """
+        Check for changes if at least interval seconds passed since the last check, cheap enough to call per command
+        """
+        if time.monotonic() - self.last_check < self.interval:
+            return None
+        return self.check()
+
+    def check(self):
+        """
+        Compare the plugin directory with the last snapshot and apply the differences
+        """
+        self.last_check = time.monotonic()
+        current = fingerprint(self.app.plugin_path)
+        if current == self.snapshot:
+            return None
+        changes = {'added': [], 'reloaded': [], 'removed': [], 'failed': [], 'skipped': []}
+        for plugin_name in sorted(set(self.snapshot) - set(current)):
+            if plugin_name in self.app.sandboxed:
+                changes['skipped'].append(plugin_name)
+                continue
+            self.remove_plugin(plugin_name)
+            changes['removed'].append(plugin_name)
+        for plugin_name in sorted(current):
+            if current[plugin_name] == self.snapshot.get(plugin_name):
+                continue
+            if plugin_name in self.app.sandboxed: #importing it here would run it outside the sandbox
+                changes['skipped'].append(plugin_name)
+            elif self.reload_plugin(plugin_name):
+                changes['reloaded' if plugin_name in self.snapshot else 'added'].append(plugin_name)
+            else:
+                changes['failed'].append(plugin_name)
+        if changes['skipped']:
+            logging.warning("Sandboxed plugins changed, restart to load them: %s", ', '.join(changes['skipped']))
+        self.snapshot = current
+        return changes
+
+    def module_names(self, plugin_name:str):
+        module_name = f'{self.app.plugins_package}.{plugin_name}'
+        return [name for name in sys.modules if name == module_name or name.startswith(module_name + '.')]
+
+    def remove_plugin(self, plugin_name:str):
+        self.app.command_handler.unregister_command(plugin_name)
+        for name in self.module_names(plugin_name):
+            del sys.modules[name]
+        logging.info("Plugin removed: %s", plugin_name)
+
+    def discard_bytecode(self, plugin_name:str):
+        """
+        Remove cached bytecode, pyc files only record the source mtime in whole seconds
+        so an edit within the same second could otherwise load the stale version
+        """
+        plugin_dir = os.path.join(self.app.plugin_path, plugin_name)
+        for file_name in os.listdir(plugin_dir):
+            if file_name.endswith('.py'):
+                try:
+                    os.remove(importlib.util.cache_from_source(os.path.join(plugin_dir, file_name)))
+                except OSError:
+                    pass
+        importlib.invalidate_caches()
+
+    def reload_plugin(self, plugin_name:str):
+        """
+        Import a fresh copy of one plugin package and swap its command in, returns False on failure
+        """
+        start = time.perf_counter()
+        self.discard_bytecode(plugin_name)
+        old_modules = {name: sys.modules.pop(name) for name in self.module_names(plugin_name)}
+        try:
+            plugin_module = importlib.import_module(f'{self.app.plugins_package}.{plugin_name}')
+            command, _ = self.app.build_plugin_command(plugin_name, plugin_module)
+            if command is None:
+                raise ImportError(f'no command found in plugin {plugin_name}')
+        except Exception as e:
+            for name in self.module_names(plugin_name):
+                del sys.modules[name]
+            sys.modules.update(old_modules)
+            logging.error("Failed to reload plugin: %s: %s", plugin_name, e)
+            return False
+        handler = self.app.command_handler
+        handler.register_command(plugin_name, command)
+        if handler.cache is not None:
+            handler.cache.clear() #memoized results may come from the old implementation
+        self.reloads += 1
+        self.last_reload_seconds = time.perf_counter() - start
+        logging.info("Plugin reloaded: %s in %.2f ms", plugin_name, self.last_reload_seconds * 1000)
+        return True
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                logging.error("Plugin reload check failed: %s", e)
+
+    def start(self):
+        """
+        Watch the plugin directory from a background daemon thread
+        """
+        if self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run, name='plugin-reloader', daemon=True)
+            self.thread.start()
+        return self.thread
+
+    def stop(self):
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
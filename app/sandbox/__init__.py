@@ -0,0 +1,257 @@
+#runs designated plugins in a pool of warm worker processes so a plugin that blocks, leaks or exits
+#cannot take the REPL down, requests and responses use a compact struct packed binary protocol
+import builtins
+import contextlib
+import importlib
+import io
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+from app.codec import COUNT, encode_value, decode_value
+from app.commands import Command, CommandHandler
+
+CALL, SHUTDOWN = 1, 2 #request opcodes
+EXECUTE, CALCULATE = 0, 1 #call modes
+OK, ERROR = 0, 1 #response status
+
+HEADER = struct.Struct('!BB') #opcode/status, mode
+
+class SandboxError(RuntimeError):
+    """
+    A sandboxed call failed in a way that has no builtin exception equivalent
+    """
+
+class SandboxTimeout(SandboxError):
+    """
+    A sandboxed call did not answer within the timeout, its worker has been replaced
+    """
+
+def encode_request(command_name:str, mode:int, args):
+    parts = [HEADER.pack(CALL, mode), encode_value(command_name), COUNT.pack(len(args))]
+    parts.extend(encode_value(arg) for arg in args)
+    return b''.join(parts)
+
+def decode_request(data):
+    opcode, mode = HEADER.unpack_from(data, 0)
+    if opcode != CALL:
+        return opcode, None, mode, ()
+    command_name, offset = decode_value(data, HEADER.size)
+    count = COUNT.unpack_from(data, offset)[0]
+    offset += COUNT.size
+    args = []
+    for _ in range(count):
+        value, offset = decode_value(data, offset)
+        args.append(value)
+    return opcode, command_name, mode, tuple(args)
+
+def encode_response(status:int, value, output:str = '', error_type:str = ''):
+    return HEADER.pack(status, 0) + encode_value(value) + encode_value(output) + encode_value(error_type)
+
+def decode_response(data):
+    status = HEADER.unpack_from(data, 0)[0]
+    value, offset = decode_value(data, HEADER.size)
+    output, offset = decode_value(data, offset)
+    error_type, _ = decode_value(data, offset)
+    return status, value, output, error_type
+
+def rebuild_error(error_type:str, message:str):
+    """
+    Re-create builtin exceptions such as ZeroDivisionError in the parent, anything else becomes SandboxError
+    """
+    exception_class = getattr(builtins, error_type, None)
+    if isinstance(exception_class, type) and issubclass(exception_class, Exception):
+        return exception_class(message)
+    return SandboxError(f"{error_type}: {message}")
+
+def build_command(module_name:str, command_handler):
+    """
+    Import a plugin module inside the worker and instantiate its Command subclass
+    """
+    import inspect
+    module = importlib.import_module(module_name)
+    for item in vars(module).values():
+        if isinstance(item, type) and issubclass(item, Command) and item is not Command and item.__module__ == module_name:
+            needs_handler = 'command_handler' in inspect.signature(item.__init__).parameters
+            return item(command_handler) if needs_handler else item()
+    raise ImportError(f'no command found in {module_name}')
+
+def worker_main(conn, plugins:dict, memory_limit:int):
+    """
+    Worker process loop: load the designated plugins (command name -> module) once,
+    then answer calls until shutdown or EOF
+    """
+    if memory_limit:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    root = logging.getLogger()
+    for handler in list(root.handlers): #the parent's queue listener thread does not exist in this process
+        root.removeHandler(handler)
+    if os.path.isdir('logs'):
+        file_handler = logging.FileHandler('logs/app.log')
+        file_handler.setFormatter(logging.Formatter(f'%(asctime)s - sandbox[{os.getpid()}] - %(levelname)s - %(message)s'))
+        root.addHandler(file_handler)
+    root.setLevel(logging.WARNING)
+
+    command_handler = CommandHandler()
+    metadata = {}
+    for command_name, module_name in plugins.items():
+        try:
+            command = build_command(module_name, command_handler)
+            command_handler.register_command(command_name, command)
+            metadata[command_name] = {
+                'pure': bool(getattr(command, 'pure', False)),
+                'takes_arguments': bool(getattr(command, 'takes_arguments', False)),
+                'aliases': list(getattr(command, 'aliases', ())),
+                'calculate': callable(getattr(command, 'calculate', None)),
+            }
+        except Exception as e:
+            metadata[command_name] = {'error': f'{type(e).__name__}: {e}'}
+    conn.send_bytes(json.dumps(metadata).encode('utf-8'))
+
+    while True:
+        try:
+            data = conn.recv_bytes()
+        except (EOFError, OSError):
+            break
+        opcode, command_name, mode, args = decode_request(data)
+        if opcode == SHUTDOWN:
+            break
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                command = command_handler.commands[command_name]
+                result = command.calculate(*args) if mode == CALCULATE else command.execute(*args)
+            response = encode_response(OK, result, output.getvalue())
+        except BaseException as e: #SystemExit and MemoryError included, the worker is recycled afterwards
+            response = encode_response(ERROR, str(e), output.getvalue(), type(e).__name__)
+        conn.send_bytes(response)
+    conn.close()
+
+class Worker:
+    """
+    One warm worker process and the parent end of its pipe
+    """
+    def __init__(self, context, plugins:dict, memory_limit:int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=worker_main, args=(child_conn, plugins, memory_limit), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.calls = 0
+        self.metadata = json.loads(self.conn.recv_bytes().decode('utf-8'))
+
+    def call(self, command_name:str, mode:int, args, timeout:float):
+        self.calls += 1
+        self.conn.send_bytes(encode_request(command_name, mode, args))
+        if timeout is not None and not self.conn.poll(timeout):
+            raise SandboxTimeout(f"Command '{command_name}' timed out after {timeout}s")
+        return decode_response(self.conn.recv_bytes())
+
+    def close(self, graceful:bool = True):
+        try:
+            if graceful and self.process.is_alive():
+                self.conn.send_bytes(HEADER.pack(SHUTDOWN, 0))
+                self.process.join(1)
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+class SandboxPool:
+    """
+    Pool of pre-forked workers shared by every sandboxed command, safe to call from several threads.
+    A worker is replaced after max_calls calls, after a timeout, after a crash and after a call
+    that ended with SystemExit or MemoryError.
+    """
+    def __init__(self, plugins:dict, size:int = 2, timeout:float = 5.0, memory_limit:int = None, max_calls:int = 1000):
+        self.plugins = plugins
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.max_calls = max_calls
+        import multiprocessing #imported here so batch and the server can catch SandboxError cheaply
+        self.context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+        self.idle = queue.SimpleQueue()
+        self.lock = threading.Lock()
+        self.workers = []
+        self.recycled = 0
+        for _ in range(self.size):
+            self.idle.put(self.spawn())
+        self.metadata = self.workers[0].metadata
+
+    def spawn(self):
+        worker = Worker(self.context, self.plugins, self.memory_limit)
+        with self.lock:
+            self.workers.append(worker)
+        return worker
+
+    def retire(self, worker, graceful:bool = True):
+        with self.lock:
+            self.workers.remove(worker)
+            self.recycled += 1
+        worker.close(graceful)
+
+    def call(self, command_name:str, mode:int, args=()):
+        """
+        Run one call on an idle worker and return (result, captured output), errors are re-raised here
+        """
+        worker = self.idle.get()
+        replace = False
+        try:
+            status, value, output, error_type = worker.call(command_name, mode, args, self.timeout)
+            replace = worker.calls >= self.max_calls or error_type in ('SystemExit', 'MemoryError')
+        except SandboxTimeout:
+            replace = True
+            raise
+        except (EOFError, OSError) as e:
+            replace = True
+            raise SandboxError(f"Worker running '{command_name}' crashed: {e}") from e
+        finally:
+            if replace:
+                self.retire(worker, graceful=False)
+                worker = self.spawn()
+            self.idle.put(worker)
+        if status == ERROR:
+            if error_type == 'SystemExit':
+                raise SandboxError(f"Command '{command_name}' tried to exit the process: {value}")
+            raise rebuild_error(error_type, value)
+        return value, output
+
+    def close(self):
+        with self.lock:
+            workers = list(self.workers)
+        for worker in workers:
+            worker.close()
+        with self.lock:
+            self.workers.clear()
+
+class SandboxedCommand(Command):
+    """
+    Stands in for a plugin command in the parent process and forwards every call to the pool
+    """
+    thread_safe = True #the pool hands every call a worker of its own
+
+    def __init__(self, pool:SandboxPool, command_name:str):
+        self.pool = pool
+        self.command_name = command_name
+        metadata = pool.metadata.get(command_name, {})
+        if 'error' in metadata:
+            raise SandboxError(f"Plugin '{command_name}' failed to load in the sandbox: {metadata['error']}")
+        self.pure = metadata.get('pure', False)
+        self.takes_arguments = metadata.get('takes_arguments', False)
+        self.aliases = tuple(metadata.get('aliases', ()))
+        if metadata.get('calculate'):
+            self.calculate = self.calculate_remote
+
+    def execute(self, *args):
+        result, output = self.pool.call(self.command_name, EXECUTE, args)
+        if output:
+            self.output.write(output, end='')
+        return result
+
+    def calculate_remote(self, *operands):
+        return self.pool.call(self.command_name, CALCULATE, operands)[0]
@@ -0,0 +1,126 @@
+#asyncio command server, one process serves many concurrent client streams over TCP or a unix socket
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from app import batch, output
+from app.commands.dispatch import AmbiguousCommandError
+from app.sandbox import SandboxError
+
+class CommandServer:
+    """
+    Line based protocol: every line the client sends ('add 3 4') is answered with one line,
+    the result or 'Error: <message>'. Sending 'exit' closes the client's session. Pipelines and
+    assignments ('x = add 1 2') are dispatched as whole lines, and a command that returns nothing
+    is answered with the text it wrote, its lines joined by '; '.
+    """
+    def __init__(self, command_handler, max_workers:int = None):
+        self.command_handler = command_handler
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='command', initializer=output.refuse_input) #commands that would prompt fail instead of blocking a worker
+        self.server = None
+        self.clients = 0
+
+    async def respond(self, line:str):
+        """
+        Execute one request line and return the response line, None ends the session
+        """
+        if '|' in line or '=' in line:
+            command_name, operands = None, [line]
+        else:
+            try:
+                command_name, operands = batch.parse_record(line)
+            except ValueError as e:
+                return f"Error: Malformed record: {e}"
+        name = command_name if command_name is not None else line
+        record = {'command': command_name, 'operands': operands, 'result': None, 'error': None, 'output': None}
+        try:
+            record['result'], record['output'] = await self.run(line, command_name, operands)
+        except AmbiguousCommandError as e:
+            record['error'] = str(e)
+        except KeyError:
+            record['error'] = f"Command '{name}' not found"
+        except (ArithmeticError, ValueError, TypeError, SandboxError) as e:
+            record['error'] = str(e)
+        except EOFError:
+            record['error'] = f"Command '{name}' needs input, pass its operands inline"
+        except SystemExit:
+            return None
+        except Exception as e: #a plugin bug fails its request, never the client's session
+            logging.error(f"Command '{name}' failed: {e}", exc_info=True)
+            record['error'] = f"{type(e).__name__}: {e}"
+        if record['result'] is None and record['error'] is None and record['output']:
+            return '; '.join(record['output'].splitlines())
+        return batch.format_record(record)
+
+    async def run(self, line:str, command_name:str, operands):
+        """
+        Result and written text of one request. Commands with calculate or a native coroutine take the operand
+        path of execute_command_async, everything else runs the line on a worker with its output captured
+        """
+        handler = self.command_handler
+        if command_name is not None:
+            command_name, command = handler.get_command(command_name)
+            if getattr(command, 'calculate', None) is not None or getattr(command, 'execute_async', None) is not None:
+                return await handler.execute_command_async(command_name, *operands, executor=self.executor), None
+            if operands and not getattr(command, 'takes_arguments', False):
+                raise TypeError(f"Command '{command_name}' does not accept operands")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, output.capture_output, handler.execute_command, line)
+
+    async def handle_client(self, reader, writer):
+        """
+        Serve one client connection until it disconnects or sends exit
+        """
+        self.clients += 1
+        peer = writer.get_extra_info('peername') or 'unix socket'
+        logging.info(f'Client connected: {peer}')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode('utf-8', errors='replace').strip()
+                if not line:
+                    continue
+                response = await self.respond(line)
+                if response is None:
+                    break
+                writer.write(response.encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError as e:
+            logging.warning(f'Client {peer} connection error: {e}')
+        finally:
+            self.clients -= 1
+            writer.close()
+            logging.info(f'Client disconnected: {peer}')
+
+    async def start(self, host:str = '127.0.0.1', port:int = 0, unix_path:str = None):
+        """
+        Start listening on a TCP port or a unix socket path and return the asyncio server
+        """
+        self.command_handler.enable_threads() #requests run on the worker pool, plugins not declared thread_safe are serialized
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port)
+        logging.info(f'Command server listening on {self.addresses()}')
+        return self.server
+
+    def addresses(self):
+        return [socket.getsockname() for socket in self.server.sockets] if self.server else []
+
+    async def serve_forever(self, host:str = '127.0.0.1', port:int = 0, unix_path:str = None):
+        """
+        Start the server and serve clients until cancelled
+        """
+        await self.start(host, port, unix_path)
+        try:
+            async with self.server:
+                await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
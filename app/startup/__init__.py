@@ -0,0 +1,54 @@
+#cold start profiling: per phase timings of App construction plus the -X importtime breakdown of a fresh interpreter
+import json
+import os
+import subprocess
+import sys
+
+STARTUP_SCRIPT = '''
+import time
+start = time.perf_counter()
+from app import App
+imported = time.perf_counter()
+app = App()
+app.load_plugins()
+total = time.perf_counter() - start
+import json
+print(json.dumps({'import app': imported - start, **app.startup_phases, 'total': total}))
+'''
+
+def parse_importtime(stderr:str):
+    """
+    Parse '-X importtime' output into (module, self microseconds, cumulative microseconds, depth) tuples
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+def profile_startup(env:dict = None, cwd:str = None):
+    """
+    Start a fresh interpreter with -X importtime, construct the App and load the plugins there,
+    and return (phases in seconds, import breakdown)
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT], env=dict(os.environ if env is None else env),
+                               cwd=cwd, capture_output=True, text=True, check=True)
+    phases = json.loads(completed.stdout.strip().splitlines()[-1])
+    return phases, parse_importtime(completed.stderr)
+
+def format_report(phases:dict, imports, limit:int = 15):
+    """
+    Format the phases and the slowest imports, top level modules of the app first
+    """
+    lines = ['Startup phases:']
+    for phase, seconds in phases.items():
+        lines.append(f"  {phase:<12} {seconds * 1000:>9.2f} ms")
+    lines.append(f"Slowest imports (cumulative, of {len(imports)} modules):")
+    for name, self_us, cumulative_us, depth in sorted(imports, key=lambda item: -item[2])[:limit]:
+        lines.append(f"  {cumulative_us / 1000:>9.2f} ms  self {self_us / 1000:>7.2f} ms  {'  ' * depth}{name}")
+    if os.environ.get('PYTHONDONTWRITEBYTECODE'):
+        lines.append('Note: PYTHONDONTWRITEBYTECODE is set, import times include compiling the sources')
+    return '\n'.join(lines)
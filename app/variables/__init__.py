@@ -0,0 +1,317 @@
+#named variables bound to command results ('x = add a b'), kept in a dependency graph so changing one
+#variable recomputes only the variables downstream of it, in topological order
+import collections
+import json
+import logging
+import os
+import threading
+from app import numeric
+from app.commands.dispatch import AmbiguousCommandError
+
+FORMAT_VERSION = 1
+
+#outcome of one recomputation pass: variables evaluated and variables left untouched
+Recompute = collections.namedtuple('Recompute', 'recomputed skipped')
+
+class CycleError(ValueError):
+    """
+    A definition that would make a variable depend on itself
+    """
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f"Cycle: {' -> '.join(cycle)}")
+
+class Variable:
+    """
+    One node of the graph: an input holding a number, or a formula running a command over
+    numbers and other variables. The value is None while error holds the reason it has none.
+    """
+    __slots__ = ('name', 'text', 'command_name', 'operands', 'dependencies', 'value', 'error')
+
+    def __init__(self, name:str, text:str, command_name:str = None, operands:tuple = (), dependencies:tuple = ()):
+        self.name = name
+        self.text = text
+        self.command_name = command_name #None for an input
+        self.operands = operands #(variable name or None, constant) per operand
+        self.dependencies = dependencies #distinct variable names among the operands
+        self.value = None
+        self.error = None
+
+    @property
+    def is_input(self):
+        return self.command_name is None
+
+    def __repr__(self):
+        return f"Variable({self.name!r}, {self.text!r}, value={self.value!r})"
+
+class VariableGraph:
+    """
+    Variables of a CommandHandler. define() adds or replaces a variable and propagates the change,
+    a variable whose recomputed value did not change stops the propagation below it.
+    With a path the graph is loaded from and saved to a json file.
+    """
+    def __init__(self, command_handler, path:str = None):
+        self.command_handler = command_handler
+        self.path = path
+        self.variables = {} #name -> Variable
+        self.dependents = {} #name -> set of the names whose formulas use it
+        self.formulas = 0 #variables that are not inputs
+        self.last = Recompute(0, 0)
+        self.recomputed = 0
+        self.skipped = 0
+        self.modified = False #changed since loaded or saved
+        self.lock = threading.RLock()
+
+    def __contains__(self, name):
+        return name in self.variables
+
+    def __len__(self):
+        return len(self.variables)
+
+    def value(self, name:str):
+        """
+        Current value of a variable, raises KeyError when it is not defined and ValueError when it has no value
+        """
+        variable = self.variables[name]
+        if variable.error is not None:
+            raise ValueError(f"'{name}' has no value: {variable.error}")
+        return variable.value
+
+    def parse(self, name:str, text:str):
+        """
+        Build the variable for a definition such as '5' or 'add a 2', without adding it to the graph
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Invalid variable name: {name}")
+        tokens = text.split()
+        if not tokens:
+            raise ValueError(f"Missing definition for '{name}'")
+        if len(tokens) == 1:
+            try:
+                variable = Variable(name, tokens[0])
+                variable.value = numeric.parse(tokens[0])
+                return variable
+            except (ValueError, ArithmeticError):
+                pass #a command without operands, e.g. a plugin name
+        try:
+            command_name, command = self.command_handler.get_command(tokens[0])
+        except KeyError as e:
+            raise KeyError(str(e) if isinstance(e, AmbiguousCommandError) else f"Command '{tokens[0]}' not found") from None
+        if getattr(command, 'calculate', None) is None:
+            raise TypeError(f"Command '{command_name}' cannot be used in a variable")
+        operands = []
+        for token in tokens[1:]:
+            if token in self.variables or (token.isidentifier() and token == name):
+                operands.append((token, None))
+                continue
+            try:
+                operands.append((None, numeric.parse(token)))
+            except (ValueError, ArithmeticError):
+                raise KeyError(f"Unknown variable: {token}") from None
+        dependencies = tuple(dict.fromkeys(source for source, _ in operands if source is not None))
+        return Variable(name, ' '.join(tokens), command_name, tuple(operands), dependencies)
+
+    def define(self, name:str, text:str):
+        """
+        Add or replace a variable and recompute what depends on it, returns the Recompute counts.
+        Raises CycleError, leaving the graph unchanged, when the definition would close a cycle.
+        """
+        with self.lock:
+            variable = self.parse(name, text)
+            cycle = self.find_cycle(name, variable.dependencies)
+            if cycle is not None:
+                raise CycleError(cycle)
+            previous = self.variables.get(name)
+            if previous is not None and not variable.is_input:
+                variable.value, variable.error = previous.value, previous.error #a redefinition giving the same value changes nothing below
+            self.link(variable, previous)
+            self.modified = True
+            if previous is not None and previous.is_input and variable.is_input and previous.value == variable.value:
+                return self.finish(0) #same input value again, nothing is dirty
+            return self.propagate({name})
+
+    def delete(self, name:str):
+        """
+        Remove a variable, raises KeyError when it is not defined and ValueError while other variables use it
+        """
+        with self.lock:
+            variable = self.variables[name]
+            users = self.dependents.get(name)
+            if users:
+                raise ValueError(f"'{name}' is used by {', '.join(sorted(users))}")
+            self.unlink(variable)
+            del self.variables[name]
+            self.dependents.pop(name, None)
+            self.modified = True
+            return variable
+
+    def link(self, variable:Variable, previous:Variable = None):
+        if previous is not None:
+            self.unlink(previous)
+        self.variables[variable.name] = variable
+        self.formulas += not variable.is_input
+        self.dependents.setdefault(variable.name, set())
+        for dependency in variable.dependencies:
+            self.dependents[dependency].add(variable.name)
+
+    def unlink(self, variable:Variable):
+        self.formulas -= not variable.is_input
+        for dependency in variable.dependencies:
+            self.dependents[dependency].discard(variable.name)
+
+    def find_cycle(self, name:str, dependencies):
+        """
+        The cycle name -> dependency -> ... -> name that making name depend on dependencies would close, else None
+        """
+        if name in dependencies:
+            return [name, name]
+        targets = set(dependencies)
+        parents = {name: None}
+        queue = collections.deque([name])
+        while queue: #walk the variables that already depend on name, directly or not
+            current = queue.popleft()
+            for dependent in self.dependents.get(current, ()):
+                if dependent in parents:
+                    continue
+                parents[dependent] = current
+                if dependent in targets:
+                    path = [dependent]
+                    while path[-1] != name:
+                        path.append(parents[path[-1]])
+                    return [name, *path]
+                queue.append(dependent)
+        return None
+
+    def downstream(self, names):
+        """
+        names and every variable depending on them, directly or not
+        """
+        seen = set(names)
+        stack = list(names)
+        while stack:
+            for dependent in self.dependents.get(stack.pop(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    stack.append(dependent)
+        return seen
+
+    def order(self, names):
+        """
+        Topological order of names, each variable after the variables of names it depends on
+        """
+        pending = {name: sum(dependency in names for dependency in self.variables[name].dependencies) for name in names}
+        ready = collections.deque(sorted(name for name, count in pending.items() if count == 0))
+        while ready:
+            name = ready.popleft()
+            yield name
+            for dependent in self.dependents.get(name, ()):
+                if dependent in pending:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        ready.append(dependent)
+
+    def propagate(self, seeds):
+        """
+        Recompute the seed variables and, in topological order, the variables downstream of them.
+        A formula below the seeds is only evaluated when one of its dependencies changed value in this pass.
+        """
+        changed = set()
+        recomputed = 0
+        for name in self.order(self.downstream(seeds)):
+            variable = self.variables[name]
+            if variable.is_input:
+                changed.add(name) #only seeds are reached without a dependency, define or load set the value
+                continue
+            if name not in seeds and not any(dependency in changed for dependency in variable.dependencies):
+                continue
+            before = (variable.value, variable.error)
+            self.evaluate(variable)
+            recomputed += 1
+            if (variable.value, variable.error) != before:
+                changed.add(name)
+        return self.finish(recomputed)
+
+    def finish(self, recomputed:int):
+        self.last = Recompute(recomputed, self.formulas - recomputed)
+        self.recomputed += self.last.recomputed
+        self.skipped += self.last.skipped
+        return self.last
+
+    def evaluate(self, variable:Variable):
+        """
+        Run the formula of a variable against the current values of its dependencies
+        """
+        for dependency in variable.dependencies:
+            if self.variables[dependency].error is not None:
+                variable.value, variable.error = None, f"'{dependency}' has no value"
+                return
+        handler = self.command_handler
+        command = handler.commands.get(variable.command_name) #looked up each time, a reload may have swapped it
+        calculate = getattr(command, 'calculate', None) if command is not None else None
+        if calculate is None:
+            variable.value, variable.error = None, f"Command '{variable.command_name}' not found"
+            return
+        operands = tuple(self.variables[source].value if source is not None else constant for source, constant in variable.operands)
+        try:
+            if handler.metrics is not None:
+                variable.value = handler.metrics.measure(variable.command_name, handler.calculate_operands, variable.command_name, command, calculate, operands)
+            else:
+                variable.value = handler.calculate_operands(variable.command_name, command, calculate, operands)
+            variable.error = None
+        except (ArithmeticError, ValueError, TypeError) as e:
+            variable.value, variable.error = None, str(e) or type(e).__name__
+
+    def stats(self):
+        return {'variables': len(self.variables), 'last_recomputed': self.last.recomputed, 'last_skipped': self.last.skipped,
+                'recomputed': self.recomputed, 'skipped': self.skipped}
+
+    def load(self):
+        """
+        Rebuild the graph saved at path and compute every formula once, returns False when there is nothing to load
+        """
+        if self.path is None:
+            return False
+        try:
+            with open(self.path, encoding='utf-8') as variables_file:
+                data = json.load(variables_file)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logging.warning(f'Could not read variables {self.path}: {e}')
+            return False
+        if data.get('version') != FORMAT_VERSION:
+            logging.warning(f'Unsupported variables file version: {data.get("version")}')
+            return False
+        with self.lock:
+            for name, text in data.get('variables', {}).items(): #saved in topological order
+                try:
+                    self.link(self.parse(name, text), self.variables.get(name))
+                except (KeyError, ValueError, TypeError) as e:
+                    logging.warning(f"Skipped variable '{name}': {e}")
+            self.propagate(self.variables)
+            self.modified = False
+        logging.info(f'Loaded {len(self.variables)} variables from {self.path}')
+        return True
+
+    def save(self):
+        """
+        Write the definitions in topological order, so load can parse each after the variables it uses
+        """
+        if self.path is None:
+            return False
+        with self.lock:
+            data = {'version': FORMAT_VERSION, 'variables': {name: self.variables[name].text for name in self.order(set(self.variables))}}
+            temporary = f'{self.path}.tmp'
+            try:
+                with open(temporary, 'w', encoding='utf-8') as variables_file:
+                    json.dump(data, variables_file, indent=1)
+                os.replace(temporary, self.path) #a crash while writing keeps the previous file
+            except OSError as e:
+                logging.warning(f'Could not write variables {self.path}: {e}')
+                return False
+            self.modified = False
+        return True
+
+    def close(self):
+        if self.modified:
+            self.save()
@@ -0,0 +1,42 @@
+#array-aware execution path for the arithmetic plugins, numpy is imported lazily so it stays optional
+import importlib
+import logging
+
+_numpy = None
+
+def get_numpy():
+    """
+    Import numpy on first use, the rest of the application does not depend on it
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            _numpy = importlib.import_module('numpy')
+        except ImportError as e:
+            raise RuntimeError("The vectorized engine requires numpy, install it with 'pip install numpy'") from e
+    return _numpy
+
+def as_arrays(a, b):
+    """
+    Convert two operand columns (numpy arrays, lists or buffers such as array('d')) to float64 arrays
+    without copying when they already are
+    """
+    np = get_numpy()
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    if a.shape != b.shape:
+        raise ValueError(f"Operand arrays have different shapes: {a.shape} and {b.shape}")
+    return a, b
+
+def divide(a, b):
+    """
+    Element-wise a / b, elements where b is zero are masked instead of raising
+    """
+    np = get_numpy()
+    a, b = as_arrays(a, b)
+    zero = b == 0
+    result = np.zeros_like(a)
+    np.divide(a, b, out=result, where=~zero)
+    if zero.any():
+        logging.warning("Division by zero masked in %d of %d elements", int(zero.sum()), zero.size)
+    return np.ma.masked_array(result, mask=zero)
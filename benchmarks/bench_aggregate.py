@@ -0,0 +1,64 @@
+#n-ary reductions against chaining the binary add command, plus the accuracy of each way of summing
+import argparse
+import logging
+import os
+import random
+import tempfile
+from array import array
+from fractions import Fraction
+from app import aggregate
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from benchmarks.harness import measure, report
+
+ACCUMULATORS = {
+    'sum': aggregate.Sum,
+    'product': aggregate.Product,
+    'min': lambda: aggregate.Extreme(min),
+    'mean': aggregate.Mean,
+    'variance': aggregate.Variance,
+    'quantile': lambda: aggregate.QuantileSketch(0.99, seed=1),
+}
+
+def reduce_chunks(factory, values, chunk_size:int):
+    accumulator = factory()
+    for start in range(0, len(values), chunk_size):
+        accumulator.update_many(values[start:start + chunk_size])
+    return accumulator.result()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Streaming aggregates against chained binary commands')
+    parser.add_argument('--values', type=int, default=1_000_000)
+    parser.add_argument('--chunk-size', type=int, default=65_536)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(42)
+    values = array('d', (rng.uniform(-1, 1) * 10 ** rng.randint(-8, 8) for _ in range(args.values)))
+    handler = CommandHandler()
+    handler.register_command('add', AddCommand())
+
+    print(f"{args.values:,} values, chunks of {args.chunk_size:,}, best of {args.repeat}")
+    def chained():
+        total = 0.0
+        for value in values:
+            total = handler.calculate_operands('add', handler.commands['add'], handler.commands['add'].calculate, (total, value))
+        return total
+    report("add chained (binary)", measure(chained, args.repeat), args.values)
+    for name, factory in ACCUMULATORS.items():
+        report(f"{name} (chunked)", measure(lambda: reduce_chunks(factory, values, args.chunk_size), args.repeat), args.values)
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'values.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(map(repr, values)))
+        report("sum streamed from file", measure(lambda: aggregate.aggregate_file(path, aggregate.Sum()), args.repeat), args.values)
+
+    exact = sum(map(Fraction, values), Fraction(0))
+    for name, total in (('naive left to right', chained()), ('sum (partials)', reduce_chunks(aggregate.Sum, values, args.chunk_size))):
+        error = abs(Fraction(total) - exact) / abs(exact)
+        print(f"{name:<40} relative error {float(error):.3e}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#throughput of the coordinator/worker mode with 1, 2, 4... 'main.py --worker' processes on localhost
+import argparse
+import logging
+import os
+import subprocess
+import sys
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.sub import SubCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.divide import DivideCommand
+from app import batch
+from app.cluster import Coordinator
+from benchmarks.harness import measure, report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_lines(count:int):
+    names = ('add', 'sub', 'multiply', 'divide')
+    return [f"{names[i % 4]} {i} {i % 7}" for i in range(count)]
+
+def start_workers(coordinator, count:int):
+    host, port = coordinator.address
+    env = dict(os.environ, STARTUP='minimal') #log file at WARNING, as the serial row runs without logging
+    processes = [subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py'), '--worker', f'{host}:{port}'],
+                                  cwd=ROOT, env=env, stdout=subprocess.DEVNULL) for _ in range(count)]
+    if not coordinator.wait_for_workers(count, timeout=60):
+        raise RuntimeError(f'{count} workers did not connect')
+    return processes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Distributed batch scaling over local worker processes')
+    parser.add_argument('--records', type=int, default=200_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    handler = CommandHandler()
+    for name, command in {'add': AddCommand, 'sub': SubCommand, 'multiply': MultiplyCommand, 'divide': DivideCommand}.items():
+        handler.register_command(name, command())
+    lines = make_lines(args.records)
+
+    print(f"{args.records:,} records, chunks of {args.chunk_size}, best of {args.repeat}")
+    serial = measure(lambda: sum(1 for _ in (batch.execute_record(handler, line, 'text') for line in lines)), args.repeat)
+    report("serial", serial, args.records)
+    for workers in args.workers:
+        coordinator = Coordinator(chunk_size=args.chunk_size)
+        processes = start_workers(coordinator, workers)
+        try:
+            seconds = measure(lambda: sum(1 for _ in coordinator.run(lines)), args.repeat)
+        finally:
+            coordinator.close()
+            for process in processes:
+                process.wait(timeout=30)
+        report(f"{workers} worker(s)", seconds, args.records)
+        print(f"{'':<40} speedup over serial x{serial / seconds:.2f}")
+
+if __name__ == '__main__':
+    main()
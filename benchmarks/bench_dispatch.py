@@ -0,0 +1,50 @@
+#command resolution cost against the number of registered commands
+import argparse
+from app.commands import Command, CommandHandler
+from benchmarks.harness import measure
+
+class NoopCommand(Command):
+    aliases = ()
+    def execute(self, *args):
+        return None
+
+def build(count:int):
+    handler = CommandHandler()
+    for number in range(count):
+        handler.register_command(f"command{number:05d}", NoopCommand())
+    handler.register_command("multiply", NoopCommand())
+    handler.dispatch.add("multiply", ("mul", "times"))
+    return handler
+
+def legacy_lookup(commands, line):
+    """
+    What execute_command did before the dispatch table: a raw dict lookup on the whole line
+    """
+    try:
+        return commands[line.strip()]
+    except KeyError:
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Dispatch resolution micro-benchmarks')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--lookups', type=int, default=200_000)
+    args = parser.parse_args(argv)
+    print(f"ns per resolution, {args.lookups:,} lookups")
+    print(f"{'commands':>9} {'legacy dict':>12} {'exact':>8} {'MULTIPLY':>9} {'alias':>8} {'prefix':>8} {'line+args':>10}")
+    for size in args.sizes:
+        handler = build(size)
+        resolve = handler.get_command
+        cases = {
+            'legacy dict': lambda: [legacy_lookup(handler.commands, 'multiply') for _ in range(args.lookups)],
+            'exact': lambda: [resolve('multiply') for _ in range(args.lookups)],
+            'MULTIPLY': lambda: [resolve('MULTIPLY') for _ in range(args.lookups)],
+            'alias': lambda: [resolve('times') for _ in range(args.lookups)],
+            'prefix': lambda: [resolve('multi') for _ in range(args.lookups)],
+            'line+args': lambda: [resolve('multi 2 3'.split()[0]) for _ in range(args.lookups)],
+        }
+        timings = [measure(case, 3) / args.lookups * 1e9 for case in cases.values()]
+        print(f"{size:>9} " + " ".join(f"{t:>{w}.0f}" for t, w in zip(timings, (12, 8, 9, 8, 8, 10))))
+
+if __name__ == '__main__':
+    main()
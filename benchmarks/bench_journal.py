@@ -0,0 +1,34 @@
+#session journal write throughput per fsync batch size and mmap read and aggregation throughput
+import argparse
+import os
+import tempfile
+from app.journal import Journal, JournalReader
+from benchmarks.harness import measure, report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Session journal write and replay throughput')
+    parser.add_argument('--count', type=int, default=200_000, help='records per write run')
+    parser.add_argument('--read-count', type=int, default=1_000_000, help='records in the journal that is read back')
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as root:
+        for sync_every in (1, 100, 10_000):
+            count = args.count if sync_every > 1 else min(args.count, 2000)
+            path = os.path.join(root, f'write{sync_every}.journal')
+            def write():
+                journal = Journal(path, sync_every=sync_every, sync_interval=60)
+                for i in range(count):
+                    journal.append('add', (str(i), '1'), i + 1.0)
+                journal.close()
+            report(f'append, fsync every {sync_every}', measure(write, 1), count)
+        path = os.path.join(root, 'read.journal')
+        journal = Journal(path, sync_every=100_000, sync_interval=60)
+        for i in range(args.read_count):
+            journal.append(('add', 'multiply', 'divide')[i % 3], (str(i), '2'), i * 2.0)
+        journal.close()
+        print(f"{args.read_count:,} records, {os.path.getsize(path) / args.read_count:.1f} bytes each")
+        reader = JournalReader(path)
+        report('read every record', measure(lambda: sum(1 for _ in reader), 1), args.read_count)
+        report('aggregate per command', measure(reader.aggregate, 1), args.read_count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#per-command logging cost: the original synchronous FileHandler setup against the queue and production profiles
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+SCRIPT = '''
+import logging, sys, time
+from app import App
+from app import logqueue
+from app.plugins.add import AddCommand
+App()
+command = AddCommand()
+count = int(sys.argv[1])
+start = time.perf_counter()
+for i in range(count):
+    command.calculate(i, 1.5)
+elapsed = time.perf_counter() - start
+logqueue.shutdown() #drain the queue so the file is complete
+print(elapsed)
+'''
+
+def run_profile(profile:str, count:int):
+    """
+    Run count add commands in a fresh interpreter with LOG_PROFILE=profile, return seconds in the hot loop
+    """
+    with tempfile.TemporaryDirectory() as cwd:
+        env = dict(os.environ, LOG_PROFILE=profile, PYTHONPATH=os.getcwd())
+        output = subprocess.run([sys.executable, '-c', SCRIPT, str(count)], cwd=cwd, env=env, check=True, capture_output=True, text=True).stdout
+        return float(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Logging overhead per command for each LOG_PROFILE')
+    parser.add_argument('--count', type=int, default=100_000)
+    args = parser.parse_args(argv)
+    print(f"{args.count:,} add commands per profile")
+    baseline = None
+    for label, profile in (('before: sync FileHandler (dev)', 'dev'), ('after: queue, DEBUG', 'queue'), ('after: production, WARNING', 'production')):
+        seconds = run_profile(profile, args.count)
+        baseline = baseline or seconds
+        print(f"{label:<32} {seconds * 1000:>9.1f} ms {args.count / seconds:>14,.0f} commands/s  x{baseline / seconds:.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#footprint of a loaded App before and after unloading idle plugins, and the dispatch cost of idle tracking and tracemalloc
+import argparse
+import collections
+import gc
+import logging
+import os
+import tracemalloc
+from app import App, memory
+from app.output import TextSink
+from benchmarks.harness import measure, report
+
+def traced(func):
+    """
+    Bytes func leaves allocated, measured with tracemalloc
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memory footprint and the cost of memory accounting')
+    parser.add_argument('--commands', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    os.environ.update(STARTUP='minimal', PLUGIN_INDEX='false', OUTPUT_FLUSH_SIZE='65536')
+    logging.disable(logging.CRITICAL)
+    copy, _ = traced(lambda: {key: value for key, value in os.environ.items()})
+    view, _ = traced(lambda: collections.ChainMap({}, os.environ))
+    print(f"settings: dict copy {copy:,} bytes, ChainMap view {view:,} bytes ({len(os.environ)} variables)")
+
+    app = App()
+    app.command_handler.output = TextSink(open(os.devnull, 'w'), flush_size=65536) #set before loading, plugins take it on registration
+    gc.collect()
+    tracemalloc.start()
+    app.load_plugins()
+    handler = app.command_handler
+    gc.collect()
+    loaded = tracemalloc.get_traced_memory()[0]
+    unloaded = memory.unload_idle(handler, 0)
+    gc.collect()
+    idle = tracemalloc.get_traced_memory()[0]
+    handler.execute_command('greet')
+    reloaded = tracemalloc.get_traced_memory()[0] - idle
+    tracemalloc.stop()
+    print(f"{len(handler.commands)} plugins: {loaded:,} bytes once loaded, {idle:,} after unloading {len(unloaded)} idle ones, RSS {memory.rss_bytes() / 1024:,.0f} KiB")
+    print(f"importing one plugin back costs {reloaded:,} bytes")
+    memory.unload_idle(handler, 0) #leave every plugin as a placeholder for the timings below
+
+    lines = [f"add {i} 3" for i in range(args.commands)]
+    def dispatch():
+        for line in lines:
+            handler.execute_command(line)
+    handler.execute_command('add 1 2') #import add back outside the timings
+    handler.last_used = None
+    report("dispatch", measure(dispatch, args.repeat), args.commands)
+    handler.last_used = {}
+    report("dispatch, idle tracking", measure(dispatch, args.repeat), args.commands)
+    for frames in (1, 8):
+        tracemalloc.start(frames)
+        report(f"dispatch, tracemalloc {frames} frame(s)", measure(dispatch, args.repeat), args.commands)
+        tracemalloc.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#dispatch overhead of CommandHandler with instrumentation off and on
+import argparse
+import logging
+from app.commands import CommandHandler
+from app.commands.metrics import CommandMetrics
+from app.plugins.add import AddCommand
+from benchmarks.harness import measure, report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CommandHandler.calculate with METRICS off and on')
+    parser.add_argument('--count', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    print(f"{args.count:,} add dispatches, best of {args.repeat}")
+    results = {}
+    for label, metrics in (('instrumentation off', None), ('instrumentation on', CommandMetrics())):
+        handler = CommandHandler(metrics=metrics)
+        handler.register_command('add', AddCommand())
+        def run():
+            for i in range(args.count):
+                handler.calculate('add', i, 1.0)
+        results[label] = measure(run, args.repeat)
+        report(label, results[label], args.count)
+    overhead = (results['instrumentation on'] - results['instrumentation off']) / args.count
+    print(f"overhead per dispatch: {overhead * 1e9:.0f} ns")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#throughput, memory and exactness of each numeric backend over a large batch of money sized operands
+import argparse
+import logging
+import random
+import tracemalloc
+from app import numeric
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.sub import SubCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.divide import DivideCommand
+from benchmarks.harness import measure, report
+
+OPERATIONS = ('add', 'sub', 'multiply', 'divide')
+
+def make_operands(count:int):
+    rng = random.Random(0)
+    return [(f"{rng.randint(0, 10**6) / 100:.2f}", f"{rng.randint(1, 10**4) / 100:.2f}") for _ in range(count)]
+
+def run(handler, operands):
+    return [handler.calculate(OPERATIONS[i % 4], a, b) for i, (a, b) in enumerate(operands)]
+
+def money_total(handler, count:int):
+    """
+    Add one cent count times, exact backends end on exactly count / 100
+    """
+    total = numeric.parse(0)
+    for _ in range(count):
+        total = handler.calculate('add', total, '0.01')
+    return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Numeric backend comparison')
+    parser.add_argument('--count', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    handler = CommandHandler()
+    for name, command in zip(OPERATIONS, (AddCommand, SubCommand, MultiplyCommand, DivideCommand)):
+        handler.register_command(name, command())
+    operands = make_operands(args.count)
+
+    print(f"{args.count:,} mixed operations, best of {args.repeat}")
+    for name, options in (('float', {}), ('decimal', {'precision': 28}), ('fraction', {})):
+        numeric.set_backend(name, **options)
+        seconds = measure(lambda: run(handler, operands), args.repeat)
+        tracemalloc.start()
+        results = run(handler, operands)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del results
+        total = money_total(handler, 10_000)
+        report(name, seconds, args.count)
+        print(f"{'':<40} peak memory {peak / 2**20:>8.1f} MiB   10,000 x 0.01 = {total}  exact: {total == numeric.parse('100')}")
+    numeric.set_backend('float')
+
+if __name__ == '__main__':
+    main()
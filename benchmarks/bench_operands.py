@@ -0,0 +1,31 @@
+#bulk operand parsing compared with converting every token with a python call
+import argparse
+import random
+from app import vectorized
+from app.commands.operands import parse_bulk, parse_bulk_items
+from benchmarks.harness import measure, report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk numeric operand parsing throughput')
+    parser.add_argument('--rows', type=int, default=500_000, help='rows of two operands')
+    args = parser.parse_args(argv)
+    rng = random.Random(605)
+    text = '\n'.join(f'{rng.uniform(-1e3, 1e3):.6f} {rng.uniform(-1e3, 1e3):.6f}' for _ in range(args.rows))
+    items = args.rows * 2
+    print(f"{args.rows:,} rows, {len(text) / 1e6:.1f} MB of text")
+    report('per token float() loop', measure(lambda: [float(token) for token in text.split()], 3), items)
+    report('per item validation (slow path)', measure(lambda: parse_bulk_items(text.split(), 2), 3), items)
+    report('parse_bulk', measure(lambda: parse_bulk(text, 2), 3), items)
+    get_numpy = vectorized.get_numpy
+    def missing():
+        raise RuntimeError('numpy disabled for the benchmark')
+    vectorized.get_numpy = missing
+    try:
+        report("parse_bulk without numpy (array('d'))", measure(lambda: parse_bulk(text, 2), 3), items)
+    finally:
+        vectorized.get_numpy = get_numpy
+    bad = text + '\n1 oops'
+    report('parse_bulk with one invalid item', measure(lambda: parse_bulk(bad, 2), 3), items)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#results/sec of a scripted REPL writing to a file and to a pipe, unbuffered like print() before the sinks and buffered
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.harness import report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#name: environment, OUTPUT_FLUSH_SIZE=0 writes every result and prompt straight to stdout as print() and input() did
+CONFIGS = {
+    'before (unbuffered)': {'OUTPUT_FLUSH_SIZE': '0'},
+    'text (buffered)': {},
+    'jsonl (buffered)': {'OUTPUT_FORMAT': 'jsonl'},
+    'binary (buffered)': {'OUTPUT_FORMAT': 'binary'},
+}
+
+def run_repl(script:str, env:dict, stdout):
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py')], input=script.encode(), stdout=stdout, stderr=subprocess.DEVNULL,
+                             env=env, cwd=ROOT)
+    elapsed = time.perf_counter() - start
+    if process.returncode not in (0, 1): #the exit command leaves with a message, which is exit status 1
+        raise RuntimeError(f'REPL failed with status {process.returncode}')
+    return elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='REPL output throughput to a file and a pipe, unbuffered against buffered sinks')
+    parser.add_argument('--commands', type=int, default=50_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    names = ('add', 'sub', 'multiply', 'divide')
+    script = ''.join(f'{names[i % 4]} {i} 3\n' for i in range(args.commands)) + 'exit\n'
+    print(f"{args.commands:,} commands through the REPL, best of {args.repeat} (includes startup)")
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'out')
+        for target in ('file', 'pipe'):
+            for name, settings in CONFIGS.items():
+                env = dict(os.environ, STARTUP='minimal', PLUGIN_INDEX='false', **settings) #log file at WARNING
+                times = []
+                for _ in range(args.repeat):
+                    if target == 'file':
+                        with open(path, 'wb') as f:
+                            times.append(run_repl(script, env, f))
+                    else:
+                        times.append(run_repl(script, env, subprocess.PIPE))
+                report(f"{target}: {name}", min(times), args.commands)
+
+if __name__ == '__main__':
+    main()
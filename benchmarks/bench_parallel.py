@@ -0,0 +1,42 @@
+#throughput of the process pool batch executor as workers are added
+import argparse
+import logging
+import os
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.sub import SubCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.divide import DivideCommand
+from app import batch
+from app.parallel import ParallelExecutor
+from benchmarks.harness import measure, report
+
+def make_lines(count:int):
+    names = ('add', 'sub', 'multiply', 'divide')
+    return [f"{names[i % 4]} {i} {i % 7}" for i in range(count)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parallel batch scaling from 1 to N worker processes')
+    parser.add_argument('--records', type=int, default=200_000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    handler = CommandHandler()
+    for name, command in {'add': AddCommand, 'sub': SubCommand, 'multiply': MultiplyCommand, 'divide': DivideCommand}.items():
+        handler.register_command(name, command())
+    lines = make_lines(args.records)
+
+    print(f"{args.records:,} records, chunks of {args.chunk_size}, best of {args.repeat}")
+    serial = measure(lambda: sum(1 for _ in (batch.execute_record(handler, line, 'text') for line in lines)), args.repeat)
+    report("serial", serial, args.records)
+    for workers in range(1, args.max_workers + 1):
+        executor = ParallelExecutor(handler, workers, args.chunk_size)
+        seconds = measure(lambda: sum(1 for _ in executor.run(lines)), args.repeat)
+        report(f"{workers} worker(s)", seconds, args.records)
+        print(f"{'':<40} speedup over serial x{serial / seconds:.2f}")
+
+if __name__ == '__main__':
+    main()
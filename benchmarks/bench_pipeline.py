@@ -0,0 +1,32 @@
+#multi step computation over many inputs: a compiled pipeline against re-dispatching text for every step
+import argparse
+import logging
+from app import App
+from app.pipeline import Pipeline
+from benchmarks.harness import measure, report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pipeline throughput against per step text dispatch')
+    parser.add_argument('--count', type=int, default=50_000, help='inputs per run')
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    app = App()
+    app.load_plugins()
+    handler = app.command_handler
+    text = 'add _ _ | multiply _ 4 | divide _ 2'
+    pipeline = Pipeline(handler, text)
+    inputs = [(i, i + 1) for i in range(args.count)]
+
+    def per_step_text():
+        for a, b in inputs:
+            value = handler.calculate('add', str(a), str(b))
+            value = handler.calculate('multiply', str(value), '4')
+            handler.calculate('divide', str(value), '2')
+    print(f"'{text}' over {args.count:,} inputs")
+    report('text per step (handler.calculate)', measure(per_step_text, 3), args.count)
+    report('compile per input + run', measure(lambda: [Pipeline(handler, text).run(a, b) for a, b in inputs], 3), args.count)
+    report('compiled run()', measure(lambda: [pipeline.run(a, b) for a, b in inputs], 3), args.count)
+    report('compiled map() stream', measure(lambda: sum(1 for _ in pipeline.map(inputs)), 3), args.count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#hot reload latency and the cost of the watcher on steady state dispatch
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from app import App
+from benchmarks.harness import measure, report
+
+PLUGIN_SOURCE = '''
+from app.commands import Command
+class EchoCommand(Command):
+    def execute(self):
+        pass
+    def calculate(self, a):
+        return a + {version}
+'''
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Plugin hot reload latency and dispatch overhead')
+    parser.add_argument('--plugins', type=int, default=50, help='plugins in the watched directory')
+    parser.add_argument('--reloads', type=int, default=20)
+    parser.add_argument('--count', type=int, default=100_000, help='dispatches per throughput run')
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as root:
+        package = os.path.join(root, 'bench_reload_plugins')
+        for number in range(args.plugins):
+            os.makedirs(os.path.join(package, f'p{number}'))
+            with open(os.path.join(package, f'p{number}', '__init__.py'), 'w', encoding='utf-8') as f:
+                f.write(PLUGIN_SOURCE.format(version=0))
+        open(os.path.join(package, '__init__.py'), 'w').close()
+        sys.path.insert(0, root)
+        class BenchApp(App):
+            plugins_package = 'bench_reload_plugins'
+            plugin_path = package
+        app = BenchApp()
+        app.settings.update({'PLUGIN_RELOAD': 'true', 'PLUGIN_RELOAD_INTERVAL': '0.05'})
+        app.load_plugins()
+        handler = app.command_handler
+
+        def dispatch():
+            for i in range(args.count):
+                handler.calculate('p0', i)
+        print(f"{args.plugins} plugins watched, {args.count:,} dispatches per run")
+        report('dispatch, watcher off', measure(dispatch, 3), args.count)
+        report('dispatch, REPL style poll() per call', measure(lambda: [app.reloader.poll() or handler.calculate('p0', i) for i in range(args.count)], 3), args.count)
+        app.reloader.start()
+        report('dispatch, watcher thread every 50 ms', measure(dispatch, 3), args.count)
+        app.reloader.stop()
+
+        latencies = []
+        for version in range(1, args.reloads + 1):
+            with open(os.path.join(package, 'p0', '__init__.py'), 'w', encoding='utf-8') as f:
+                f.write(PLUGIN_SOURCE.format(version=version) + '#' * version)
+            start = time.perf_counter()
+            app.reloader.check()
+            latencies.append(time.perf_counter() - start)
+            assert handler.calculate('p0', 0) == version
+        latencies.sort()
+        print(f"reload latency (detect + re-import + swap): median {latencies[len(latencies) // 2] * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+#round trip overhead of sandboxed plugins compared with in process dispatch, and the cost of a cold worker
+import argparse
+import logging
+import time
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.sandbox import SandboxPool, SandboxedCommand, CALCULATE
+from benchmarks.harness import measure, report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sandboxed plugin call overhead')
+    parser.add_argument('--count', type=int, default=10_000, help='calls per run')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-calls', type=int, default=1000, help='calls before a worker is recycled')
+    args = parser.parse_args(argv)
+    logging.disable(logging.CRITICAL)
+
+    local = CommandHandler()
+    local.register_command('add', AddCommand())
+    start = time.perf_counter()
+    pool = SandboxPool({'add': 'app.plugins.add'}, args.workers, max_calls=args.max_calls)
+    print(f"pool of {args.workers} warm workers started in {(time.perf_counter() - start) * 1000:.2f} ms")
+    sandboxed = CommandHandler()
+    sandboxed.register_command('add', SandboxedCommand(pool, 'add'))
+    recycling = SandboxPool({'add': 'app.plugins.add'}, 1, max_calls=1)
+    try:
+        print(f"{args.count:,} add calls per run")
+        report('in process', measure(lambda: [local.calculate('add', i, 1) for i in range(args.count)], 3), args.count)
+        report(f'sandboxed, recycle every {args.max_calls}', measure(lambda: [sandboxed.calculate('add', i, 1) for i in range(args.count)], 3), args.count)
+        cold = min(args.count, 200)
+        report('sandboxed, new worker per call', measure(lambda: [recycling.call('add', CALCULATE, (i, 1)) for i in range(cold)], 1), cold)
+    finally:
+        pool.close()
+        recycling.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#cold start time of App + load_plugins with and without the plugin index and on the minimal startup path,
+#exits with status 1 when the minimal path misses the --budget-ms target
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PLUGIN_SOURCE = '''import logging
+import json
+import decimal
+from app.commands import Command
+class Plugin{number}Command(Command):
+    def execute(self):
+        print("plugin {number}")
+'''
+
+STARTUP_SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+from app import App
+class BenchApp(App):
+    plugins_package = "bench_plugins"
+    plugin_path = sys.argv[1]
+app = BenchApp()
+app.load_plugins()
+print(time.perf_counter() - start)
+'''
+
+def make_plugins(root:str, count:int):
+    """
+    Write count trivial plugin packages into root/bench_plugins
+    """
+    package = os.path.join(root, 'bench_plugins')
+    os.makedirs(package)
+    open(os.path.join(package, '__init__.py'), 'w').close()
+    for number in range(count):
+        os.makedirs(os.path.join(package, f'plugin{number}'))
+        with open(os.path.join(package, f'plugin{number}', '__init__.py'), 'w', encoding='utf-8') as f:
+            f.write(PLUGIN_SOURCE.format(number=number))
+    return package
+
+def cold_start(package:str, root:str, use_index:bool, minimal:bool = False):
+    """
+    Start a fresh interpreter and return (in-process seconds, wall clock seconds)
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.getcwd()]), PYTHONDONTWRITEBYTECODE='1',
+               PLUGIN_INDEX='true' if use_index else 'false', PLUGIN_INDEX_PATH=os.path.join(root, 'index.json'),
+               STARTUP='minimal' if minimal else 'full')
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, package], env=env, check=True, capture_output=True, text=True, cwd=root).stdout
+    return float(output.strip().splitlines()[-1]), time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='App startup with and without the plugin index')
+    parser.add_argument('--plugins', type=int, default=300, help='number of synthetic plugins')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=100.0, help='import + App + load_plugins budget for the minimal path')
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, 'logs'))
+        package = make_plugins(root, args.plugins)
+        cold_start(package, root, use_index=True) #build the index once
+        print(f"{args.plugins} plugins, best of {args.repeat} cold starts")
+        for label, use_index, minimal in (('without index', False, False), ('with index', True, False), ('minimal', True, True)):
+            runs = [cold_start(package, root, use_index, minimal) for _ in range(args.repeat)]
+            app_time = min(run[0] for run in runs)
+            wall_time = min(run[1] for run in runs)
+            print(f"{label:<16} import + load_plugins {app_time * 1000:>8.1f} ms   process wall time {wall_time * 1000:>8.1f} ms")
+        within = app_time * 1000 <= args.budget_ms #app_time of the last row, the minimal path
+        print(f"minimal startup {app_time * 1000:.1f} ms, budget {args.budget_ms:.0f} ms: {'ok' if within else 'OVER BUDGET'}")
+        return 0 if within else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
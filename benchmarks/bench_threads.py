@@ -0,0 +1,62 @@
+#scaling of threaded dispatch over thread counts, with the GIL on and, on a free-threaded build (python3.13t), off
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import sysconfig
+from app.commands import CommandHandler
+from app.parallel import ThreadedExecutor
+from app.plugins.add import AddCommand
+from app.plugins.sum import SumCommand
+from benchmarks.harness import measure, report
+
+class SerializedSumCommand(SumCommand):
+    thread_safe = False
+
+def gil_enabled():
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+def make_lines(count:int, values:int):
+    return [f"{'sum' if i % 2 else 'serial'} {' '.join(str(i + j) for j in range(values))}" if i % 4 else f"add {i} 1" for i in range(count)]
+
+def run_current(args):
+    logging.disable(logging.CRITICAL)
+    handler = CommandHandler()
+    handler.register_command('add', AddCommand())
+    handler.register_command('sum', SumCommand())
+    handler.register_command('serial', SerializedSumCommand())
+    lines = make_lines(args.records, args.values)
+    state = 'on' if gil_enabled() else 'off'
+    print(f"GIL {state}: {args.records:,} records (add, sum of {args.values} values, serialized sum), best of {args.repeat}")
+    serial = None
+    for threads in args.threads:
+        executor = ThreadedExecutor(handler, threads, args.chunk_size)
+        seconds = measure(lambda: sum(1 for _ in executor.run(lines)), args.repeat)
+        serial = serial or seconds
+        report(f"GIL {state}, {threads} thread(s)", seconds, args.records)
+        print(f"{'':<40} speedup over 1 thread x{serial / seconds:.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Threaded dispatch scaling with the GIL on and off')
+    parser.add_argument('--records', type=int, default=40_000)
+    parser.add_argument('--values', type=int, default=50, help='values per sum record')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--current', action='store_true', help='only measure this interpreter as it is running')
+    args = parser.parse_args(argv)
+
+    if args.current or not sysconfig.get_config_var('Py_GIL_DISABLED'):
+        if not args.current:
+            print("Not a free-threaded build, the GIL off run needs python3.13t or later")
+        run_current(args)
+        return
+    forwarded = [arg for arg in (argv if argv is not None else sys.argv[1:])]
+    for gil in ('1', '0'):
+        subprocess.run([sys.executable, '-m', 'benchmarks.bench_threads', '--current', *forwarded],
+                       env=dict(os.environ, PYTHON_GIL=gil), check=True)
+
+if __name__ == '__main__':
+    main()
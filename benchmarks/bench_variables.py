@@ -0,0 +1,51 @@
+#changing one input of a variable sheet: incremental recompute of its downstream against recomputing every formula
+import argparse
+import logging
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.multiply import MultiplyCommand
+from app.variables import VariableGraph
+from benchmarks.harness import measure, report
+
+def build_sheet(handler, columns:int, depth:int):
+    """
+    columns independent chains below their own input: c{i}_0 = add in{i} 1, c{i}_k = mul c{i}_{k-1} 1.0001
+    """
+    graph = VariableGraph(handler)
+    for column in range(columns):
+        graph.define(f'in{column}', str(column))
+        graph.define(f'c{column}_0', f'add in{column} 1')
+        for row in range(1, depth):
+            graph.define(f'c{column}_{row}', f'mul c{column}_{row - 1} 1.0001')
+    return graph
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incremental variable recompute against recomputing the whole sheet')
+    parser.add_argument('--columns', type=int, default=100)
+    parser.add_argument('--depth', type=int, default=50)
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    handler = CommandHandler()
+    handler.register_command('add', AddCommand())
+    handler.register_command('multiply', MultiplyCommand())
+    graph = build_sheet(handler, args.columns, args.depth)
+    print(f"{len(graph):,} variables ({args.columns} chains of {args.depth}), {args.edits} input edits, best of {args.repeat}")
+
+    def edit(incremental:bool):
+        for edit in range(args.edits):
+            column = edit % args.columns
+            if incremental:
+                graph.define(f'in{column}', str(edit))
+            else: #what re-entering every formula amounts to: each one is evaluated again
+                graph.variables[f'in{column}'].value = float(edit)
+                graph.propagate(set(graph.variables))
+    report("full recompute per edit", measure(lambda: edit(False), args.repeat), args.edits)
+    report("incremental per edit", measure(lambda: edit(True), args.repeat), args.edits)
+    last = graph.define('in0', '-1')
+    print(f"one edit: recomputed {last.recomputed}, skipped {last.skipped}")
+
+if __name__ == '__main__':
+    main()
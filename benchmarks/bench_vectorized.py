@@ -0,0 +1,52 @@
+#compares the per-call calculate() path with the array path of the arithmetic plugins
+import argparse
+import logging
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.sub import SubCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.divide import DivideCommand
+from app.vectorized import get_numpy
+from benchmarks.harness import measure, report
+
+COMMANDS = {'add': AddCommand, 'sub': SubCommand, 'multiply': MultiplyCommand, 'divide': DivideCommand}
+
+def per_call(handler, name, a, b):
+    """
+    One calculate() call per operand pair, errors handled in python like the REPL does
+    """
+    results = []
+    for x, y in zip(a, b):
+        try:
+            results.append(handler.calculate(name, x, y))
+        except ZeroDivisionError:
+            results.append(None)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-call versus vectorized arithmetic throughput')
+    parser.add_argument('--size', type=int, default=100_000, help='number of operand pairs')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL) #measure the arithmetic, not the log handlers
+    np = get_numpy()
+    rng = np.random.default_rng(0)
+    a = rng.uniform(-1000, 1000, args.size)
+    b = rng.integers(-5, 5, args.size).astype(np.float64) #includes zeros for the divide mask
+    a_list, b_list = a.tolist(), b.tolist()
+
+    handler = CommandHandler()
+    for name, command in COMMANDS.items():
+        handler.register_command(name, command())
+
+    print(f"{args.size:,} operand pairs, best of {args.repeat}")
+    for name in COMMANDS:
+        scalar = measure(lambda: per_call(handler, name, a_list, b_list), args.repeat)
+        vector = measure(lambda: handler.calculate_array(name, a, b), args.repeat)
+        report(f"{name} per-call", scalar, args.size)
+        report(f"{name} vectorized", vector, args.size)
+        print(f"{'':<40} speedup x{scalar / vector:,.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+#shared timing helpers for the benchmark scripts, run them from the repository root e.g. python -m benchmarks.bench_vectorized
+import gc
+import time
+
+def measure(func, repeat:int = 5):
+    """
+    Run func repeat times and return the best wall clock time in seconds. Like timeit, the garbage
+    collector is off while timing, so a collection of what earlier cases left behind is not billed here
+    """
+    best = float('inf')
+    enabled = gc.isenabled()
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+            if enabled:
+                gc.enable()
+    finally:
+        if enabled:
+            gc.enable()
+    return best
+
+def report(name:str, seconds:float, items:int):
+    """
+    Print one aligned result line with the throughput in items per second
+    """
+    rate = items / seconds if seconds else float('inf')
+    print(f"{name:<40} {seconds * 1000:>10.2f} ms {rate:>16,.0f} items/s")
+    return rate
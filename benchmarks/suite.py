@@ -0,0 +1,239 @@
+#reproducible benchmark suite for the command pipeline, results are written as JSON and compared with a stored baseline
+#python -m benchmarks.suite --output results.json --baseline benchmarks/baseline.json --threshold 0.2
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from app import App
+from app.commands import Command, CommandHandler
+from benchmarks.harness import measure
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+ARITHMETIC = ('add', 'sub', 'multiply', 'divide')
+HASH_SEED = '0' #fixed so every run hashes the command names the same way
+
+class NoopCommand(Command):
+    def execute(self):
+        return None
+
+def fresh_app():
+    """
+    Build an App that imports every plugin instead of using the plugin index
+    """
+    app = App()
+    app.settings['PLUGIN_INDEX'] = 'false'
+    return app
+
+def unload_plugins():
+    for name in [name for name in sys.modules if name.startswith('app.plugins.')]:
+        del sys.modules[name]
+
+def bench_plugin_load(scale:int):
+    def load():
+        unload_plugins()
+        fresh_app().load_plugins()
+    return measure(load, 5), 1
+
+def bench_dispatch(scale:int):
+    app = fresh_app()
+    app.load_plugins()
+    handler = app.command_handler
+    count = 20_000 * scale
+    tokens = ('greet', 'GREET', 'gre', 'plus', 'mult')
+    def dispatch():
+        for i in range(count):
+            handler.get_command(tokens[i % 5])
+    return measure(dispatch, 3), count
+
+def bench_plugin(command_name:str):
+    def bench(scale:int):
+        app = fresh_app()
+        app.load_plugins()
+        handler = app.command_handler
+        count = 20_000 * scale
+        def calculate():
+            for i in range(count):
+                handler.calculate(command_name, i, 3)
+        return measure(calculate, 3), count
+    return bench
+
+def bench_execute_inline(scale:int):
+    count = 5_000 * scale
+    with contextlib.redirect_stdout(io.StringIO()):
+        app = fresh_app() #created inside the redirection, its buffered sink binds the stdout of the moment
+        app.load_plugins()
+        handler = app.command_handler
+        def execute():
+            for i in range(count):
+                handler.execute_command(f'add {i} 2')
+        seconds = measure(execute, 3)
+        handler.output.close()
+    return seconds, count
+
+def bench_logging(enabled:bool):
+    def bench(scale:int):
+        count = 20_000 * scale
+        with tempfile.TemporaryDirectory() as root:
+            logger = logging.getLogger('benchmarks.suite')
+            handler = logging.FileHandler(os.path.join(root, 'bench.log'))
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+            logger.addHandler(handler)
+            logger.propagate = False
+            logger.setLevel(logging.INFO if enabled else logging.WARNING)
+            disabled = logging.root.manager.disable
+            logging.disable(logging.NOTSET)
+            try:
+                seconds = measure(lambda: [logger.info("Addition Performed: %s + %s = %s", i, 2, i + 2) for i in range(count)], 3)
+            finally:
+                logging.disable(disabled)
+                logger.removeHandler(handler)
+                handler.close()
+        return seconds, count
+    return bench
+
+def bench_repl(scale:int):
+    """
+    End to end: the REPL reads a scripted stdin, dispatches every line and exits on 'exit'
+    """
+    count = 2_000 * scale
+    script = ''.join(f'{("add", "sub", "mul", "div")[i % 4]} {i} 3\n' for i in range(count)) + 'exit\n'
+    def run():
+        stdin = sys.stdin
+        sys.stdin = io.StringIO(script)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                fresh_app().start() #created inside the redirection, its buffered sink binds the stdout of the moment
+        except SystemExit:
+            pass
+        finally:
+            sys.stdin = stdin
+    return measure(run, 3), count
+
+def bench_registry(size:int):
+    def bench(scale:int):
+        command = NoopCommand()
+        commands = [(f'command{number:05d}', command) for number in range(size)]
+        handler = None
+        def register():
+            nonlocal handler
+            handler = CommandHandler()
+            handler.register_commands(commands) #how load_plugins registers
+        register_seconds = measure(register, 5)
+        count = 20_000 * scale
+        handler.register_command('zeta', command)
+        names = [f'command{number:05d}' for number in range(0, size, max(1, size // 50))]
+        def dispatch():
+            for i in range(count):
+                handler.execute_command(names[i % len(names)])
+            for i in range(count // 10):
+                handler.get_command('ZET') #case folded unique prefix
+        return measure(dispatch, 3), count + count // 10, register_seconds
+    return bench
+
+CASES = {
+    'plugin_load': bench_plugin_load,
+    'dispatch_resolve': bench_dispatch,
+    **{f'plugin_{name}': bench_plugin(name) for name in ARITHMETIC},
+    'execute_inline': bench_execute_inline,
+    'logging_enabled': bench_logging(True),
+    'logging_filtered': bench_logging(False),
+    'repl_end_to_end': bench_repl,
+    **{f'registry_{size}': bench_registry(size) for size in (10, 1_000, 10_000)},
+}
+
+def run_suite(names, scale:int = 1):
+    """
+    Run the selected cases and return {name: {seconds, items, ops_per_sec}}
+    """
+    logging.disable(logging.INFO) #app logging off, the logging cases switch it back on for their own logger
+    results = {}
+    try:
+        for name in names:
+            outcome = CASES[name](scale)
+            seconds, items = outcome[0], outcome[1]
+            results[name] = {'seconds': seconds, 'items': items, 'ops_per_sec': items / seconds if seconds else float('inf')}
+            if len(outcome) > 2:
+                results[name]['register_seconds'] = outcome[2]
+            print(f"{name:<22} {seconds * 1000:>10.2f} ms {results[name]['ops_per_sec']:>16,.0f} ops/s", flush=True)
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+def compare(results:dict, baseline:dict, threshold:float):
+    """
+    Return the cases whose throughput dropped more than threshold (0.2 = 20%) below the baseline,
+    registry cases also count as regressed when registering got that much slower ('<case> register')
+    """
+    regressions = []
+    print(f"\n{'case':<22} {'baseline ops/s':>16} {'current ops/s':>16} {'change':>8}")
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<22} {'-':>16} {result['ops_per_sec']:>16,.0f} {'new':>8}")
+            continue
+        rows = [(name, reference['ops_per_sec'], result['ops_per_sec'])]
+        if 'register_seconds' in result and reference.get('register_seconds'):
+            rows.append((f'{name} register', 1 / reference['register_seconds'], 1 / result['register_seconds'])) #registries built per second, higher is better
+        for row_name, before, after in rows:
+            change = after / before - 1
+            regressed = change < -threshold
+            if regressed:
+                regressions.append(row_name)
+            print(f"{row_name:<22} {before:>16,.0f} {after:>16,.0f} {change:>+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Command pipeline benchmark suite with baseline comparison')
+    parser.add_argument('cases', nargs='*', help=f"cases to run (default all): {', '.join(CASES)}")
+    parser.add_argument('--scale', type=int, default=1, help='multiply the iteration counts')
+    parser.add_argument('--output', metavar='FILE', help='write the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed throughput drop before a case counts as a regression')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline instead of comparing')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+    if os.environ.get('PYTHONHASHSEED') != HASH_SEED: #string hashes move the registry dicts' collisions, runs differ by up to 25%
+        forwarded = argv if argv is not None else sys.argv[1:]
+        return subprocess.run([sys.executable, '-m', 'benchmarks.suite', *forwarded], env=dict(os.environ, PYTHONHASHSEED=HASH_SEED)).returncode
+    with tempfile.TemporaryDirectory() as root: #App writes logs/ and the plugin index relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            results = run_suite(args.cases or list(CASES), args.scale)
+        finally:
+            os.chdir(cwd)
+    report = {'meta': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+                       'scale': args.scale, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}, 'results': results}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline['meta'].get('scale') != args.scale:
+        print(f"Warning: baseline was recorded with --scale {baseline['meta'].get('scale')}")
+    regressions = compare(results, baseline['results'], args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\nNo regressions over {args.threshold:.0%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
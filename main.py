@@ -1,7 +1,73 @@
 #main.py
+import argparse
+import sys
 from app import App
 
+def parse_args(argv=None):
+    """
+    Parse the command line arguments, with no arguments the interactive REPL is started
+    """
+    parser = argparse.ArgumentParser(description='Plugin based calculator')
+    parser.add_argument('--batch', metavar='FILE', help="run the commands in FILE non-interactively ('-' reads stdin)")
+    parser.add_argument('--format', default='text', help='format of the batch input and output: text, csv or jsonl')
+    parser.add_argument('--output', metavar='FILE', help='write batch results to FILE instead of stdout')
+    parser.add_argument('--parallel', action='store_true', help='fan the batch out over a process pool (PARALLEL_WORKERS, PARALLEL_CHUNK_SIZE)')
+    parser.add_argument('--threads', type=int, default=0, metavar='N', help='dispatch the batch on N threads, plugins not declared thread_safe are serialized')
+    parser.add_argument('--replay', metavar='JOURNAL', help='re-run the calculations recorded in a session journal (JOURNAL=true records one)')
+    parser.add_argument('--profile-startup', action='store_true', help='report per phase startup timings and the slowest imports of a cold start (STARTUP=minimal for the minimal path)')
+    parser.add_argument('--coordinator', metavar='HOST:PORT', help='shard the --batch input over workers that connect to HOST:PORT')
+    parser.add_argument('--worker', metavar='HOST:PORT', help='execute batch chunks for the coordinator at HOST:PORT')
+    parser.add_argument('--serve', metavar='HOST:PORT', help='serve commands to concurrent clients over TCP')
+    parser.add_argument('--unix', metavar='PATH', help='serve commands to concurrent clients over a unix socket')
+    args = parser.parse_args(argv)
+    if args.batch or args.replay:
+        from app.batch import FORMATS #batch brings csv and json, the REPL starts without them
+        if args.format not in FORMATS:
+            parser.error(f"argument --format: invalid choice: {args.format!r} (choose from {', '.join(map(repr, FORMATS))})")
+    return args
+
+def parse_address(text:str, default_port:int):
+    """
+    Split HOST:PORT, either part may be left out
+    """
+    host, _, port = (text or '').rpartition(':')
+    return host or '127.0.0.1', int(port or default_port)
+
+def run_batch(app, args):
+    """
+    Stream the batch input through the app and write the results line by line
+    """
+    input_stream = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8', newline='')
+    output_stream = sys.stdout if args.output is None else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        if args.coordinator:
+            return app.run_distributed(input_stream, output_stream, args.format, *parse_address(args.coordinator, 8766))
+        return app.run_batch(input_stream, output_stream, args.format, args.parallel, args.threads)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
 if __name__=='__main__':
+    args = parse_args()
+    if args.profile_startup:
+        from app.startup import profile_startup, format_report
+        print(format_report(*profile_startup()))
+        sys.exit(0)
     app = App()
-    app.start()
-
+    if args.batch:
+        run_batch(app, args)
+    elif args.replay:
+        output_stream = sys.stdout if args.output is None else open(args.output, 'w', encoding='utf-8', newline='')
+        try:
+            app.replay(args.replay, output_stream, args.format)
+        finally:
+            if output_stream is not sys.stdout:
+                output_stream.close()
+    elif args.worker:
+        app.run_worker(*parse_address(args.worker, 8766))
+    elif args.serve or args.unix:
+        app.serve(*parse_address(args.serve, 8765), args.unix)
+    else:
+        app.start()
@@ -0,0 +1,131 @@
+import math
+import pickle
+import random
+import statistics
+import pytest
+from app.aggregate import AggregateCommand, Extreme, Mean, Product, QuantileSketch, Sum, Variance, aggregate_file, iter_chunks, merge_all
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.max import MaxCommand
+from app.plugins.mean import MeanCommand
+from app.plugins.quantile import QuantileCommand
+from app.plugins.sum import SumCommand
+from app.plugins.variance import VarianceCommand
+
+VALUES = [random.Random(7).uniform(-1e6, 1e6) for _ in range(20_000)]
+
+
+@pytest.fixture
+def handler():
+    """Fixture returning a handler with add and the aggregate plugins registered."""
+    handler = CommandHandler()
+    for name, command in (("add", AddCommand()), ("sum", SumCommand()), ("max", MaxCommand()), ("mean", MeanCommand()),
+                          ("variance", VarianceCommand()), ("quantile", QuantileCommand())):
+        handler.register_command(name, command)
+    return handler
+
+
+def test_sum_is_exact():
+    """Test that the running sum matches math.fsum value by value, chunk by chunk and merged."""
+    assert Sum().result() == 0.0
+    single = Sum()
+    for value in (1e100, 1.0, -1e100, 0.1, 0.2):
+        single.update(value)
+    assert single.result() == math.fsum([1e100, 1.0, -1e100, 0.1, 0.2]) and single.count == 5
+    chunked = Sum()
+    for start in range(0, len(VALUES), 999):
+        chunked.update_many(VALUES[start:start + 999])
+    assert chunked.result() == math.fsum(VALUES) and chunked.count == len(VALUES)
+    left, right = Sum(), Sum()
+    left.update_many([1e16, 1.0])
+    right.update_many([1.0, -1e16])
+    assert left.merge(right).result() == 2.0
+
+
+@pytest.mark.parametrize("factory, expected", [
+    (Product, math.prod(VALUES[:50])), (lambda: Extreme(min), min(VALUES)), (lambda: Extreme(max), max(VALUES)),
+    (Mean, statistics.fmean(VALUES)), (Variance, statistics.variance(VALUES))])
+def test_chunks_merge_to_the_single_pass_result(factory, expected):
+    """Test that accumulators fed from separate chunks and merged agree with the whole-input result."""
+    values = VALUES[:50] if factory is Product else VALUES
+    parts = []
+    for start in range(0, len(values), 7_000):
+        part = factory()
+        part.update_many(values[start:start + 7_000])
+        parts.append(pickle.loads(pickle.dumps(part))) #partials can travel between processes
+    assert merge_all(parts).result() == pytest.approx(expected, rel=1e-12)
+    one_by_one = factory()
+    for value in values:
+        one_by_one.update(value)
+    assert one_by_one.result() == pytest.approx(expected, rel=1e-9)
+    assert one_by_one.count == len(values)
+
+
+def test_empty_and_invalid_inputs():
+    """Test the errors for reductions that need values and for bad sketch parameters."""
+    with pytest.raises(ValueError, match="min needs at least one value"):
+        Extreme(min).result()
+    with pytest.raises(ValueError, match="mean needs"):
+        Mean().result()
+    variance = Variance()
+    variance.update(1)
+    with pytest.raises(ValueError, match="at least two values"):
+        variance.result()
+    with pytest.raises(ValueError):
+        QuantileSketch(1.5)
+    with pytest.raises(ValueError):
+        QuantileSketch(0.5, capacity=1)
+    with pytest.raises(ValueError):
+        QuantileSketch().result()
+    with pytest.raises(TypeError, match="new_accumulator"):
+        AggregateCommand()
+
+
+def test_quantile_sketch_bounded_and_accurate():
+    """Test that the sketch is exact for small inputs and keeps rank error and memory small for large ones."""
+    small = QuantileSketch(0.5)
+    small.update_many([5, 1, 3, 2, 4])
+    assert small.result() == 3.0
+    values = list(range(200_000))
+    random.Random(3).shuffle(values)
+    sketches = []
+    for start in range(0, len(values), 50_000):
+        sketch = QuantileSketch(0.9, capacity=256, seed=start)
+        for value in values[start:start + 50_000]:
+            sketch.update(value)
+        sketches.append(sketch)
+    merged = merge_all(sketches)
+    assert merged.count == len(values)
+    assert abs(merged.result() - 0.9 * len(values)) < 0.02 * len(values)
+    assert merged.size() < 256 * 12
+    assert QuantileSketch(0.0).merge(merged).q == 0.0
+
+
+def test_iter_chunks_never_splits_numbers(tmp_path):
+    """Test that file chunks end on whitespace and that invalid items are reported and skipped."""
+    path = tmp_path / "values.txt"
+    path.write_text(" ".join(str(value) for value in VALUES[:2000]) + "\nbad 1.5")
+    with open(path, encoding="utf-8") as f:
+        chunks = list(iter_chunks(f, 100))
+    assert len(chunks) > 10 and all(len(chunk.split()) >= 1 for chunk in chunks)
+    total = Sum()
+    assert aggregate_file(str(path), total, chunk_bytes=100) == [("bad", "could not convert 'bad' to float")]
+    assert total.count == 2001 and total.result() == pytest.approx(math.fsum(VALUES[:2000]) + 1.5)
+
+
+def test_commands(handler, tmp_path, monkeypatch, capsys):
+    """Test the plugins inline, from a bulk file, from a prompt, through calculate and inside a pipeline."""
+    assert handler.execute_command("sum 0.1 0.2 0.3") == 0.6
+    assert "Result: sum of 3 values = 0.6" in capsys.readouterr().out
+    path = tmp_path / "values.txt"
+    path.write_text("1 2 3\n4 x 5\n")
+    assert handler.execute_command(f"mean @{path}") == 3.0
+    assert "Skipped x" in capsys.readouterr().out
+    monkeypatch.setattr("builtins.input", lambda prompt: "2 4 4 4 5 5 7 9")
+    assert handler.execute_command("variance") == pytest.approx(32 / 7)
+    assert handler.calculate("quantile", 0.5, 5, 1, 3) == 3.0
+    assert handler.calculate("max", 1, 9, 3) == 9.0
+    assert handler.execute_command("add 1 2 | sum _ 3 4") == 10.0
+    with pytest.raises(ValueError, match="quantile expects 1 parameter"):
+        handler.calculate("quantile")
+    assert QuantileCommand().calculate_array(0.5, [1.0, 2.0, 3.0]) == 2.0
@@ -0,0 +1,87 @@
+import io
+import json
+import pytest
+from app import App
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+from app import batch
+
+
+@pytest.fixture
+def handler():
+    """Fixture with the arithmetic commands registered, no prompting involved."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", AddCommand())
+    command_handler.register_command("divide", DivideCommand())
+    command_handler.register_command("greet", GreetCommand())
+    return command_handler
+
+def test_command_handler_calculate(handler):
+    """Test that calculate converts operands and never calls input()."""
+    assert handler.calculate("add", "3", "4") == 7.0
+    with pytest.raises(KeyError):
+        handler.calculate("missing", 1, 2)
+    with pytest.raises(TypeError):
+        handler.calculate("greet")
+
+@pytest.mark.parametrize("fmt, line, expected", [
+    ("text", "add 3 4", ("add", ["3", "4"])),
+    ("csv", "add, 3 ,4", ("add", ["3", "4"])),
+    ("jsonl", '{"command": "add", "operands": [3, 4]}', ("add", [3, 4])),
+])
+def test_parse_record(fmt, line, expected):
+    """Test parsing of each supported input format."""
+    assert batch.parse_record(line, fmt) == expected
+
+def test_parse_record_invalid():
+    """Test that malformed records and unknown formats raise ValueError."""
+    with pytest.raises(ValueError):
+        batch.parse_record('{"operands": [1]}', 'jsonl')
+    with pytest.raises(ValueError):
+        batch.parse_record('add 1 2', 'xml')
+
+def test_run_batch_text_errors_are_per_record(handler):
+    """Test that errors are captured per record and the batch keeps going."""
+    stream = io.StringIO("add 3 4\n\n# comment\ndivide 1 0\nfoo 1 2\nadd x 1\n")
+    output = io.StringIO()
+    processed, errors = batch.write_results(batch.run_batch(handler, stream), output)
+    assert (processed, errors) == (4, 3)
+    assert output.getvalue().splitlines() == [
+        "7.0",
+        "Error: Cannot divide by zero",
+        "Error: Command 'foo' not found",
+        "Error: could not convert string to float: 'x'",
+    ]
+
+def test_run_batch_csv_and_jsonl(handler):
+    """Test that csv and jsonl input produce output in the matching format."""
+    output = io.StringIO()
+    batch.write_results(batch.run_batch(handler, io.StringIO("command,a,b\nadd,1,2\ndivide,1,0\n"), 'csv'), output, 'csv')
+    assert output.getvalue().splitlines() == ["add,1,2,3.0,", "divide,1,0,,Cannot divide by zero"]
+
+    output = io.StringIO()
+    batch.write_results(batch.run_batch(handler, io.StringIO('{"command": "add", "operands": [1, 2]}\nnot json\n'), 'jsonl'), output, 'jsonl')
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert lines[0]["result"] == 3.0 and lines[0]["error"] is None
+    assert lines[1]["error"].startswith("Malformed record")
+
+def test_run_batch_is_lazy(handler):
+    """Test that records are consumed one at a time from the input generator."""
+    consumed = []
+    def lines():
+        for i in range(3):
+            consumed.append(i)
+            yield f"add {i} 1\n"
+    records = batch.run_batch(handler, lines())
+    assert next(records)["result"] == 1.0
+    assert consumed == [0]
+
+def test_app_run_batch(monkeypatch):
+    """Test the App batch entry point end to end without touching input()."""
+    monkeypatch.setattr("builtins.input", lambda prompt: pytest.fail("batch mode must not prompt"))
+    app = App()
+    output = io.StringIO()
+    assert app.run_batch(io.StringIO("add 1 1\nmultiply 2 3\n"), output) == (2, 0)
+    assert output.getvalue() == "2.0\n6.0\n"
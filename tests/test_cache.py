@@ -0,0 +1,150 @@
+import pytest
+from app import App
+from app.commands import CommandHandler
+from app.commands.cache import ResultCache
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.cache import CacheCommand
+from unittest.mock import MagicMock, patch
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def test_lru_eviction_and_counters():
+    """Test that the least recently used entry is evicted and counters are kept."""
+    cache = ResultCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == (True, 1) #a becomes most recently used
+    cache.put("c", 3)
+    assert cache.get("b") == (False, None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 1, 1, 2)
+    cache.clear()
+    assert cache.stats()["size"] == 0
+
+def test_ttl_expiry():
+    """Test that entries expire after the configured TTL."""
+    clock = FakeClock()
+    cache = ResultCache(max_size=10, ttl=5, clock=clock)
+    cache.put("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == (True, 1)
+    clock.now = 5.0
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["expirations"] == 1
+
+def test_invalid_size():
+    """Test that a zero sized cache is rejected."""
+    with pytest.raises(ValueError):
+        ResultCache(max_size=0)
+
+def test_handler_memoizes_only_pure_commands():
+    """Test that pure commands are served from the cache and impure ones always run."""
+    handler = CommandHandler(cache=ResultCache(max_size=8))
+    handler.register_command("add", AddCommand())
+    impure = MagicMock()
+    impure.pure = False
+    impure.calculate.return_value = 42
+    handler.register_command("impure", impure)
+
+    with patch.object(AddCommand, "calculate", autospec=True, side_effect=AddCommand.calculate) as calculate: #plugins are slotted, patch the class
+        assert handler.calculate("add", "1", 2) == 3.0
+        assert handler.calculate("add", 1, 2.0) == 3.0
+    assert calculate.call_count == 1
+    handler.calculate("impure", 1)
+    handler.calculate("impure", 1)
+    assert impure.calculate.call_count == 2
+    assert handler.cache.stats()["hits"] == 1
+
+def test_signed_zero_and_variadic_operands(capsys):
+    """Test that 0.0 and -0.0 are different cache keys and n-ary operand lists are not cached."""
+    import math
+    from app.plugins.multiply import MultiplyCommand
+    from app.plugins.sum import SumCommand
+    handler = CommandHandler(cache=ResultCache(max_size=8))
+    handler.register_command("multiply", MultiplyCommand())
+    handler.register_command("sum", SumCommand())
+    assert math.copysign(1.0, handler.calculate("multiply", "0.0", "-1")) == -1.0
+    assert math.copysign(1.0, handler.calculate("multiply", "-0.0", "-1")) == 1.0
+    assert math.copysign(1.0, handler.execute_command("multiply -0.0 -1")) == 1.0
+    assert handler.cache.stats()["size"] == 2 and handler.cache.stats()["hits"] == 1
+    assert handler.calculate("sum", 1, 2, 3) == 6.0
+    assert handler.calculate("sum", 1, 2, 3) == 6.0
+    assert handler.cache.stats()["size"] == 2
+
+def test_errors_are_not_cached():
+    """Test that divide by zero is raised every time instead of being memoized."""
+    handler = CommandHandler(cache=ResultCache(max_size=8))
+    handler.register_command("divide", DivideCommand())
+    for _ in range(2):
+        with pytest.raises(ZeroDivisionError):
+            handler.calculate("divide", 1, 0)
+    assert handler.cache.stats()["size"] == 0
+
+def test_inline_operands_use_the_cache(capsys):
+    """Test that 'add 1 2' typed inline is memoized like calculate() and still prints, and divide by zero is not cached."""
+    handler = CommandHandler(cache=ResultCache(max_size=8))
+    handler.register_command("add", AddCommand())
+    handler.register_command("divide", DivideCommand())
+    with patch.object(AddCommand, "calculate", autospec=True, side_effect=AddCommand.calculate) as calculate:
+        assert handler.execute_command("add 1 2") == 3.0
+        assert handler.execute_command("plus 1.0 2") == 3.0
+        assert handler.calculate("add", 1, 2) == 3.0
+    assert calculate.call_count == 1 and handler.cache.stats()["hits"] == 2
+    assert handler.execute_command("divide 1 0") is None
+    assert handler.execute_command("divide 1 0") is None
+    assert handler.cache.stats()["size"] == 1
+    assert capsys.readouterr().out.splitlines() == ["Result: 1.0 + 2.0 = 3.0"] * 2 + ["Cannot divide by zero"] * 2
+
+def test_cache_keys_include_the_numeric_backend():
+    """Test that switching the numeric backend does not serve results computed with the previous one."""
+    from decimal import Decimal
+    from fractions import Fraction
+    from app import numeric
+    handler = CommandHandler(cache=ResultCache(max_size=8))
+    handler.register_command("divide", DivideCommand())
+    try:
+        assert handler.calculate("divide", "1", "3") == 1 / 3
+        numeric.set_backend("decimal", precision=5)
+        assert handler.calculate("divide", "1", "3") == Decimal("0.33333")
+        numeric.set_backend("decimal", precision=10)
+        assert handler.calculate("divide", "1", "3") == Decimal("0.3333333333")
+        numeric.set_backend("fraction")
+        assert handler.calculate("divide", "1", "3") == Fraction(1, 3)
+        numeric.set_backend("float")
+        assert handler.calculate("divide", "1", "3") == 1 / 3
+    finally:
+        numeric.set_backend("float")
+    assert handler.cache.stats()["hits"] == 1
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, None),
+    ({"CACHE_SIZE": "abc"}, None),
+    ({"CACHE_SIZE": "16", "CACHE_TTL": "2.5"}, (16, 2.5)),
+])
+def test_app_cache_settings(monkeypatch, env, expected):
+    """Test that the cache is configured from the App settings."""
+    for key in ("CACHE_SIZE", "CACHE_TTL"):
+        monkeypatch.delenv(key, raising=False)
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    cache = App().command_handler.cache
+    if expected is None:
+        assert cache is None
+    else:
+        assert (cache.max_size, cache.ttl) == expected
+
+def test_cache_command(capsys):
+    """Test the cache plugin output with the cache on and off."""
+    handler = CommandHandler()
+    assert CacheCommand(handler).execute() is None
+    assert "disabled" in capsys.readouterr().out
+    handler.cache = ResultCache(max_size=4)
+    assert CacheCommand(handler).execute()["max_size"] == 4
+    assert "-hits: 0" in capsys.readouterr().out
@@ -0,0 +1,166 @@
+import io
+import os
+import socket
+import subprocess
+import sys
+import threading
+import pytest
+from app.cluster import Coordinator, Worker, recv_frame, send_frame
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+
+
+@pytest.fixture
+def handler():
+    """Fixture returning a handler with add and divide registered."""
+    handler = CommandHandler()
+    handler.register_command("add", AddCommand())
+    handler.register_command("divide", DivideCommand())
+    return handler
+
+
+@pytest.fixture
+def coordinator():
+    """Fixture returning a coordinator on a free localhost port, closed after the test."""
+    coordinator = Coordinator(port=0, chunk_size=3, task_timeout=2.0, max_pending=2)
+    yield coordinator
+    coordinator.close()
+
+
+def start_worker(handler, coordinator):
+    """Run a Worker against the coordinator in a background thread."""
+    worker = Worker(handler)
+    thread = threading.Thread(target=worker.serve, args=(*coordinator.address, 2.0), daemon=True)
+    thread.start()
+    return worker, thread
+
+
+def test_results_keep_input_order(handler, coordinator):
+    """Test that chunks spread over two workers are merged back in input order."""
+    workers = [start_worker(handler, coordinator) for _ in range(2)]
+    assert coordinator.wait_for_workers(2, timeout=5)
+    lines = [f"add {i} 1" for i in range(20)] + ["divide 1 0", "nope 1"]
+    records = list(coordinator.run(lines))
+    assert [record["result"] for record in records[:20]] == [float(i + 1) for i in range(20)]
+    assert records[20]["error"] == "Cannot divide by zero"
+    assert records[21]["error"] == "Command 'nope' not found"
+    assert coordinator.stats()["redispatched"] == 0
+    coordinator.close()
+    for worker, thread in workers:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    assert sum(worker.tasks for worker, _ in workers) == 8
+
+
+def test_run_batch_csv(handler, coordinator):
+    """Test that run_batch parses the stream like the local batch mode."""
+    start_worker(handler, coordinator)
+    assert coordinator.wait_for_workers(1, timeout=5)
+    records = list(coordinator.run_batch(io.StringIO("command,a,b\nadd,1,2\ndivide,9,3\n"), "csv"))
+    assert [record["result"] for record in records] == [3.0, 3.0]
+
+
+def faulty_worker(address, drop:bool, received:threading.Event, release:threading.Event):
+    """Worker that takes a task and then either hangs up or never answers."""
+    with socket.create_connection(address) as sock:
+        send_frame(sock, {"type": "hello", "pid": 0, "commands": []})
+        recv_frame(sock)
+        received.set()
+        if not drop:
+            release.wait(10)
+
+
+@pytest.mark.parametrize("drop", [True, False])
+def test_lost_chunk_is_redispatched(handler, drop):
+    """Test that a chunk held by a worker that disconnects or times out is run by another worker."""
+    coordinator = Coordinator(port=0, chunk_size=5, task_timeout=0.5)
+    received, release = threading.Event(), threading.Event()
+    try:
+        threading.Thread(target=faulty_worker, args=(coordinator.address, drop, received, release), daemon=True).start()
+        assert coordinator.wait_for_workers(1, timeout=5)
+        def join_when_task_is_held():
+            received.wait(5)
+            start_worker(handler, coordinator)
+        threading.Thread(target=join_when_task_is_held, daemon=True).start()
+        records = list(coordinator.run([f"add {i} {i}" for i in range(5)]))
+        assert [record["result"] for record in records] == [float(2 * i) for i in range(5)]
+        assert coordinator.stats()["redispatched"] == 1
+    finally:
+        release.set()
+        coordinator.close()
+
+
+def test_chunk_lost_too_often_fails_the_run():
+    """Test that a chunk every worker drops is given up after max_attempts instead of being dispatched forever."""
+    coordinator = Coordinator(port=0, chunk_size=5, task_timeout=2.0, max_attempts=2)
+    release = threading.Event()
+    try:
+        def drop_twice():
+            for _ in range(2):
+                faulty_worker(coordinator.address, True, threading.Event(), release)
+        threading.Thread(target=drop_twice, daemon=True).start()
+        with pytest.raises(RuntimeError, match="Chunk 0 failed: lost by 2 workers"):
+            list(coordinator.run(["add 1 2"]))
+        stats = coordinator.stats()
+        assert (stats["redispatched"], stats["failed"], stats["queued"]) == (1, 1, 0)
+    finally:
+        release.set()
+        coordinator.close()
+
+
+def test_collect_gives_up_without_workers():
+    """Test that waiting for a chunk raises once no worker has been connected for worker_wait seconds."""
+    coordinator = Coordinator(port=0, worker_wait=0.2)
+    try:
+        with pytest.raises(RuntimeError, match="No worker connected for 0.2 seconds"):
+            list(coordinator.run(["add 1 2"]))
+    finally:
+        coordinator.close()
+
+
+def test_collect_fails_after_close(coordinator):
+    """Test that waiting for results raises instead of hanging once the coordinator is closed."""
+    results = coordinator.run(["add 1 2"])
+    coordinator.close()
+    with pytest.raises(RuntimeError, match="before every chunk"):
+        list(results)
+    with pytest.raises(ValueError):
+        Coordinator(chunk_size=0)
+
+
+def test_worker_process_from_main(tmp_path):
+    """Test a real 'main.py --worker' process serving a coordinator."""
+    coordinator = Coordinator(port=0, chunk_size=2)
+    host, port = coordinator.address
+    env = dict(os.environ, PLUGIN_INDEX="false")
+    process = subprocess.Popen([sys.executable, os.path.abspath("main.py"), "--worker", f"{host}:{port}"],
+                               cwd=os.getcwd(), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        assert coordinator.wait_for_workers(1, timeout=30)
+        records = list(coordinator.run(["add 1 2", "multiply 3 4", "sub 9 4"]))
+        assert [record["result"] for record in records] == [3.0, 12.0, 5.0]
+    finally:
+        coordinator.close()
+        process.wait(timeout=30)
+    assert process.returncode == 0
+
+
+def test_run_distributed(tmp_path, monkeypatch):
+    """Test App.run_distributed with an in-process worker and the CLUSTER_* settings."""
+    from app import App
+    monkeypatch.chdir(tmp_path)
+    app = App()
+    app.settings.update(CLUSTER_CHUNK_SIZE="2", CLUSTER_WAIT="5")
+    app.load_plugins()
+    port = socket.create_server(("127.0.0.1", 0))
+    address = port.getsockname()[:2]
+    port.close()
+    worker = Worker(app.command_handler)
+    threading.Thread(target=worker.serve, args=(*address, 5.0), daemon=True).start()
+    output = io.StringIO()
+    assert app.run_distributed(io.StringIO('{"command": "add", "operands": [1, 2]}\n{"command": "divide", "operands": [1, 0]}\n'), output, "jsonl", *address) == (2, 1)
+    assert '"result": 3.0' in output.getvalue()
+    app.settings.update(CLUSTER_WAIT="0.1", CLUSTER_MIN_WORKERS="1")
+    with pytest.raises(RuntimeError, match="Fewer than 1 workers"):
+        app.run_distributed(io.StringIO("add 1 2\n"), io.StringIO(), "text", *address)
@@ -0,0 +1,120 @@
+import pytest
+from app import App
+from app.commands import CommandHandler
+from app.commands.dispatch import DispatchTable, AmbiguousCommandError
+from app.plugins.add import AddCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.menu import MenuCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.exit import ExitCommand
+from app.plugin_index import LazyCommand
+
+
+@pytest.fixture
+def handler():
+    command_handler = CommandHandler()
+    command_handler.register_command("add", AddCommand())
+    command_handler.register_command("multiply", MultiplyCommand())
+    command_handler.register_command("menu", MenuCommand(command_handler))
+    command_handler.register_command("greet", GreetCommand())
+    command_handler.register_command("exit", ExitCommand())
+    return command_handler
+
+def test_table_resolution():
+    """Test exact names, case folding, aliases and unique prefixes."""
+    table = DispatchTable()
+    table.add("multiply", ("mul", "times"))
+    table.add("menu", ("help",))
+    assert table.resolve("MULTIPLY") == "multiply"
+    assert table.resolve("Times") == "multiply"
+    assert table.resolve("mul") == "multiply"
+    assert table.resolve("mult") == "multiply"
+    assert table.resolve("he") == "menu"
+    with pytest.raises(AmbiguousCommandError, match="menu, multiply"):
+        table.resolve("m")
+    for token in ("x", ""):
+        with pytest.raises(KeyError):
+            table.resolve(token)
+    assert table.aliases("multiply") == ["mul", "times"]
+
+def test_table_remove_and_reregister():
+    """Test that removing a command prunes its keys so prefixes become unique again."""
+    table = DispatchTable()
+    table.add("menu")
+    table.add("multiply", ("mul",))
+    table.remove("multiply")
+    assert table.resolve("m") == "menu"
+    with pytest.raises(KeyError):
+        table.resolve("mul")
+    table.add("menu", ("m",))
+    table.add("menu", ("help", "HELP"))
+    assert table.aliases("menu") == ["help"]
+    with pytest.raises(KeyError):
+        table.resolve("mx")
+
+def test_aliases_never_steal_names():
+    """Test that an alias matching another command's name is ignored."""
+    table = DispatchTable()
+    table.add("add")
+    table.add("plus", ("add",))
+    assert table.resolve("add") == "add"
+    assert table.aliases("plus") == []
+
+def test_execute_command_splits_arguments(handler, capsys):
+    """Test that 'add 2 3' runs without prompting, via case folding, prefixes and aliases."""
+    assert handler.execute_command("ADD 2 3") == 5.0
+    assert handler.execute_command("mul 2 3") == 6.0
+    assert handler.execute_command("multi", "2", "4") == 8.0
+    assert handler.execute_command("   ") is None
+    assert "Result: 2.0 + 3.0 = 5.0" in capsys.readouterr().out
+
+def test_execute_command_errors(handler, capsys):
+    """Test unknown, ambiguous and argument errors."""
+    handler.execute_command("m")
+    handler.execute_command("nope")
+    handler.execute_command("greet loudly")
+    output = capsys.readouterr().out
+    assert "Command 'm' is ambiguous: menu, multiply" in output
+    assert "Command 'nope' not found" in output
+    assert "Command 'greet' does not accept arguments" in output
+    with pytest.raises(ValueError, match="expects 2 operands"):
+        handler.execute_command("add 1 2 3")
+
+def test_operand_paths_resolve_aliases(handler):
+    """Test that calculate and the quit alias go through the dispatch table."""
+    assert handler.calculate("Plus", 1, 1) == 2.0
+    with pytest.raises(AmbiguousCommandError):
+        handler.calculate("m", 1, 1)
+    with pytest.raises(SystemExit):
+        handler.execute_command("QUIT")
+
+def test_unregister_and_menu_aliases(handler, capsys):
+    """Test that the menu shows aliases and unregistering removes them from dispatch."""
+    handler.execute_command("help")
+    assert "-multiply (mul, times)" in capsys.readouterr().out
+    handler.unregister_command("multiply")
+    assert handler.get_command("m")[0] == "menu"
+
+def test_lazy_alias_does_not_import():
+    """Test that aliases stored in the plugin index are dispatchable before the import."""
+    handler = CommandHandler()
+    lazy = LazyCommand(handler, "greet", "app.plugins.greet", "GreetCommand", aliases=["hello"])
+    handler.register_command("greet", lazy)
+    assert lazy.command is None
+    assert handler.execute_command("hello") == "Hello World!"
+
+def test_repl_dispatches_inline_arguments(monkeypatch, capsys):
+    """Test the REPL with inline operands, a reported error and the exit plugin."""
+    inputs = iter(["add 2 3", "divide 1", "EXIT"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
+    with pytest.raises(SystemExit):
+        App().start()
+    output = capsys.readouterr().out
+    assert "Result: 2.0 + 3.0 = 5.0" in output
+    assert "Error: divide expects 2 operands, got 1" in output
+
+def test_batch_reports_ambiguous_prefix(handler):
+    """Test that batch records name the candidates of an ambiguous prefix."""
+    from app import batch
+    assert batch.execute_record(handler, "m 1 2", "text")["error"] == "Command 'm' is ambiguous: menu, multiply"
+    assert batch.execute_record(handler, "mul 2 2", "text")["result"] == 4.0
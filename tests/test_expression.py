@@ -0,0 +1,70 @@
+import pytest
+from app.commands import CommandHandler
+from app.expression import ExpressionEngine
+from app.plugins.add import AddCommand
+from app.plugins.sub import SubCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.expr import ExprCommand
+from unittest.mock import patch
+
+
+@pytest.fixture
+def handler():
+    """Fixture with the four arithmetic plugins registered."""
+    command_handler = CommandHandler()
+    for name, command in {"add": AddCommand, "sub": SubCommand, "multiply": MultiplyCommand, "divide": DivideCommand}.items():
+        command_handler.register_command(name, command())
+    return command_handler
+
+@pytest.mark.parametrize("text, bindings, expected", [
+    ("(a+b)*c/d", {"a": 1, "b": 2, "c": 3, "d": 4}, 2.25),
+    ("-x + +2", {"x": 5}, -3.0),
+    ("10 - 4 - 3", {}, 3.0),
+    ("2 * 3 + 4 / 8", {}, 6.5),
+])
+def test_evaluate(handler, text, bindings, expected):
+    """Test precedence, associativity, unary operators and variables."""
+    assert ExpressionEngine(handler).evaluate(text, bindings) == expected
+
+def test_dispatches_to_plugins_and_caches(handler):
+    """Test that operators run through the plugins and compiled forms are reused."""
+    engine = ExpressionEngine(handler)
+    with patch.object(AddCommand, "calculate", autospec=True, side_effect=AddCommand.calculate) as calculate: #plugins are slotted, patch the class
+        expression = engine.compile("a + b")
+        assert engine.compile(" a + b ") is expression
+        assert expression.variables == ("a", "b")
+        assert list(expression.evaluate_many({"a": i, "b": 1} for i in range(3))) == [1.0, 2.0, 3.0]
+    assert calculate.call_count == 3
+    assert engine.cache.stats()["hits"] == 1
+    assert repr(expression) == "CompiledExpression('a + b')"
+
+def test_divide_by_zero_semantics(handler):
+    """Test that divide by zero behaves like the divide plugin."""
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        ExpressionEngine(handler).evaluate("a / (b - b)", a=1, b=2)
+
+@pytest.mark.parametrize("text", ["2 ** 3", "__import__('os')", "1 +", "'a' + 'b'", "a % b"])
+def test_rejects_unsupported(handler, text):
+    """Test that anything beyond + - * / numbers and names is rejected at compile time."""
+    with pytest.raises(ValueError):
+        ExpressionEngine(handler).compile(text)
+
+def test_unbound_variable(handler):
+    """Test that missing bindings are reported by name."""
+    with pytest.raises(ValueError, match="y"):
+        ExpressionEngine(handler).evaluate("x + y", x=1)
+
+def test_expr_command_prompts(handler, monkeypatch, capsys):
+    """Test the REPL plugin prompting for the expression and each variable."""
+    inputs = iter(["(a + b) * 2", "1", "oops", "2"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
+    assert ExprCommand(handler).execute() == 6.0
+    assert "Result: (a + b) * 2 = 6.0" in capsys.readouterr().out
+
+def test_expr_command_arguments_and_errors(handler, capsys):
+    """Test inline expressions and error reporting."""
+    command = ExprCommand(handler)
+    assert command.execute("1", "+", "2") == 3.0
+    assert command.execute("1/0") is None
+    assert "Cannot divide by zero" in capsys.readouterr().out
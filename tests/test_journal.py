@@ -0,0 +1,170 @@
+import io
+import logging
+import time
+import pytest
+from app import App
+from app.commands import CommandHandler
+from app.journal import Journal, JournalReader, MAGIC, replay
+from app.plugins.add import AddCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.history import HistoryCommand
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    """Fixture returning the path of a fresh journal file."""
+    return str(tmp_path / "logs" / "session.journal")
+
+
+def test_round_trip_tail_and_aggregate(journal_path):
+    """Test that records read back in order with their types and aggregate per command."""
+    journal = Journal(journal_path, sync_every=1000, sync_interval=60)
+    journal.append("add", ("2", "3"), 5.0, timestamp=10.0)
+    journal.append("divide", ("1", "0"), None, "Cannot divide by zero", timestamp=11.0)
+    journal.append("add", (), 7, timestamp=12.0)
+    journal.close()
+    entries = list(JournalReader(journal_path))
+    assert [tuple(entry) for entry in entries] == [
+        (10.0, "add", ["2", "3"], 5.0, None),
+        (11.0, "divide", ["1", "0"], None, "Cannot divide by zero"),
+        (12.0, "add", [], 7, None),
+    ]
+    assert [entry.command for entry in JournalReader(journal_path).tail(2)] == ["divide", "add"]
+    assert JournalReader(journal_path).aggregate() == {
+        "add": {"calls": 2, "errors": 0, "first": 10.0, "last": 12.0},
+        "divide": {"calls": 1, "errors": 1, "first": 11.0, "last": 11.0},
+    }
+
+
+def test_sync_batching_and_append_after_reopen(journal_path):
+    """Test that fsync happens once per sync_every records and a reopened journal keeps appending."""
+    journal = Journal(journal_path, sync_every=3, sync_interval=60)
+    for number in range(7):
+        journal.append("add", (number, 1), number + 1)
+    assert journal.syncs == 2
+    journal.close()
+    assert journal.syncs == 3
+    journal = Journal(journal_path, sync_every=1)
+    journal.append("greet", (), "Hello World!")
+    journal.close()
+    with open(journal_path, "rb") as f:
+        assert f.read().count(MAGIC) == 1
+    assert len(list(JournalReader(journal_path))) == 8
+
+
+def test_idle_journal_is_synced_by_the_timer(journal_path):
+    """Test that records below sync_every are synced sync_interval after they were written, without another append."""
+    journal = Journal(journal_path, sync_every=1000, sync_interval=0.05)
+    journal.append("add", (1, 2), 3.0)
+    journal.append("add", (2, 2), 4.0)
+    deadline = time.monotonic() + 5
+    while journal.syncs == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert journal.syncs == 1 and journal.pending == 0 and journal.timer is None
+    assert [entry.result for entry in JournalReader(journal_path)] == [3.0, 4.0]
+    journal.close()
+
+
+def test_truncated_tail_and_bad_file(journal_path, tmp_path):
+    """Test that a half written last record is skipped and other files are rejected."""
+    journal = Journal(journal_path)
+    journal.append("add", ("1", "2"), 3.0)
+    journal.append("add", ("3", "4"), 7.0)
+    journal.close()
+    with open(journal_path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 3)
+    assert [entry.result for entry in JournalReader(journal_path)] == [3.0]
+    assert list(JournalReader(str(tmp_path / "missing"))) == []
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a journal at all")
+    with pytest.raises(ValueError, match="Not a session journal"):
+        list(JournalReader(str(other)))
+
+
+def test_reopen_cuts_torn_record(journal_path):
+    """Test that reopening a journal whose last record was torn midway cuts it off before appending."""
+    journal = Journal(journal_path)
+    journal.append("add", ("1", "2"), 3.0)
+    journal.append("greet", (), "Hello World!")
+    journal.close()
+    with open(journal_path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 7) #mid string, a decode would fail on the bytes appended after it
+    journal = Journal(journal_path)
+    journal.append("add", ("3", "4"), 7.0)
+    journal.close()
+    assert [(entry.command, entry.result) for entry in JournalReader(journal_path)] == [("add", 3.0), ("add", 7.0)]
+    with open(journal_path, "wb") as f:
+        f.write(MAGIC[:2]) #torn header
+    Journal(journal_path).close()
+    assert open(journal_path, "rb").read() == MAGIC
+
+
+def test_handler_records_commands_and_errors(journal_path):
+    """Test that dispatched command lines are journaled with their arguments, results and errors."""
+    handler = CommandHandler(journal=Journal(journal_path))
+    handler.register_command("add", AddCommand())
+    handler.register_command("greet", GreetCommand())
+    assert handler.execute_command("add 2 3") == 5.0
+    assert handler.execute_command("greet") == "Hello World!"
+    with pytest.raises(ValueError):
+        handler.execute_command("add 1 2 3")
+    handler.journal.flush()
+    assert [(entry.command, entry.operands, entry.result, entry.error) for entry in JournalReader(journal_path)] == [
+        ("add", ["2", "3"], 5.0, None),
+        ("greet", [], "Hello World!", None),
+        ("add", ["1", "2", "3"], None, "add expects 2 operands, got 3"),
+    ]
+    records = list(replay(handler, journal_path))
+    assert [record["result"] for record in records] == [5.0, "Hello World!", None]
+    assert records[2]["error"] is not None
+
+
+def test_history_command(journal_path, capsys):
+    """Test the history listing, the per command stats and the disabled message."""
+    handler = CommandHandler()
+    history = HistoryCommand(handler)
+    assert history.execute() is None
+    assert "JOURNAL=true" in capsys.readouterr().out
+    handler.journal = Journal(journal_path, sync_every=1000)
+    handler.register_command("add", AddCommand())
+    handler.register_command("history", history)
+    handler.execute_command("add 2 3")
+    handler.execute_command("add 4 5")
+    capsys.readouterr()
+    entries = handler.execute_command("history 1")
+    assert [entry.result for entry in entries] == [9.0]
+    assert "add 4 5 -> 9.0" in capsys.readouterr().out
+    summary = handler.execute_command("history stats")
+    assert summary["add"]["calls"] == 2 and summary["history"]["calls"] == 1
+    handler.journal.flush()
+    assert [entry.result for entry in JournalReader(journal_path)][-2:] == [None, None] #listings are not journaled
+    assert history.execute("many") is None
+    assert "Usage" in capsys.readouterr().out
+
+
+def test_app_journal_and_replay(journal_path, monkeypatch):
+    """Test that JOURNAL records a session that App.replay re-runs as batch results."""
+    monkeypatch.setenv("JOURNAL", "true")
+    monkeypatch.setenv("JOURNAL_PATH", journal_path)
+    monkeypatch.setenv("JOURNAL_SYNC_INTERVAL", "bad")
+    app = App()
+    app.load_plugins()
+    app.command_handler.execute_command("multiply 6 7")
+    app.command_handler.execute_command("greet")
+    app.command_handler.journal.close()
+    monkeypatch.delenv("JOURNAL")
+    output = io.StringIO()
+    assert App().replay(journal_path, output, "csv") == (2, 0)
+    assert output.getvalue().splitlines() == ["multiply,6,7,42.0,", "greet,Hello World!,"]
+
+
+def test_app_starts_without_an_unusable_journal(tmp_path, monkeypatch, caplog):
+    """Test that a JOURNAL_PATH holding another file is left alone and the App runs without a journal."""
+    path = tmp_path / "notes.txt"
+    path.write_text("not a journal")
+    monkeypatch.setenv("JOURNAL", "true")
+    monkeypatch.setenv("JOURNAL_PATH", str(path))
+    with caplog.at_level(logging.WARNING):
+        app = App()
+    assert app.command_handler.journal is None
+    assert "continuing without it" in caplog.text and path.read_text() == "not a journal"
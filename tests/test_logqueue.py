@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+import pytest
+from app import App
+from app import logqueue
+from app.logqueue import BatchingFileHandler
+
+
+@pytest.fixture
+def restore_logging():
+    """Fixture that puts the root logger and logging globals back after a test."""
+    root = logging.getLogger()
+    level, handlers = root.level, list(root.handlers)
+    flags = (logging.logThreads, logging.logProcesses, logging.logMultiprocessing)
+    yield
+    logqueue.shutdown()
+    root.setLevel(level)
+    root.handlers[:] = handlers
+    logging.logThreads, logging.logProcesses, logging.logMultiprocessing = flags
+
+def make_record(message, *args):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, args, None)
+
+def test_batching_file_handler_writes_in_batches(tmp_path):
+    """Test that records are buffered until the batch is full and flushed on close."""
+    path = tmp_path / "batched.log"
+    handler = BatchingFileHandler(str(path), batch_size=3, flush_interval=60)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(4):
+        handler.emit(make_record("line %d", i))
+    assert path.read_text() == "line 0\nline 1\nline 2\n"
+    handler.close()
+    assert path.read_text().endswith("line 3\n")
+
+def test_batching_file_handler_flush_interval(tmp_path):
+    """Test that an elapsed flush interval writes a partial batch."""
+    path = tmp_path / "interval.log"
+    handler = BatchingFileHandler(str(path), batch_size=100, flush_interval=0)
+    handler.emit(make_record("now"))
+    assert path.read_text() == "now\n"
+    handler.close()
+
+def test_queue_profile_formats_on_listener_thread(tmp_path, restore_logging):
+    """Test that the message is merged with its args on the listener thread, not the caller."""
+    formatted_on = []
+    class Spy:
+        def __str__(self):
+            formatted_on.append(threading.current_thread().name)
+            return "spy"
+    logqueue.configure(str(tmp_path / "app.log"), "queue", batch_size=1000, flush_interval=0.05)
+    root = logging.getLogger()
+    root.handlers[:] = [h for h in root.handlers if isinstance(h, logqueue.DeferredQueueHandler)] #pytest's capture handlers format on the caller
+    logging.info("value %s", Spy())
+    time.sleep(0.3) #idle queue triggers a flush
+    assert "value spy" in (tmp_path / "app.log").read_text()
+    assert formatted_on and threading.current_thread().name not in formatted_on
+
+def test_production_profile_skips_disabled_levels(tmp_path, restore_logging):
+    """Test that INFO calls are dropped before formatting in the production profile."""
+    called = []
+    class Spy:
+        def __str__(self):
+            called.append(True)
+            return "spy"
+    logging.logThreads = logging.logProcesses = logging.logMultiprocessing = True
+    logqueue.configure(str(tmp_path / "app.log"), "production")
+    logging.info("value %s", Spy())
+    logging.warning("kept %s", "warning")
+    assert logging.logThreads is False and logging.logProcesses is False
+    logqueue.shutdown()
+    assert not called
+    assert "kept warning" in (tmp_path / "app.log").read_text()
+    assert logging.logThreads and logging.logProcesses and logging.logMultiprocessing #restored for code logging after shutdown
+
+def test_app_selects_queue_profile(monkeypatch, restore_logging):
+    """Test that LOG_PROFILE switches App.configure_logging to the queue pipeline."""
+    monkeypatch.setenv("LOG_PROFILE", "queue")
+    monkeypatch.setattr("os.path.exists", lambda path: False)
+    with pytest.MonkeyPatch.context() as patch:
+        calls = []
+        patch.setattr(logqueue, "configure", lambda *args: calls.append(args))
+        App.configure_logging(object.__new__(App))
+    assert calls == [("logs/app.log", "queue", 256, 1.0)]
@@ -0,0 +1,166 @@
+import gc
+import io
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import importlib.util
+import pytest
+import app.plugins
+from app import App, memory
+from app.commands import Command, CommandHandler
+from app.commands.cache import ResultCache
+from app.commands.metrics import CommandMetrics
+from app.output import TextSink
+from app.plugin_index import LazyCommand
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.mem import MemCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.sum import SumCommand
+
+LEAKY = '''
+BLOCKS = []
+
+def grow(count):
+    BLOCKS.extend(bytearray(1000) for _ in range(count))
+'''
+
+
+class HandMade(Command):
+    """Command registered by hand, not from a plugin module."""
+    def execute(self):
+        return "hand made"
+
+
+@pytest.fixture
+def keep_plugin_modules(monkeypatch):
+    """Fixture restoring the plugin modules an unload drops, other tests hold classes from them."""
+    for name in ("greet", "multiply", "add", "divide", "sum"):
+        monkeypatch.setitem(sys.modules, f"app.plugins.{name}", sys.modules[f"app.plugins.{name}"])
+        monkeypatch.setattr(app.plugins, name, sys.modules[f"app.plugins.{name}"])
+
+
+@pytest.fixture
+def tracing():
+    """Fixture tracing allocations for the test only, tracing slows everything else down."""
+    tracemalloc.start(8)
+    yield
+    tracemalloc.stop()
+
+
+def test_allocations_are_attributed_to_plugins(tmp_path, tracing):
+    """Test that memory allocated by a plugin's code counts for that plugin and growth is flagged."""
+    plugin_path = tmp_path / "plugins"
+    (plugin_path / "leaky").mkdir(parents=True)
+    (plugin_path / "leaky" / "__init__.py").write_text(LEAKY)
+    spec = importlib.util.spec_from_file_location("leaky_plugin", plugin_path / "leaky" / "__init__.py")
+    leaky = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(leaky)
+    monitor = memory.MemoryMonitor(CommandHandler(), growth_threshold=50_000, plugin_path=str(plugin_path))
+    assert memory.plugin_of(str(plugin_path / "leaky" / "__init__.py"), str(plugin_path)) == "leaky"
+    assert memory.plugin_of(__file__, str(plugin_path)) is None
+    assert monitor.check() == []
+    leaky.grow(100)
+    growth = monitor.check()
+    assert [item.plugin for item in growth] == ["leaky"] and growth[0].size_diff >= 100_000 and growth[0].count_diff >= 100
+    assert monitor.check() == [] and monitor.checks == 3
+
+
+def test_idle_plugins_are_unloaded_and_come_back(keep_plugin_modules):
+    """Test that idle plugins become placeholders, their modules are forgotten and the next dispatch imports them again."""
+    handler = CommandHandler()
+    for name, command in (("greet", GreetCommand()), ("multiply", MultiplyCommand()), ("add", AddCommand()), ("hand", HandMade())):
+        handler.register_command(name, command)
+    start = time.monotonic()
+    assert memory.unload_idle(handler, 10, now=start) == []
+    handler.last_used["add"] = start + 8
+    assert sorted(memory.unload_idle(handler, 10, now=start + 10)) == ["greet", "multiply"]
+    assert isinstance(handler.commands["greet"], LazyCommand) and isinstance(handler.commands["add"], AddCommand)
+    assert "app.plugins.greet" not in sys.modules and not hasattr(app.plugins, "greet")
+    assert handler.execute_command("mul 6 7") == 42.0
+    assert type(handler.commands["multiply"]).__name__ == "MultiplyCommand" and "app.plugins.multiply" in sys.modules
+    assert handler.commands["multiply"].__class__ is not MultiplyCommand #a fresh import
+    assert handler.execute_command("hand") == "hand made"
+    assert handler.last_used["multiply"] >= start and "greet" not in handler.last_used
+
+
+def test_mem_command(keep_plugin_modules):
+    """Test the mem command switching tracing on and off and reporting per plugin memory."""
+    handler = CommandHandler(output=TextSink(io.StringIO(), flush_size=1 << 20))
+    handler.register_command("mem", MemCommand(handler))
+    handler.register_command("add", AddCommand())
+    assert handler.execute_command("mem") == {"rss": pytest.approx(memory.rss_bytes(), rel=0.5), "tracing": False}
+    assert handler.execute_command("mem diff") is None
+    try:
+        assert handler.execute_command("mem start") and handler.memory.tracing
+        handler.execute_command("add 1 2")
+        report = handler.execute_command("mem")
+        assert report["plugins_loaded"] == 2 and report["traced"] > 0 and report["rss"] > 0
+        assert len(handler.execute_command("mem top 3")) == 3
+        assert handler.execute_command("mem diff") == [] and handler.execute_command("mem diff 2") is not None
+        assert handler.execute_command("mem check") == []
+        assert sorted(handler.execute_command("mem unload 0")) == ["add", "mem"]
+        assert handler.execute_command("mem unload x") is None
+    finally:
+        handler.memory.stop()
+    assert not tracemalloc.is_tracing()
+    handler.output.flush()
+    text = handler.output.stream.getvalue()
+    assert "tracing is off" in text and "Memory tracing started" in text and "Unloaded: add, mem" in text
+    assert text.rstrip().endswith("Usage: mem [start|stop|top N|diff N|check|unload SECONDS]")
+
+
+def test_app_footprint(monkeypatch):
+    """Test that the App keeps no copy of the environment, adds one console handler and builds the monitor from settings."""
+    monkeypatch.delenv("LOG_PROFILE", raising=False)
+    monkeypatch.setenv("PLUGIN_IDLE_UNLOAD", "60")
+    monkeypatch.setenv("MEMORY_CHECK_INTERVAL", "5")
+    first = App()
+    second = App()
+    assert second.settings["PLUGIN_IDLE_UNLOAD"] == "60" and second.settings["ENV"]
+    assert len(second.settings.maps[0]) <= 2 #only what the App itself set
+    console = [handler for handler in logging.getLogger("app").handlers if type(handler) is logging.StreamHandler]
+    assert len(console) <= 1
+    monitor = second.command_handler.memory
+    assert monitor.idle_unload == 60.0 and monitor.interval == 5.0 and not monitor.tracing
+    assert second.command_handler.last_used == {}
+    monkeypatch.setenv("PLUGIN_IDLE_UNLOAD", "soon")
+    assert App().command_handler.memory is None
+    monkeypatch.delenv("PLUGIN_IDLE_UNLOAD")
+    assert App().command_handler.memory is None
+
+
+def test_soak_memory_is_bounded(keep_plugin_modules):
+    """Test that a long mixed workload, plugin unloads included, levels off instead of growing with the command count."""
+    tracemalloc.start(1) #totals only, one frame keeps the overhead low
+    with open(os.devnull, "w") as devnull:
+        handler = CommandHandler(cache=ResultCache(256), metrics=CommandMetrics(), output=TextSink(devnull, flush_size=4096))
+        for name, command in (("add", AddCommand()), ("multiply", MultiplyCommand()), ("divide", DivideCommand()), ("sum", SumCommand())):
+            handler.register_command(name, command)
+        handler.execute_command("a = 1")
+        handler.execute_command("b = add a 2")
+        handler.execute_command("c = mul b b")
+
+        def run_round(number):
+            for i in range(300):
+                handler.execute_command(f"add {i} {number}")
+                handler.calculate("multiply", i, number) #through the result cache
+                handler.execute_command(f"divide {i} {i % 3}")
+                handler.execute_command(f"sum {i} 1 2 3")
+                handler.execute_command(f"a = {i % 50}")
+            handler.execute_command("add 1 2 | multiply _ 3")
+            memory.unload_idle(handler, 0)
+
+        for number in range(3):
+            run_round(number)
+        gc.collect()
+        baseline = tracemalloc.get_traced_memory()[0]
+        for number in range(3, 15):
+            run_round(number)
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    assert growth < 256 * 1024, f"traced memory grew {growth / 1024:.1f} KiB over 14,400 commands"
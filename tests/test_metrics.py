@@ -0,0 +1,86 @@
+import json
+import pytest
+from app import App
+from app.commands import CommandHandler
+from app.commands.metrics import CommandMetrics, CommandStats
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.stats import StatsCommand
+
+
+@pytest.fixture
+def handler():
+    """Fixture with instrumentation switched on."""
+    command_handler = CommandHandler(metrics=CommandMetrics())
+    command_handler.register_command("add", AddCommand())
+    command_handler.register_command("divide", DivideCommand())
+    command_handler.register_command("greet", GreetCommand())
+    return command_handler
+
+def test_percentiles_from_histogram():
+    """Test that percentiles come from the bucket holding that share of calls."""
+    stats = CommandStats()
+    for _ in range(98):
+        stats.record(1e-6, False)
+    stats.record(0.001, False)
+    stats.record(100.0, True)
+    summary = stats.summary()
+    assert summary["calls"] == 100 and summary["errors"] == 1
+    assert summary["p50_seconds"] == 1e-6
+    assert 0.001 <= summary["p99_seconds"] < 0.0021
+    assert stats.percentile(1.0) == 100.0 #beyond the last bucket the max is reported
+    assert CommandStats().percentile(0.5) == 0.0
+
+def test_dispatch_is_recorded(handler, capsys):
+    """Test that execute_command and calculate are timed and errors counted."""
+    handler.execute_command("greet")
+    handler.calculate("add", 1, 2)
+    with pytest.raises(ZeroDivisionError):
+        handler.calculate("divide", 1, 0)
+    handler.execute_command("missing")
+    commands = handler.metrics.snapshot()["commands"]
+    assert set(commands) == {"greet", "add", "divide"}
+    assert commands["divide"]["errors"] == 1
+    assert commands["add"]["calls"] == 1 and commands["add"]["throughput_per_second"] > 0
+
+def test_prometheus_and_json_export(handler, tmp_path):
+    """Test both export formats."""
+    handler.calculate("add", 1, 2)
+    handler.metrics.record_import("add", 0.002)
+    text = handler.metrics.to_prometheus()
+    assert 'calculator_command_calls_total{command="add"} 1' in text
+    assert 'calculator_command_seconds_bucket{command="add",le="+Inf"} 1' in text
+    assert 'calculator_plugin_import_seconds{plugin="add"} 0.002' in text
+    path = handler.metrics.export(str(tmp_path / "stats.json"))
+    assert json.load(open(path))["commands"]["add"]["calls"] == 1
+    with pytest.raises(ValueError):
+        handler.metrics.export(str(tmp_path / "stats.xml"), "xml")
+
+def test_stats_command(handler, tmp_path, capsys):
+    """Test the stats plugin table, export arguments and usage message."""
+    stats = StatsCommand(handler)
+    handler.calculate("add", 1, 2)
+    handler.metrics.record_import("add", 0.001)
+    assert stats.execute()["commands"]["add"]["calls"] == 1
+    output = capsys.readouterr().out
+    assert "add" in output and "-import add" in output
+    path = str(tmp_path / "stats.prom")
+    assert handler.execute_command("stats", "prometheus", path) is None #not registered yet
+    handler.register_command("stats", stats)
+    assert handler.execute_command("stats", "prometheus", path) == path
+    assert "calculator_command_calls_total" in open(path).read()
+    assert stats.execute("json") is None
+    assert "Usage" in capsys.readouterr().out
+
+def test_stats_command_disabled(capsys):
+    """Test the stats plugin when instrumentation is off."""
+    assert StatsCommand(CommandHandler()).execute() is None
+    assert "disabled" in capsys.readouterr().out
+
+def test_app_records_plugin_imports(monkeypatch):
+    """Test that METRICS=true enables instrumentation including plugin import times."""
+    monkeypatch.setenv("METRICS", "true")
+    app = App()
+    app.load_plugins()
+    assert "add" in app.command_handler.metrics.snapshot()["plugin_import_seconds"]
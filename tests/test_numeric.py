@@ -0,0 +1,95 @@
+import io
+import json
+from decimal import Decimal
+from fractions import Fraction
+import pytest
+from app import App
+from app import batch
+from app import numeric
+from app.commands import CommandHandler
+from app.expression import ExpressionEngine
+from app.plugins.add import AddCommand, get_float
+from app.plugins.sub import SubCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.divide import DivideCommand
+
+
+@pytest.fixture(autouse=True)
+def float_backend_afterwards():
+    """Fixture restoring the default backend, the selection is process wide."""
+    yield
+    numeric.set_backend("float")
+
+@pytest.fixture
+def handler():
+    command_handler = CommandHandler()
+    for name, command in {"add": AddCommand, "sub": SubCommand, "multiply": MultiplyCommand, "divide": DivideCommand}.items():
+        command_handler.register_command(name, command())
+    return command_handler
+
+@pytest.mark.parametrize("backend, expected", [
+    ("float", 0.30000000000000004),
+    ("decimal", Decimal("0.3")),
+    ("fraction", Fraction(3, 10)),
+])
+def test_backends_add(handler, backend, expected):
+    """Test that each backend keeps its own type and exactness through the plugins."""
+    numeric.set_backend(backend)
+    result = handler.calculate("add", "0.1", 0.2)
+    assert result == expected and type(result) is type(expected)
+
+def test_decimal_context_precision_and_rounding(handler):
+    """Test that the configured decimal context rounds every operation."""
+    numeric.set_backend("decimal", precision=4, rounding="ROUND_DOWN")
+    assert handler.calculate("divide", 2, 3) == Decimal("0.6666")
+    assert handler.calculate("multiply", "1.23456", 1) == Decimal("1.234")
+    with pytest.raises(ZeroDivisionError):
+        handler.calculate("divide", 1, 0)
+
+def test_exact_money_sum(handler):
+    """Test that ten cents added a thousand times is exact with decimal and fraction."""
+    for backend in ("decimal", "fraction"):
+        numeric.set_backend(backend)
+        total = numeric.parse(0)
+        for _ in range(1000):
+            total = handler.calculate("add", total, "0.10")
+        assert total == numeric.parse("100")
+
+def test_get_float_uses_backend(monkeypatch):
+    """Test that prompted operands are parsed by the current backend."""
+    numeric.set_backend("decimal")
+    inputs = iter(["abc", "1.10"])
+    monkeypatch.setattr("builtins.input", lambda prompt: next(inputs))
+    assert get_float("n: ") == Decimal("1.10")
+
+def test_invalid_values_and_backends():
+    """Test parse errors and unknown backend names."""
+    with pytest.raises(ValueError):
+        numeric.set_backend("decimal").parse("abc")
+    with pytest.raises(ValueError):
+        numeric.set_backend("fraction").parse(None)
+    with pytest.raises(ValueError):
+        numeric.set_backend("complex")
+    with pytest.raises(ValueError):
+        numeric.set_backend("decimal", precision=0)
+
+def test_expression_and_jsonl_with_decimal(handler):
+    """Test that expression constants and jsonl output follow the backend."""
+    numeric.set_backend("decimal")
+    assert ExpressionEngine(handler).evaluate("0.1 + 0.2 * x", x="3") == Decimal("0.7")
+    output = io.StringIO()
+    batch.write_results(batch.run_batch(handler, io.StringIO('{"command": "add", "operands": ["0.1", "0.2"]}\n'), "jsonl"), output, "jsonl")
+    assert json.loads(output.getvalue())["result"] == "0.3"
+
+@pytest.mark.parametrize("settings, expected", [
+    ({"NUMERIC_BACKEND": "decimal", "DECIMAL_PRECISION": "6"}, "decimal"),
+    ({"NUMERIC_BACKEND": "fraction"}, "fraction"),
+    ({"NUMERIC_BACKEND": "bogus"}, "float"),
+])
+def test_app_selects_backend(settings, expected):
+    """Test NUMERIC_BACKEND selection with fallback to float on bad values."""
+    app = App()
+    app.settings.update(settings)
+    assert app.configure_numeric_backend().name == expected
+    if expected == "decimal":
+        assert numeric.get_backend().context.prec == 6
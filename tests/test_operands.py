@@ -0,0 +1,71 @@
+from array import array
+import pytest
+from app import vectorized
+from app.commands import CommandHandler
+from app.commands.operands import OperandSpec, parse_bulk
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+
+
+def no_numpy():
+    raise RuntimeError("numpy missing")
+
+
+def test_parse_bulk_fast_path():
+    """Test that valid text is split into float64 columns row by row."""
+    (a, b), errors = parse_bulk("1 2\n3.5 -4\n1e3 nan\n", 2)
+    assert errors == []
+    assert a.tolist() == [1.0, 3.5, 1000.0] and b.tolist()[:2] == [2.0, -4.0]
+    (single,), _ = parse_bulk("", 1)
+    assert len(single) == 0
+
+
+def test_parse_bulk_reports_each_invalid_item():
+    """Test that rows with invalid or missing items are dropped and every bad item is reported."""
+    (a, b), errors = parse_bulk("1 2\nx 4\n5 y\n6 7\n8", 2)
+    assert a.tolist() == [1.0, 6.0] and b.tolist() == [2.0, 7.0]
+    assert errors == [
+        (2, "x", "could not convert 'x' to float"),
+        (3, "y", "could not convert 'y' to float"),
+        (5, "8", "expected 2 values, got 1"),
+    ]
+
+
+def test_parse_bulk_without_numpy(monkeypatch):
+    """Test that array('d') columns are returned when numpy is not installed."""
+    monkeypatch.setattr(vectorized, "get_numpy", no_numpy)
+    (a, b), errors = parse_bulk("1 2 3 4", 2)
+    assert a == array("d", [1.0, 3.0]) and b == array("d", [2.0, 4.0]) and errors == []
+    (a, b), errors = parse_bulk("1 2 bad 4", 2)
+    assert a == array("d", [1.0]) and len(errors) == 1
+
+
+def test_operand_spec_inline_and_prompts(monkeypatch):
+    """Test that operands come from inline arguments or one prompt each."""
+    spec = OperandSpec("add", "first: ", "second: ")
+    assert spec.acquire(("2", "3.5")) == [2.0, 3.5]
+    with pytest.raises(ValueError, match="add expects 2 operands, got 1"):
+        spec.acquire(("2",))
+    prompts = []
+    inputs = iter(["oops", "4", "5"])
+    monkeypatch.setattr("builtins.input", lambda prompt: prompts.append(prompt) or next(inputs))
+    assert spec.acquire() == [4.0, 5.0]
+    assert prompts == ["first: ", "first: ", "second: "]
+    assert spec.is_bulk(("@rows.txt",)) and not spec.is_bulk(("1", "2")) and not spec.is_bulk(())
+
+
+def test_bulk_file_through_plugins(tmp_path, capsys):
+    """Test that 'add @file' computes every row through the array path and reports bad rows."""
+    rows = tmp_path / "rows.txt"
+    rows.write_text("1 2\n3 4\n" + "bad 1\n" * 12 + "5 0\n")
+    handler = CommandHandler()
+    handler.register_command("add", AddCommand())
+    handler.register_command("divide", DivideCommand())
+    result = handler.execute_command(f"add @{rows}")
+    assert result.tolist() == [3.0, 7.0, 5.0]
+    out = capsys.readouterr().out
+    assert "Row 3: could not convert 'bad' to float" in out
+    assert "... 2 more invalid rows" in out
+    assert "Result: 3 rows computed" in out and "12 invalid rows skipped" in out
+    quotients = handler.execute_command(f"divide @{rows}")
+    assert quotients.mask.tolist() == [False, False, True]
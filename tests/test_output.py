@@ -0,0 +1,171 @@
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+from array import array
+import pytest
+from app.commands import Command, CommandHandler
+from app.output import STDOUT, BinarySink, RecordSink, TextSink, create_sink
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+
+
+class TTYStream(io.StringIO):
+    """StringIO that claims to be a terminal."""
+    def isatty(self):
+        return True
+
+
+def make_handler(sink):
+    """Build a handler writing to sink with add, divide and greet registered."""
+    handler = CommandHandler(output=sink)
+    for name, command in (("add", AddCommand()), ("divide", DivideCommand()), ("greet", GreetCommand())):
+        handler.register_command(name, command)
+    return handler
+
+
+def test_text_sink_buffers_until_flush_size():
+    """Test that writes are joined and written once flush_size characters are pending."""
+    stream = io.StringIO()
+    sink = TextSink(stream, flush_size=20, flush_interval=60)
+    sink.write("Result:", 1)
+    assert stream.getvalue() == "" and sink.pending == 10
+    sink.write("Result: 2")
+    sink.write("Result: 3")
+    assert stream.getvalue() == "Result: 1\nResult: 2\n" and sink.flushes == 1
+    sink.close()
+    assert stream.getvalue().endswith("Result: 3\n")
+    interval = TextSink(stream, flush_size=1 << 20, flush_interval=0)
+    interval.write("now")
+    assert stream.getvalue().endswith("now\n")
+
+
+def test_read_keeps_prompt_in_order(monkeypatch):
+    """Test that a buffered sink writes pending output and the prompt before input() blocks."""
+    seen = []
+    stream = io.StringIO()
+    monkeypatch.setattr("builtins.input", lambda prompt: seen.append((prompt, stream.getvalue())) or "add 1 2")
+    monkeypatch.setattr("app.output.input_ready", lambda: False)
+    buffered = TextSink(stream, flush_size=1024)
+    buffered.write("Result: 3")
+    assert buffered.read(">>>") == "add 1 2" and seen == [("", "Result: 3\n>>>")]
+    monkeypatch.setattr("app.output.input_ready", lambda: True)
+    buffered.write("Result: 4")
+    buffered.read(">>>")
+    assert seen[-1] == ("", "Result: 3\n>>>") and buffered.pending == 13 #the next line is waiting, nothing blocks
+    buffered.close()
+    assert TextSink(stream).read(">>>") == "add 1 2" and seen[-1][0] == ">>>"
+
+
+def test_text_sink_flushes_on_timer_and_keeps_its_stream(monkeypatch):
+    """Test that buffered output is written after flush_interval without another write, to the stream bound at creation."""
+    stream = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", stream)
+    sink = TextSink(flush_size=1 << 20, flush_interval=0.01)
+    sink.write("Result: 3")
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    sink.timer.join(5)
+    assert stream.getvalue() == "Result: 3\n" and sink.timer is None
+    sink.close()
+
+
+def test_create_sink_keeps_terminals_unbuffered(monkeypatch):
+    """Test that text to a terminal is unbuffered, anything else is buffered, and unknown formats fail."""
+    assert create_sink("text", TTYStream()).interactive
+    monkeypatch.setattr(sys, "stdout", TTYStream())
+    assert create_sink("text") is STDOUT
+    assert not create_sink("text", io.StringIO(), flush_size=10).interactive
+    assert isinstance(create_sink("csv", io.StringIO()), RecordSink)
+    assert isinstance(create_sink("binary", io.BytesIO()), BinarySink)
+    with pytest.raises(ValueError, match="Unknown output format"):
+        create_sink("xml")
+
+
+def test_handler_passes_sink_to_commands():
+    """Test that registered commands write through the handler's sink and keep the default otherwise."""
+    stream = io.StringIO()
+    sink = TextSink(stream, flush_size=1024)
+    handler = make_handler(sink)
+    assert handler.commands["add"].output is sink and AddCommand().output is STDOUT
+    assert handler.execute_command("add 2 3") == 5.0
+    handler.execute_command("nope")
+    assert stream.getvalue() == ""
+    sink.flush()
+    assert stream.getvalue() == "Result: 2.0 + 3.0 = 5.0\nCommand 'nope' not found\n"
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_record_sink(fmt):
+    """Test that structured sinks get one record per command line and none of the command text."""
+    stream = io.StringIO()
+    sink = RecordSink(stream, fmt, flush_size=1024)
+    handler = make_handler(sink)
+    handler.execute_command("add 1 2")
+    handler.execute_command("greet")
+    handler.execute_command("nope 1")
+    handler.execute_command("add 1 2 | divide _ 3")
+    with pytest.raises(ValueError):
+        handler.execute_command("add x 1")
+    sink.close()
+    lines = stream.getvalue().splitlines()
+    if fmt == "jsonl":
+        records = [json.loads(line) for line in lines]
+        assert [record["result"] for record in records[:2]] == [3.0, "Hello World!"]
+        assert records[2]["error"] == "Command 'nope' not found"
+        assert records[3] == {"command": "pipeline", "operands": ["add 1 2 | divide _ 3"], "result": 1.0, "error": None}
+        assert records[4]["command"] == "add" and records[4]["error"]
+    else:
+        assert lines[:3] == ["add,1,2,3.0,", "greet,Hello World!,", "nope,1,,Command 'nope' not found"]
+
+
+def test_binary_sink():
+    """Test that the binary sink packs one float64 per command, NaN for errors and text."""
+    stream = io.BytesIO()
+    sink = BinarySink(stream, flush_size=1024)
+    handler = make_handler(sink)
+    for line in ("add 1 2", "greet", "nope", "divide 9 3"):
+        handler.execute_command(line)
+    sink.flush()
+    values = array("d", stream.getvalue())
+    assert values[0] == 3.0 and math.isnan(values[1]) and math.isnan(values[2]) and values[3] == 3.0
+
+
+@pytest.mark.parametrize("fmt", ["text", "jsonl"])
+def test_repl_output_to_file(tmp_path, fmt):
+    """Test a scripted REPL with stdout redirected: text output matches print(), jsonl holds records only."""
+    path = tmp_path / "out.txt"
+    env = dict(os.environ, OUTPUT_FORMAT=fmt, PLUGIN_INDEX="false")
+    with open(path, "w") as out:
+        subprocess.run([sys.executable, os.path.abspath("main.py")], input="add 1 2\ngreet\nexit\n", text=True,
+                       stdout=out, env=env, cwd=os.getcwd(), timeout=60)
+    if fmt == "text":
+        assert path.read_text() == ("Type 'Exit to quit the program\n>>>Result: 1.0 + 2.0 = 3.0\n"
+                                    ">>>Hello World!\n>>>Exiting the program...\n")
+    else:
+        assert [json.loads(line)["result"] for line in path.read_text().splitlines()] == [3.0, "Hello World!"]
+
+
+def test_slotted_command_takes_the_handler_sink():
+    """Test that a command declaring __slots__ has no __dict__ and still gets the handler's sink on registration."""
+    class SlottedCommand(Command):
+        __slots__ = ("calls",)
+        def __init__(self):
+            self.calls = 0
+        def execute(self):
+            self.calls += 1
+            self.output.write("slotted", self.calls)
+            return self.calls
+    stream = io.StringIO()
+    sink = TextSink(stream, flush_size=1024)
+    command = SlottedCommand()
+    assert not hasattr(command, "__dict__") and command.output is STDOUT
+    handler = make_handler(sink)
+    handler.register_command("slotted", command)
+    assert command.output is sink and handler.execute_command("slotted") == 1
+    sink.flush()
+    assert stream.getvalue().endswith("slotted 1\n")
+    assert not hasattr(GreetCommand(), "__dict__") and not hasattr(AddCommand(), "__dict__")
+
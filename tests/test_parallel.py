@@ -0,0 +1,52 @@
+import io
+import pytest
+from app import App
+from app import batch
+from app import parallel
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.parallel import ParallelExecutor, chunked
+
+
+@pytest.fixture
+def handler():
+    """Fixture with add and divide registered."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", AddCommand())
+    command_handler.register_command("divide", DivideCommand())
+    return command_handler
+
+def test_chunked():
+    """Test that chunks keep order and the last chunk may be short."""
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(chunked([], 3)) == []
+
+def test_parallel_matches_serial_order_and_errors(handler):
+    """Test that parallel results come back in input order with per-item errors."""
+    lines = [f"divide {i} {i % 4}" for i in range(50)] + ["missing 1 2"]
+    serial = [batch.execute_record(handler, line, "text") for line in lines]
+    results = list(ParallelExecutor(handler, workers=2, chunk_size=4).run(lines))
+    assert results == serial
+    assert results[0]["error"] == "Cannot divide by zero"
+    assert results[-1]["error"] == "Command 'missing' not found"
+
+def test_invalid_chunk_size(handler):
+    """Test that a chunk size below one is rejected."""
+    with pytest.raises(ValueError):
+        ParallelExecutor(handler, chunk_size=0)
+
+def test_worker_builds_its_own_handler(monkeypatch):
+    """Test the spawned-worker path that loads the plugins itself."""
+    monkeypatch.setattr(parallel, "_command_handler", None)
+    parallel._init_worker()
+    assert parallel._run_chunk(["add 1 2", "divide 1 0"], "text")[0]["result"] == 3.0
+
+def test_app_run_batch_parallel():
+    """Test the App entry point with settings driven worker count and chunk size."""
+    app = App()
+    app.settings.update({"PARALLEL_WORKERS": "2", "PARALLEL_CHUNK_SIZE": "2"})
+    output = io.StringIO()
+    lines = "".join(f"add {i} 1\n" for i in range(9)) + "divide 1 0\n"
+    assert app.run_batch(io.StringIO(lines), output, parallel=True) == (10, 1)
+    assert output.getvalue().splitlines()[:3] == ["1.0", "2.0", "3.0"]
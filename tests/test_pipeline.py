@@ -0,0 +1,100 @@
+from decimal import Decimal
+import pytest
+from app import numeric
+from app.commands import Command, CommandHandler
+from app.commands.cache import ResultCache
+from app.commands.metrics import CommandMetrics
+from app.journal import Journal, JournalReader
+from app.pipeline import Pipeline, Result
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.multiply import MultiplyCommand
+
+
+class TripleCommand(Command):
+    """Replacement multiply used to check that stages follow a swapped command."""
+    def execute(self):
+        pass
+
+    def calculate(self, a, b):
+        return a * b * 3
+
+
+@pytest.fixture
+def handler():
+    """Fixture returning a handler with the arithmetic plugins and greet registered."""
+    handler = CommandHandler()
+    for name, command in (("add", AddCommand()), ("multiply", MultiplyCommand()), ("divide", DivideCommand()), ("greet", GreetCommand())):
+        handler.register_command(name, command)
+    return handler
+
+
+def test_run_chains_results(handler):
+    """Test that each stage receives the previous result through _ or as its implicit first operand."""
+    assert Pipeline(handler, "add 2 3 | multiply _ 4 | divide _ 2").run() == 10.0
+    assert Pipeline(handler, "add 2 3 | mul 4 | div 20 _").run() == 1.0
+    assert Pipeline(handler, "add 1 2 | multiply _ _").run() == 9.0
+    square_sum = Pipeline(handler, "add _ _ | multiply _ _")
+    assert square_sum.arity == 2 and square_sum.run(1, "2") == 9.0
+    with pytest.raises(ValueError, match="expects 2 inputs, got 1"):
+        square_sum.run(1)
+
+
+def test_compile_errors(handler):
+    """Test that unknown commands, commands without calculate and empty stages fail at compile time."""
+    with pytest.raises(KeyError):
+        Pipeline(handler, "add 1 2 | nope _")
+    with pytest.raises(TypeError, match="'greet' cannot be used in a pipeline"):
+        Pipeline(handler, "add 1 2 | greet")
+    with pytest.raises(ValueError, match="Empty pipeline stage"):
+        Pipeline(handler, "add 1 2 |")
+
+
+def test_map_reports_errors_per_item(handler):
+    """Test that map streams every item through the stages and keeps going after a failed item."""
+    pipeline = Pipeline(handler, "add _ 1 | divide 10 _")
+    results = list(pipeline.map([4, "-2", -1, (1, 2), "x"]))
+    assert results[:2] == [Result((4,), 2.0, None), Result((-2.0,), -10.0, None)]
+    assert results[2] == Result((-1,), None, "Cannot divide by zero")
+    assert results[3].error == "Pipeline expects 1 inputs, got 2"
+    assert results[4].error is not None
+    lazy = pipeline.map(iter(range(10**9)))
+    assert next(lazy).value == 10.0 #items are consumed one at a time
+
+
+def test_backend_switch_and_swapped_command(handler):
+    """Test that constants are re-parsed for a new numeric backend and a swapped command is picked up."""
+    pipeline = Pipeline(handler, "add 0.1 0.2 | multiply _ 2")
+    assert pipeline.run() == pytest.approx(0.6)
+    numeric.set_backend("decimal")
+    try:
+        assert pipeline.run() == Decimal("0.6")
+    finally:
+        numeric.set_backend("float")
+    handler.register_command("multiply", TripleCommand())
+    assert pipeline.run() == pytest.approx(1.8)
+
+
+def test_cache_and_metrics_apply(handler):
+    """Test that stages go through the result cache and are counted by the metrics."""
+    handler.cache = ResultCache(max_size=16)
+    handler.metrics = CommandMetrics()
+    pipeline = Pipeline(handler, "add _ 1 | multiply _ 2")
+    assert [result.value for result in pipeline.map([1, 1, 2])] == [4.0, 4.0, 6.0]
+    assert handler.cache.stats()["hits"] == 2
+    assert handler.metrics.snapshot()["commands"]["multiply"]["calls"] == 3
+
+
+def test_repl_line(handler, tmp_path, capsys):
+    """Test that a '|' line dispatched like any command prints and journals the final result."""
+    handler.journal = Journal(str(tmp_path / "session.journal"))
+    assert handler.execute_command("add 2 3 | multiply _ 4") == 20.0
+    assert "Result: add 2 3 | multiply _ 4 = 20.0" in capsys.readouterr().out
+    assert handler.execute_command("add 2 3 | missing _") is None
+    assert "Command 'missing' not found" in capsys.readouterr().out
+    with pytest.raises(ZeroDivisionError):
+        handler.execute_command("add 1 1 | divide _ 0")
+    handler.journal.flush()
+    assert [(entry.command, entry.result, entry.error) for entry in JournalReader(handler.journal.path)] == [
+        ("pipeline", 20.0, None), ("pipeline", None, "Cannot divide by zero")]
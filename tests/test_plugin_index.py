@@ -0,0 +1,100 @@
+import os
+import sys
+import textwrap
+import pytest
+from app import App
+from app.plugin_index import PluginIndex, LazyCommand, fingerprint
+
+PLUGIN_SOURCE = textwrap.dedent('''
+    from app.commands import Command
+    class {name}Command(Command):
+        def execute(self):
+            print("{name} executed")
+        def calculate(self, a, b):
+            return a + b
+''')
+
+
+@pytest.fixture
+def plugin_app(tmp_path, monkeypatch):
+    """Fixture returning an App subclass that loads plugins from a temporary package."""
+    package = tmp_path / "indexed_plugins"
+    for name in ("alpha", "beta"):
+        (package / name).mkdir(parents=True)
+        (package / name / "__init__.py").write_text(PLUGIN_SOURCE.format(name=name.title()))
+    (package / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("PLUGIN_INDEX", "true")
+    monkeypatch.setenv("PLUGIN_INDEX_PATH", str(tmp_path / "index.json"))
+    class IndexedApp(App):
+        plugins_package = "indexed_plugins"
+        plugin_path = str(package)
+    yield IndexedApp
+    for module in [m for m in sys.modules if m.startswith("indexed_plugins")]:
+        del sys.modules[module]
+
+def test_index_is_built_then_used_lazily(plugin_app, capsys):
+    """Test that the first start writes the index and the next one registers lazy commands."""
+    first = plugin_app()
+    first.load_plugins()
+    assert os.path.exists(first.settings["PLUGIN_INDEX_PATH"])
+    assert not isinstance(first.command_handler.commands["alpha"], LazyCommand)
+    for module in [m for m in sys.modules if m.startswith("indexed_plugins.")]:
+        del sys.modules[module]
+
+    second = plugin_app()
+    second.load_plugins()
+    assert all(isinstance(c, LazyCommand) for c in second.command_handler.commands.values())
+    assert "indexed_plugins.alpha" not in sys.modules
+
+    second.command_handler.execute_command("alpha")
+    assert "Alpha executed" in capsys.readouterr().out
+    assert "indexed_plugins.alpha" in sys.modules
+    assert "indexed_plugins.beta" not in sys.modules
+    assert not isinstance(second.command_handler.commands["alpha"], LazyCommand)
+    # attribute access such as the operand path resolves the placeholder too
+    assert second.command_handler.commands["beta"].pure is False
+    assert second.command_handler.calculate("beta", 1, 2) == 3.0
+
+def test_index_invalidated_when_plugin_changes(plugin_app):
+    """Test that editing a plugin makes the stored index stale."""
+    app = plugin_app()
+    app.load_plugins()
+    index = PluginIndex(app.settings["PLUGIN_INDEX_PATH"], app.plugin_path)
+    assert index.load()
+    plugin_file = os.path.join(app.plugin_path, "beta", "__init__.py")
+    with open(plugin_file, "a", encoding="utf-8") as f:
+        f.write("\n# edited\n")
+    assert not index.load()
+
+def test_index_missing_or_unwritable(tmp_path, caplog):
+    """Test that an unreadable index is treated as stale and write failures are only logged."""
+    index = PluginIndex(str(tmp_path / "missing" / "index.json"), str(tmp_path))
+    assert not index.load()
+    index.save({})
+    assert "Could not write plugin index" in caplog.text
+
+def test_fingerprint_ignores_private_dirs(tmp_path):
+    """Test that only plugin packages with python files are fingerprinted."""
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "real").mkdir()
+    (tmp_path / "real" / "__init__.py").write_text("")
+    assert list(fingerprint(str(tmp_path))) == ["real"]
+
+def test_lazy_command_private_attribute():
+    """Test that private attribute lookups never trigger an import."""
+    lazy = LazyCommand(None, "x", "does.not.exist", "X")
+    with pytest.raises(AttributeError):
+        lazy._private
+
+def test_lazy_command_records_import_time_and_delegates_flags():
+    """Test that resolving a placeholder records its import time and exposes the command's flags."""
+    from app.commands import CommandHandler
+    from app.commands.metrics import CommandMetrics
+    handler = CommandHandler(metrics=CommandMetrics())
+    lazy = LazyCommand(handler, "stats", "app.plugins.stats", "StatsCommand", needs_handler=True)
+    handler.register_command("stats", lazy)
+    assert lazy.takes_arguments is True
+    assert "stats" in handler.metrics.snapshot()["plugin_import_seconds"]
+    assert handler.commands["stats"] is lazy.command
@@ -1,3 +1,4 @@
+import io
 import pytest
 import random
 import re
@@ -227,12 +228,13 @@ def test_load_plugins_successful_registration(app_instance, monkeypatch):
     monkeypatch.setattr("importlib.import_module", 
                         lambda name: mock_module)
     
-    # Spy on the register_command method
-    with patch.object(app_instance.command_handler, "register_command") as mock_register:
+    # Spy on the register_commands method, plugins are registered in one batch
+    with patch.object(app_instance.command_handler, "register_commands") as mock_register:
         app_instance.load_plugins()
         
-        # Check if register_command was called at least once
-        assert mock_register.called, "register_command should have been called"
+        # Check if register_commands was called with the mock command
+        assert mock_register.called, "register_commands should have been called"
+        assert [name for name, _ in mock_register.call_args.args[0]] == ["mock_plugin"]
 
 def test_load_plugins_failure_during_import(app_instance, monkeypatch, caplog):
     """Test handling of plugin import failures."""
@@ -303,6 +305,13 @@ def test_load_plugins_command_registration_exception(app_instance, monkeypatch,
     assert "Failed to register command" in caplog.text
     assert "broken_plugin" in caplog.text
 
+def test_app_start_ends_with_input(monkeypatch, capsys):
+    """Test that the REPL returns at the end of a script piped in without an exit line."""
+    monkeypatch.setattr("sys.stdin", io.StringIO("add 2 3\n"))
+    App().start()
+    output = capsys.readouterr().out
+    assert "Result: 2.0 + 3.0 = 5.0" in output and "Error" not in output
+
 def test_app_start_exit(monkeypatch):
     """Test The App.start by simulating user input and exit."""
     app = App()
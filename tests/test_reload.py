@@ -0,0 +1,128 @@
+import sys
+import time
+import pytest
+from app import App
+from app.commands.cache import ResultCache
+
+PLUGIN_SOURCE = '''
+from app.commands import Command
+class VersionCommand(Command):
+    pure = True
+    def execute(self):
+        return {version}
+    def calculate(self, a):
+        return a * {version}
+'''
+
+
+@pytest.fixture
+def reload_app(tmp_path, monkeypatch):
+    """Fixture returning a loaded App over a temporary plugin package plus a writer for plugin files."""
+    package = tmp_path / "reload_plugins"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    def write(name, source):
+        (package / name).mkdir(exist_ok=True)
+        (package / name / "__init__.py").write_text(source)
+    write("version", PLUGIN_SOURCE.format(version=1))
+    write("other", PLUGIN_SOURCE.format(version=100))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("PLUGIN_RELOAD", "true")
+    monkeypatch.setenv("PLUGIN_RELOAD_INTERVAL", "0")
+    class ReloadApp(App):
+        plugins_package = "reload_plugins"
+        plugin_path = str(package)
+    app = ReloadApp()
+    app.load_plugins()
+    yield app, write
+    if app.reloader.thread is not None:
+        app.reloader.stop()
+    for module in [m for m in sys.modules if m.startswith("reload_plugins")]:
+        del sys.modules[module]
+
+def test_changed_plugin_is_swapped(reload_app):
+    """Test that only the edited plugin is re-imported and in-flight holders keep the old instance."""
+    app, write = reload_app
+    handler = app.command_handler
+    handler.cache = ResultCache(max_size=8)
+    old_version, other = handler.commands["version"], handler.commands["other"]
+    assert handler.calculate("version", 2) == 2.0
+    write("version", PLUGIN_SOURCE.format(version=2) + "\n# longer file\n")
+    assert app.reloader.check() == {"added": [], "reloaded": ["version"], "removed": [], "failed": [], "skipped": []}
+    assert handler.calculate("version", 2) == 4.0 #not served from the stale cache
+    assert old_version.execute() == 1 #an in-flight call on the old instance still works
+    assert handler.commands["other"] is other
+    assert app.reloader.reloads == 1 and app.reloader.last_reload_seconds > 0
+
+def test_failed_reload_keeps_old_command(reload_app, caplog):
+    """Test that a broken edit leaves the previous version registered."""
+    app, write = reload_app
+    old_version = app.command_handler.commands["version"]
+    write("version", "this is not python")
+    assert app.reloader.check()["failed"] == ["version"]
+    assert app.command_handler.commands["version"] is old_version
+    assert sys.modules["reload_plugins.version"].VersionCommand is type(old_version)
+    write("version", "x = 1  # no command class")
+    assert app.reloader.check()["failed"] == ["version"]
+    assert "no command found" in caplog.text
+
+def test_added_and_removed_plugins(reload_app):
+    """Test that new plugins are registered and deleted ones unregistered."""
+    import shutil
+    app, write = reload_app
+    write("fresh", PLUGIN_SOURCE.format(version=3))
+    shutil.rmtree(f"{app.plugin_path}/other")
+    changes = app.reloader.check()
+    assert changes["added"] == ["fresh"] and changes["removed"] == ["other"]
+    assert "other" not in app.command_handler.commands
+    assert "reload_plugins.other" not in sys.modules
+    assert app.command_handler.calculate("fresh", 1) == 3.0
+    assert app.reloader.check() is None #nothing changed since
+
+def test_sandboxed_plugins_are_not_reloaded(reload_app, caplog):
+    """Test that edits to sandboxed plugins are never imported into the main process."""
+    import shutil
+    app, write = reload_app
+    sandboxed = app.command_handler.commands["version"]
+    app.sandboxed = {"version", "other"}
+    write("version", PLUGIN_SOURCE.format(version=2) + "\n# longer file\n")
+    shutil.rmtree(f"{app.plugin_path}/other")
+    changes = app.reloader.check()
+    assert changes["skipped"] == ["other", "version"] and not changes["reloaded"] and not changes["removed"]
+    assert app.command_handler.commands["version"] is sandboxed and "other" in app.command_handler.commands
+    assert "restart to load them: other, version" in caplog.text
+
+def test_poll_interval(reload_app):
+    """Test that poll only checks once the interval has elapsed."""
+    app, write = reload_app
+    app.reloader.interval = 60
+    write("version", PLUGIN_SOURCE.format(version=5) + "\n\n\n")
+    assert app.reloader.poll() is None
+    app.reloader.interval = 0
+    assert app.reloader.poll()["reloaded"] == ["version"]
+
+def test_background_thread(reload_app):
+    """Test that the watcher thread picks up changes on its own."""
+    app, write = reload_app
+    app.reloader.interval = 0.01
+    app.reloader.start()
+    write("version", PLUGIN_SOURCE.format(version=7) + "\n# changed\n")
+    deadline = time.monotonic() + 5
+    while app.command_handler.commands["version"].execute() != 7 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    app.reloader.stop()
+    assert app.command_handler.commands["version"].execute() == 7
+
+def test_repl_polls_before_dispatch(reload_app, monkeypatch):
+    """Test that the REPL picks up a plugin change before running the next command."""
+    from app.plugins.exit import ExitCommand
+    app, write = reload_app
+    app.command_handler.register_command("exit", ExitCommand())
+    inputs = iter(["version", "exit"])
+    def fake_input(prompt):
+        write("version", PLUGIN_SOURCE.format(version=9) + "\n# repl\n")
+        return next(inputs)
+    monkeypatch.setattr("builtins.input", fake_input)
+    with pytest.raises(SystemExit):
+        app.start()
+    assert app.command_handler.commands["version"].execute() == 9
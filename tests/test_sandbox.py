@@ -0,0 +1,172 @@
+import decimal
+import fractions
+import sys
+import pytest
+from app import App
+from app import batch
+from app.sandbox import (SandboxPool, SandboxedCommand, SandboxError, SandboxTimeout, CALCULATE, EXECUTE,
+                         encode_request, decode_request, encode_response, decode_response, rebuild_error)
+
+PLUGINS = {
+    "echo": '''
+from app.commands import Command
+class EchoCommand(Command):
+    takes_arguments = True
+    aliases = ('say',)
+    def execute(self, *args):
+        print("echo:", *args)
+        return len(args)
+''',
+    "sleeper": '''
+import time
+from app.commands import Command
+class SleeperCommand(Command):
+    pure = True
+    def execute(self):
+        pass
+    def calculate(self, seconds):
+        time.sleep(float(seconds))
+        return seconds
+''',
+    "crasher": '''
+import os
+from app.commands import Command
+class CrasherCommand(Command):
+    def execute(self):
+        os._exit(3)
+''',
+    "quitter": '''
+import sys
+from app.commands import Command
+class QuitterCommand(Command):
+    def execute(self):
+        sys.exit("bye")
+''',
+    "hog": '''
+from app.commands import Command
+class HogCommand(Command):
+    def execute(self):
+        return len(bytearray(512 * 1024 * 1024))
+''',
+    "broken": '''
+raise ImportError("broken on purpose")
+''',
+}
+
+
+@pytest.fixture
+def plugin_package(tmp_path, monkeypatch):
+    """Fixture writing misbehaving plugins to a temporary package importable by the workers."""
+    package = tmp_path / "sandbox_plugins"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    for name, source in PLUGINS.items():
+        (package / name).mkdir()
+        (package / name / "__init__.py").write_text(source)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package
+    for module in [m for m in sys.modules if m.startswith("sandbox_plugins")]:
+        del sys.modules[module]
+
+
+@pytest.fixture
+def pool(plugin_package):
+    """Fixture returning a one worker pool over the test plugins."""
+    pool = SandboxPool({name: f"sandbox_plugins.{name}" for name in PLUGINS}, size=1, timeout=2.0, max_calls=3)
+    yield pool
+    pool.close()
+
+
+def test_protocol_round_trip():
+    """Test that requests and responses keep value types through the binary encoding."""
+    args = (None, 7, -2.5, decimal.Decimal("0.1"), fractions.Fraction(1, 3), "héllo", True, 2**70)
+    opcode, name, mode, decoded = decode_request(encode_request("add", CALCULATE, args))
+    assert (name, mode) == ("add", CALCULATE)
+    assert decoded == (None, 7, -2.5, decimal.Decimal("0.1"), fractions.Fraction(1, 3), "héllo", "True", str(2**70))
+    assert decode_response(encode_response(1, "boom", "out", "ValueError")) == (1, "boom", "out", "ValueError")
+    assert isinstance(rebuild_error("ZeroDivisionError", "x"), ZeroDivisionError)
+    assert isinstance(rebuild_error("CustomError", "x"), SandboxError)
+
+
+def test_proxy_forwards_calls_and_output(pool, capsys):
+    """Test that the proxy mirrors the plugin metadata, prints its output and returns its result."""
+    echo = SandboxedCommand(pool, "echo")
+    assert echo.takes_arguments and echo.aliases == ("say",) and not hasattr(echo, "calculate")
+    assert echo.execute("a", "b") == 2
+    assert capsys.readouterr().out == "echo: a b\n"
+    sleeper = SandboxedCommand(pool, "sleeper")
+    assert sleeper.pure and sleeper.calculate(0) == 0
+    with pytest.raises(SandboxError, match="broken on purpose"):
+        SandboxedCommand(pool, "broken")
+
+
+def test_timeout_crash_and_exit_replace_worker(pool):
+    """Test that a hung, crashed or exiting plugin is reported and the pool keeps serving."""
+    with pytest.raises(SandboxTimeout):
+        pool.call("sleeper", CALCULATE, (10,))
+    with pytest.raises(SandboxError, match="crashed"):
+        pool.call("crasher", EXECUTE)
+    with pytest.raises(SandboxError, match="tried to exit"):
+        pool.call("quitter", EXECUTE)
+    assert pool.recycled == 3
+    assert pool.call("echo", EXECUTE, ("ok",)) == (1, "echo: ok\n")
+    assert len(pool.workers) == 1
+
+
+def test_workers_recycled_after_max_calls(pool):
+    """Test that a worker is replaced by a fresh process after max_calls calls."""
+    pids = set()
+    for _ in range(7):
+        pids.add(pool.workers[0].process.pid)
+        pool.call("echo", EXECUTE)
+    assert pool.recycled == 2 and len(pids) == 3
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="resource limits are posix only")
+def test_memory_limit(plugin_package):
+    """Test that an allocation over the memory limit fails in the worker instead of the REPL."""
+    pool = SandboxPool({"hog": "sandbox_plugins.hog", "echo": "sandbox_plugins.echo"}, size=1, memory_limit=256 * 1024 * 1024)
+    try:
+        with pytest.raises(MemoryError):
+            pool.call("hog", EXECUTE)
+        assert pool.recycled == 1
+        assert pool.call("echo", EXECUTE)[0] == 0
+    finally:
+        pool.close()
+
+
+def test_app_registers_sandboxed_plugins(monkeypatch, capsys):
+    """Test that SANDBOX_PLUGINS runs those plugins in the pool and keeps them out of the main process."""
+    monkeypatch.setenv("SANDBOX_PLUGINS", "divide,greet,missing")
+    monkeypatch.setenv("SANDBOX_WORKERS", "1")
+    monkeypatch.delenv("PLUGIN_INDEX", raising=False)
+    for module in [m for m in sys.modules if m.startswith("app.plugins.greet")]:
+        del sys.modules[module]
+    app = App()
+    app.load_plugins()
+    try:
+        handler = app.command_handler
+        assert isinstance(handler.commands["divide"], SandboxedCommand)
+        assert "app.plugins.greet" not in sys.modules
+        assert handler.calculate("divide", 6, 3) == 2.0
+        assert handler.execute_command("div 9 3") == 3.0
+        handler.output.flush() #output to a non-terminal is buffered
+        assert "9.0 / 3.0 = 3.0" in capsys.readouterr().out
+        assert handler.execute_command("greet") == "Hello World!"
+        record = batch.execute_record(handler, "divide 1 0")
+        assert record["error"] == "Cannot divide by zero"
+        assert not isinstance(handler.commands["add"], SandboxedCommand)
+    finally:
+        app.sandbox.close()
+
+
+def test_exit_is_never_sandboxed(monkeypatch, caplog):
+    """Test that the exit plugin stays in the main process, where it can end the REPL."""
+    monkeypatch.setenv("SANDBOX_PLUGINS", "exit")
+    monkeypatch.delenv("PLUGIN_INDEX", raising=False)
+    app = App()
+    app.load_plugins()
+    assert app.sandboxed == set() and app.sandbox is None
+    assert "exit cannot be sandboxed" in caplog.text
+    with pytest.raises(SystemExit):
+        app.command_handler.execute_command("exit")
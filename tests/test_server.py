@@ -0,0 +1,237 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.commands import Command, CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.exit import ExitCommand
+from app.server import CommandServer
+
+
+class SlowCommand(Command):
+    """Synchronous command that blocks its worker thread."""
+    def execute(self):
+        pass
+    def calculate(self, seconds):
+        time.sleep(seconds)
+        return seconds
+
+class OverlapCommand(Command):
+    """Synchronous command that is not thread safe and records how many of its calls overlap."""
+    def __init__(self):
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+    def execute(self):
+        pass
+    def calculate(self, seconds):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(seconds)
+        with self.lock:
+            self.active -= 1
+        return seconds
+
+class BrokenCommand(Command):
+    """Command failing with an exception the server has no specific handling for."""
+    def execute(self):
+        raise RuntimeError("plugin bug")
+
+class NativeExecuteCommand(Command):
+    """Command with a native execute coroutine."""
+    def execute(self):
+        raise AssertionError("execute_async should be used")
+    async def execute_async(self):
+        return "async execute"
+
+class NativeAsyncCommand(Command):
+    """Command with a native calculate coroutine that never touches the executor."""
+    def execute(self):
+        pass
+    def calculate(self, a):
+        raise AssertionError("calculate_async should be used")
+    async def calculate_async(self, a):
+        await asyncio.sleep(0)
+        return a * 10
+
+@pytest.fixture
+def handler():
+    """Fixture with a mix of synchronous and asynchronous commands."""
+    command_handler = CommandHandler()
+    command_handler.register_command("add", AddCommand())
+    command_handler.register_command("divide", DivideCommand())
+    command_handler.register_command("greet", GreetCommand())
+    command_handler.register_command("exit", ExitCommand())
+    command_handler.register_command("slow", SlowCommand())
+    command_handler.register_command("native", NativeAsyncCommand())
+    command_handler.register_command("native_execute", NativeExecuteCommand())
+    command_handler.register_command("broken", BrokenCommand())
+    return command_handler
+
+def test_execute_command_async_returns_results(handler):
+    """Test that results are returned rather than only printed."""
+    async def run():
+        return [
+            await handler.execute_command_async("add", "1", "2"),
+            await handler.execute_command_async("greet"),
+            await handler.execute_command_async("native", 4),
+            await handler.execute_command_async("native_execute"),
+        ]
+    assert asyncio.run(run()) == [3.0, "Hello World!", 40.0, "async execute"]
+
+def test_execute_command_async_errors(handler):
+    """Test that errors propagate to the awaiting caller."""
+    async def run(*args):
+        return await handler.execute_command_async(*args)
+    with pytest.raises(KeyError):
+        asyncio.run(run("missing"))
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(run("divide", 1, 0))
+    with pytest.raises(TypeError):
+        asyncio.run(run("greet", 1))
+
+async def request(address, lines):
+    """Send request lines over one connection and collect the response lines."""
+    reader, writer = await asyncio.open_connection(*address)
+    responses = []
+    for line in lines:
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        responses.append((await reader.readline()).decode().strip())
+    writer.close()
+    return responses
+
+def test_server_protocol(handler):
+    """Test the line protocol including errors and exit closing only the session."""
+    async def run():
+        server = CommandServer(handler, max_workers=4)
+        await server.start()
+        address = server.addresses()[0]
+        responses = await request(address, ["add 3 4", "divide 1 0", "nope 1", "greet 1", "broken", "add 1 2"])
+        reader, writer = await asyncio.open_connection(*address)
+        writer.write(b"\nexit\n")
+        closed = await reader.read()
+        still_serving = await request(address, ["add 1 1"])
+        await server.close()
+        return responses, closed, still_serving
+    responses, closed, still_serving = asyncio.run(run())
+    assert responses[0] == "7.0"
+    assert responses[1] == "Error: Cannot divide by zero"
+    assert responses[2] == "Error: Command 'nope' not found"
+    assert responses[3] == "Error: Command 'greet' does not accept operands"
+    assert responses[4:] == ["Error: RuntimeError: plugin bug", "3.0"]
+    assert closed == b""
+    assert still_serving == ["2.0"]
+
+class ReportCommand(Command):
+    """Command without calculate that only writes its report."""
+    def execute(self):
+        self.output.write("first line")
+        self.output.write("second line")
+
+def test_lines_dispatched_whole_answer_with_their_output(handler, capsys):
+    """Test that commands without calculate, pipelines and assignments answer with their result or their output."""
+    from app.plugins.multiply import MultiplyCommand
+    handler.register_command("multiply", MultiplyCommand())
+    handler.register_command("report", ReportCommand())
+    async def run():
+        server = CommandServer(handler, max_workers=2)
+        await server.start()
+        address = server.addresses()[0]
+        responses = await request(address, ["greet", "report", "add 1 2 | multiply _ 3", "x = add 1 2", "y = multiply x 4", "report 1"])
+        reader, writer = await asyncio.open_connection(*address)
+        writer.write(b"exit\n")
+        await reader.read()
+        await server.close()
+        return responses
+    assert asyncio.run(run()) == ["Hello World!", "first line; second line", "9.0", "3.0", "12.0",
+                                  "Error: Command 'report' does not accept operands"]
+    assert capsys.readouterr().out == "" #nothing reaches the server's own stdout, exit included
+
+def test_commands_that_prompt_are_rejected(handler):
+    """Test that a request whose command would prompt for input gets an error instead of blocking a worker."""
+    from app.plugins.expr import ExprCommand
+    handler.register_command("expr", ExprCommand(handler))
+    async def run():
+        server = CommandServer(handler, max_workers=2)
+        await server.start()
+        responses = await request(server.addresses()[0], ["expr (a+b)", "expr", "expr 1+2"])
+        await server.close()
+        return responses
+    needs_input = "Error: Command 'expr' needs input, pass its operands inline"
+    assert asyncio.run(run()) == [needs_input, needs_input, "3.0"]
+
+def test_slow_plugin_does_not_block_fast_clients(handler):
+    """Test that a blocked worker thread does not delay other clients."""
+    async def run():
+        server = CommandServer(handler, max_workers=4)
+        await server.start()
+        address = server.addresses()[0]
+        slow = asyncio.create_task(request(address, ["slow 0.5"]))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        fast = await request(address, ["add 1 2"])
+        fast_time = time.perf_counter() - start
+        await slow
+        await server.close()
+        return fast, fast_time, slow.result()
+    fast, fast_time, slow = asyncio.run(run())
+    assert fast == ["3.0"] and slow == ["0.5"]
+    assert fast_time < 0.4
+
+def test_server_serializes_unsafe_plugins(handler):
+    """Test that the server enables threaded dispatch, so concurrent clients never overlap in an unsafe plugin."""
+    overlap = OverlapCommand()
+    handler.register_command("overlap", overlap)
+    async def run():
+        server = CommandServer(handler, max_workers=4)
+        await server.start()
+        address = server.addresses()[0]
+        responses = await asyncio.gather(*(request(address, ["overlap 0.02", "add 1 1"]) for _ in range(4)))
+        await server.close()
+        return responses
+    assert asyncio.run(run()) == [["0.02", "2.0"]] * 4
+    assert handler.plugin_locks is not None and overlap.peak == 1
+
+def test_server_unix_socket(handler, tmp_path):
+    """Test serving over a unix domain socket."""
+    async def run():
+        server = CommandServer(handler)
+        path = str(tmp_path / "calc.sock")
+        task = asyncio.create_task(server.serve_forever(unix_path=path))
+        while server.server is None:
+            await asyncio.sleep(0.01)
+        reader, writer = await asyncio.open_unix_connection(path)
+        writer.write(b"add 2 2\n")
+        response = await reader.readline()
+        writer.close()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return response
+    assert asyncio.run(run()) == b"4.0\n"
+
+def test_app_serve(monkeypatch, capsys):
+    """Test that App.serve loads plugins, sizes the pool from settings and stops on Ctrl+C."""
+    from app import App
+    app = App()
+    app.settings["SERVER_WORKERS"] = "3"
+    def interrupted(coroutine):
+        coroutine.close()
+        raise KeyboardInterrupt
+    monkeypatch.setattr("asyncio.run", interrupted)
+    app.serve(port=9999)
+    assert "Serving on 127.0.0.1:9999" in capsys.readouterr().out
+    assert "add" in app.command_handler.commands
+
+def test_get_int_setting():
+    """Test integer settings with unset, valid and invalid values."""
+    from app import App
+    app = App()
+    app.settings.update({"GOOD": "4", "BAD": "four", "EMPTY": ""})
+    assert app.get_int_setting("GOOD") == 4
+    assert app.get_int_setting("BAD", 2) == 2
+    assert app.get_int_setting("EMPTY", 1) == 1
+    assert app.get_int_setting("MISSING") is None
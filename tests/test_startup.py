@@ -0,0 +1,66 @@
+import logging
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+from app import App
+from app.startup import parse_importtime, profile_startup, format_report
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      1500 |       4000 | app
+import time:      2000 |       2500 |   app.commands
+"""
+
+
+def test_parse_importtime_and_report():
+    """Test that importtime lines are parsed with their nesting and the slowest imports come first."""
+    imports = parse_importtime(IMPORTTIME + "unrelated stderr line\n")
+    assert imports == [("_io", 120, 120, 1), ("app", 1500, 4000, 0), ("app.commands", 2000, 2500, 1)]
+    report = format_report({"import app": 0.004, "total": 0.01}, imports, limit=2)
+    lines = report.splitlines()
+    assert lines[1].split() == ["import", "app", "4.00", "ms"]
+    assert lines[4].split()[-1] == "app" and lines[5].split()[-1] == "app.commands"
+    assert "_io" not in report
+
+
+def test_profile_startup_cold_start(tmp_path):
+    """Test that a fresh interpreter reports every startup phase and its imports."""
+    env = dict(os.environ, STARTUP="minimal", PYTHONPATH=os.getcwd(), PLUGIN_INDEX_PATH=str(tmp_path / "index.json"))
+    phases, imports = profile_startup(env, cwd=str(tmp_path))
+    assert list(phases) == ["import app", "dotenv", "logging", "settings", "numeric", "handler", "plugins", "total"]
+    assert phases["total"] >= phases["import app"] > 0
+    names = {name for name, *_ in imports}
+    assert "app" in names and "asyncio" not in names and "dotenv" not in names
+    assert "decimal" not in names and "fractions" not in names #only the decimal and fraction backends import them
+
+
+def test_minimal_startup(tmp_path, monkeypatch):
+    """Test that the minimal startup skips dotenv without a .env file, defers the log file and uses the plugin index."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("STARTUP", "minimal")
+    monkeypatch.delenv("PLUGIN_INDEX", raising=False)
+    with patch("logging.basicConfig") as basic_config:
+        app = App()
+    assert app.minimal and app.settings["PLUGIN_INDEX"] == "true"
+    assert app.load_dotenv() is False
+    handler = basic_config.call_args.kwargs["handlers"][0]
+    assert basic_config.call_args.kwargs["level"] == logging.WARNING
+    assert isinstance(handler, logging.FileHandler) and handler.stream is None
+    (tmp_path / ".env").write_text("MINIMAL_DOTENV_VALUE=loaded\n")
+    assert app.load_dotenv() is True
+    assert os.environ.pop("MINIMAL_DOTENV_VALUE") == "loaded"
+    app.load_plugins()
+    assert set(app.startup_phases) == {"dotenv", "logging", "settings", "numeric", "handler", "plugins"}
+    assert (tmp_path / ".plugin_index.json").exists()
+
+
+def test_default_startup_skips_inspect_and_tracemalloc(tmp_path):
+    """Test that a default App leaves inspect and tracemalloc unimported, and loading every plugin, mem included, tracemalloc."""
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), PLUGIN_INDEX="false")
+    for name in ("STARTUP", "MEMORY_TRACE", "PLUGIN_IDLE_UNLOAD"):
+        env.pop(name, None)
+    script = "import sys\nfrom app import App\napp = App()\nprint(sorted({'inspect', 'tracemalloc', 'app.memory'} & set(sys.modules)))\n" \
+             "app.load_plugins()\nassert 'mem' in app.command_handler.commands\nprint(sorted({'tracemalloc', 'app.memory'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", script], env=env, cwd=str(tmp_path), capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["[]", "[]"]
@@ -0,0 +1,147 @@
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.commands import Command, CommandHandler
+from app.commands.dispatch import AmbiguousCommandError, DispatchTable
+from app.output import TextSink
+from app.parallel import ThreadedExecutor
+from app.plugin_index import LazyCommand
+from app.plugins.add import AddCommand
+from app.plugins.multiply import MultiplyCommand
+
+
+class ConcurrencyProbe(Command):
+    """Command that records how many calls overlap, sleeping releases the GIL so overlaps can happen."""
+    def __init__(self, thread_safe:bool):
+        self.thread_safe = thread_safe
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def execute(self):
+        return self.calculate(0)
+
+    def calculate(self, value):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.002)
+        with self.lock:
+            self.active -= 1
+        return value
+
+
+def test_dispatch_copy_shares_nothing_mutable():
+    """Test that updating a copy of the dispatch table leaves the original untouched."""
+    table = DispatchTable()
+    table.add("multiply", ("mul",))
+    snapshot = table.copy()
+    table.add("menu")
+    table.remove("multiply")
+    assert snapshot.resolve("m") == "multiply" and snapshot.resolve("mul") == "multiply"
+    assert table.resolve("m") == "menu"
+    with pytest.raises(KeyError):
+        table.resolve("mul")
+    snapshot.add("minimum", ("min",))
+    with pytest.raises(AmbiguousCommandError) as error:
+        snapshot.resolve("m")
+    assert error.value.candidates == ["minimum", "multiply"]
+
+
+def test_register_commands_publishes_once():
+    """Test that bulk registration copies the registry once and resolves like one-by-one registration."""
+    sink = TextSink(io.StringIO(), flush_size=1 << 20)
+    handler = CommandHandler(output=sink)
+    before = handler.dispatch
+    commands = [(f"command{number:04d}", MultiplyCommand()) for number in range(2000)]
+    handler.register_commands(commands + [("add", AddCommand())])
+    assert handler.dispatch is not before and len(handler.commands) == 2001
+    assert handler.get_command("ad")[0] == "add" and handler.get_command("COMMAND1999")[0] == "command1999"
+    assert all(command.output is sink for _, command in commands)
+    handler.register_commands({"add": MultiplyCommand()})
+    assert handler.execute_command("add 2 3") == 6.0
+
+
+def test_registry_stress():
+    """Test that threads registering, unregistering and dispatching at once never see a broken registry."""
+    handler = CommandHandler()
+    handler.register_command("add", AddCommand())
+    handler.enable_threads()
+    stop = threading.Event()
+    errors = []
+
+    def churn(worker:int):
+        command = MultiplyCommand()
+        for round in range(300):
+            name = f"mult{worker}x{round % 7}"
+            handler.register_command(name, command)
+            handler.unregister_command(name)
+        handler.register_command(f"mult{worker}", command)
+
+    def dispatch():
+        while not stop.is_set():
+            try:
+                assert handler.calculate("add", 1, 2) == 3.0
+                assert handler.get_command("ADD")[0] == "add"
+                try:
+                    handler.calculate("mult", 2, 3)
+                except KeyError:
+                    pass #nothing registered or several candidates at this instant
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=dispatch) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(churn, range(4)))
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
+    assert sorted(handler.commands) == ["add", "mult0", "mult1", "mult2", "mult3"]
+    assert sorted(handler.dispatch.exact) == ["add", "mul", "mult0", "mult1", "mult2", "mult3", "plus", "times"]
+    assert handler.calculate("mult2", 2, 3) == 6.0
+    with pytest.raises(AmbiguousCommandError):
+        handler.get_command("mult")
+
+
+@pytest.mark.parametrize("thread_safe, expect_overlap", [(False, False), (True, True)])
+def test_unsafe_plugins_are_serialized(thread_safe, expect_overlap):
+    """Test that threaded dispatch runs a plugin not declared thread_safe one call at a time."""
+    handler = CommandHandler()
+    probe = ConcurrencyProbe(thread_safe)
+    handler.register_command("probe", probe)
+    handler.register_command("add", AddCommand())
+    records = list(ThreadedExecutor(handler, workers=4, chunk_size=2).run([f"probe {i}" for i in range(40)] + ["add 1 2"]))
+    assert [record["result"] for record in records] == [float(i) for i in range(40)] + [3.0]
+    assert (probe.peak > 1) is expect_overlap
+    probe.peak = 0
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: handler.execute_command("probe"), range(12)))
+    assert (probe.peak > 1) is expect_overlap
+
+
+def test_lazy_command_resolves_once():
+    """Test that threads dispatching a lazy placeholder at once build a single command."""
+    handler = CommandHandler()
+    lazy = LazyCommand(handler, "add", "app.plugins.add", "AddCommand")
+    handler.register_command("add", lazy)
+    with ThreadPoolExecutor(8) as pool:
+        commands = set(pool.map(lambda _: id(lazy.resolve()), range(32)))
+    assert len(commands) == 1 and handler.commands["add"] is lazy.command
+    assert lazy.thread_safe
+
+
+def test_app_threads_batch(tmp_path, monkeypatch):
+    """Test the threaded batch mode of the App keeps input order."""
+    from app import App
+    monkeypatch.chdir(tmp_path)
+    app = App()
+    output = io.StringIO()
+    lines = "".join(f"add {i} 1\n" for i in range(50)) + "divide 1 0\n"
+    assert app.run_batch(io.StringIO(lines), output, "text", threads=3) == (51, 1)
+    assert output.getvalue().splitlines() == [str(float(i + 1)) for i in range(50)] + ["Error: Cannot divide by zero"]
@@ -0,0 +1,150 @@
+import io
+import pytest
+from app import App
+from app.commands import CommandHandler
+from app.output import TextSink
+from app.plugins.add import AddCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.vars import VarsCommand
+from app.variables import CycleError, VariableGraph
+
+
+class CountingAdd(AddCommand):
+    """Add that records the operands of every calculation, to see what was recomputed."""
+    def __init__(self):
+        self.calls = []
+
+    def calculate(self, a, b):
+        self.calls.append((a, b))
+        return super().calculate(a, b)
+
+
+@pytest.fixture
+def handler():
+    """Fixture returning a handler writing to a buffer, with counting add, multiply, divide and greet registered."""
+    handler = CommandHandler(output=TextSink(io.StringIO(), flush_size=1 << 20))
+    for name, command in (("add", CountingAdd()), ("multiply", MultiplyCommand()), ("divide", DivideCommand()), ("greet", GreetCommand())):
+        handler.register_command(name, command)
+    return handler
+
+
+def test_only_downstream_variables_are_recomputed(handler):
+    """Test that changing an input recomputes its dependents once each, in topological order."""
+    graph = VariableGraph(handler)
+    for name, text in (("a", "1"), ("b", "2"), ("c", "10"), ("x", "add a b"), ("y", "add x a"), ("z", "mul x y"), ("other", "add c 1")):
+        graph.define(name, text)
+    add = handler.commands["add"]
+    add.calls.clear()
+    assert graph.define("a", "5") == (3, 1)
+    assert add.calls == [(5.0, 2.0), (7.0, 5.0)] #x before y, other untouched
+    assert graph.value("z") == 84.0 and graph.value("other") == 11.0
+    assert graph.define("a", "5.0") == (0, 4)
+    assert graph.stats()["variables"] == 7
+
+
+def test_unchanged_value_stops_propagation(handler):
+    """Test that a recomputed variable keeping its value does not recompute the variables below it."""
+    graph = VariableGraph(handler)
+    graph.define("a", "2")
+    graph.define("b", "3")
+    graph.define("sum", "add a b")
+    graph.define("double", "mul sum 2")
+    assert graph.define("sum", "add b a") == (1, 1)
+    assert graph.define("a", "3") == (2, 0)
+    graph.define("b", "2")
+    assert graph.value("double") == 10.0 and graph.last == (2, 0)
+
+
+def test_cycles_are_rejected(handler):
+    """Test that a definition closing a cycle raises and leaves the graph as it was."""
+    graph = VariableGraph(handler)
+    graph.define("a", "1")
+    graph.define("b", "add a 1")
+    graph.define("c", "mul b 2")
+    with pytest.raises(CycleError) as error:
+        graph.define("a", "add c 1")
+    assert error.value.cycle == ["a", "c", "b", "a"]
+    assert graph.variables["a"].is_input and graph.value("c") == 4.0
+    with pytest.raises(CycleError, match="x -> x"):
+        graph.define("x", "add x 1")
+    assert "x" not in graph
+
+
+def test_errors_propagate_and_recover(handler):
+    """Test that a failing formula leaves its dependents without a value until the input is fixed."""
+    graph = VariableGraph(handler)
+    graph.define("n", "0")
+    graph.define("ratio", "div 1 n")
+    graph.define("scaled", "mul ratio 10")
+    assert graph.variables["ratio"].error == "Cannot divide by zero"
+    with pytest.raises(ValueError, match="'scaled' has no value: 'ratio' has no value"):
+        graph.value("scaled")
+    graph.define("n", "4")
+    assert graph.value("scaled") == 2.5
+    with pytest.raises(ValueError, match="'ratio' is used by scaled"):
+        graph.delete("ratio")
+    graph.delete("scaled")
+    assert graph.delete("ratio").value == 0.25 and len(graph) == 1
+    with pytest.raises(KeyError, match="Unknown variable: m"):
+        graph.define("x", "add m 1")
+    with pytest.raises(TypeError, match="cannot be used"):
+        graph.define("x", "greet")
+    with pytest.raises(ValueError, match="Invalid variable name"):
+        graph.define("2x", "1")
+
+
+def test_graph_persists(handler, tmp_path):
+    """Test that a saved graph loads in dependency order and computes every formula once."""
+    path = str(tmp_path / "variables.json")
+    graph = VariableGraph(handler, path)
+    graph.define("z", "3")
+    graph.define("a", "add z 1")
+    graph.define("b", "mul a z")
+    graph.define("z", "4")
+    graph.close()
+    assert not graph.modified
+    loaded = VariableGraph(handler, path)
+    assert loaded.load() and list(loaded.variables) == ["z", "a", "b"]
+    assert loaded.value("b") == 20.0 and loaded.last == (2, 0)
+    (tmp_path / "broken.json").write_text("{")
+    assert not VariableGraph(handler, str(tmp_path / "broken.json")).load()
+    assert not VariableGraph(handler, str(tmp_path / "missing.json")).load()
+
+
+def test_assignment_lines_and_vars_command(handler):
+    """Test the 'x = ...' syntax through the handler and the vars command listing and deleting variables."""
+    handler.register_command("vars", VarsCommand(handler))
+    assert handler.execute_command("a = 2") == 2.0
+    assert handler.execute_command("x=add a 3") == 5.0
+    assert handler.execute_command("y = mul x x") == 25.0
+    assert handler.execute_command("a = 3") == 3.0
+    handler.execute_command("q = nope 1")
+    with pytest.raises(CycleError):
+        handler.execute_command("a = add y 1")
+    assert handler.execute_command("vars") == {"a": 3.0, "x": 6.0, "y": 36.0}
+    handler.execute_command("vars x")
+    assert handler.execute_command("vars del y") == 36.0
+    assert handler.execute_command("vars stats")["variables"] == 2
+    handler.output.flush()
+    lines = handler.output.stream.getvalue().splitlines()
+    assert lines[:5] == ["a = 2.0 (recomputed 0, skipped 0)", "x = 5.0 (recomputed 1, skipped 0)",
+                         "y = 25.0 (recomputed 1, skipped 1)", "a = 3.0 (recomputed 2, skipped 0)", "Command 'nope' not found"]
+    assert lines[5:10] == ["a = 3.0", "x = 6.0  [add a 3]", "y = 36.0  [mul x x]", "x = 6.0  [add a 3]", "-uses: a"]
+
+
+def test_app_restores_variables(tmp_path, monkeypatch):
+    """Test that the REPL app reloads the variables saved by a previous session."""
+    monkeypatch.chdir(tmp_path)
+    first = App()
+    first.load_plugins()
+    first.load_variables()
+    first.command_handler.execute_command("rate = 2")
+    first.command_handler.execute_command("cost = multiply rate 21")
+    first.command_handler.variables.close()
+    second = App()
+    second.load_plugins()
+    assert second.load_variables().value("cost") == 42.0
+    monkeypatch.setenv("VARIABLES_PATH", "")
+    assert App().load_variables() is None
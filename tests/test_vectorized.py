@@ -0,0 +1,59 @@
+import array
+import pytest
+from app.commands import CommandHandler
+from app.plugins.add import AddCommand
+from app.plugins.sub import SubCommand
+from app.plugins.multiply import MultiplyCommand
+from app.plugins.divide import DivideCommand
+from app.plugins.greet import GreetCommand
+from app import vectorized
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def handler():
+    """Fixture with every arithmetic command registered."""
+    command_handler = CommandHandler()
+    for name, command in {"add": AddCommand, "sub": SubCommand, "multiply": MultiplyCommand,
+                          "divide": DivideCommand, "greet": GreetCommand}.items():
+        command_handler.register_command(name, command())
+    return command_handler
+
+@pytest.mark.parametrize("op_name, expected", [
+    ("add", [5.0, 7.0, 9.0]),
+    ("sub", [-3.0, -3.0, -3.0]),
+    ("multiply", [4.0, 10.0, 18.0]),
+    ("divide", [0.25, 0.4, 0.5]),
+])
+def test_calculate_array_matches_per_call(handler, op_name, expected):
+    """Test that the array path agrees with the per-call path."""
+    a = np.array([1.0, 2.0, 3.0])
+    b = [4, 5, 6]
+    result = handler.calculate_array(op_name, a, b)
+    assert result.tolist() == expected
+    assert result.tolist() == [handler.calculate(op_name, x, y) for x, y in zip(a, b)]
+
+def test_divide_array_masks_zero(handler):
+    """Test that divide by zero is masked per element instead of raising."""
+    result = handler.calculate_array("divide", array.array("d", [1, 2, 3]), array.array("d", [1, 0, 2]))
+    assert result.mask.tolist() == [False, True, False]
+    assert result.compressed().tolist() == [1.0, 1.5]
+
+def test_calculate_array_errors(handler):
+    """Test unknown commands, commands without an array path and mismatched shapes."""
+    with pytest.raises(KeyError):
+        handler.calculate_array("missing", [1], [1])
+    with pytest.raises(TypeError):
+        handler.calculate_array("greet", [1], [1])
+    with pytest.raises(ValueError):
+        handler.calculate_array("add", [1, 2], [1])
+
+def test_get_numpy_missing(monkeypatch):
+    """Test that a missing numpy install produces a clear error."""
+    def fail_import(name):
+        raise ImportError(name)
+    monkeypatch.setattr(vectorized, "_numpy", None)
+    monkeypatch.setattr("importlib.import_module", fail_import)
+    with pytest.raises(RuntimeError, match="requires numpy"):
+        vectorized.get_numpy()